@@ -37,39 +37,39 @@ class AnimationGeneratorTests(unittest.TestCase):
             (
                 {"width": "4px"},
                 {"width": "10px"},
-                [Element("animate", {"id":"tween_0",
-                                     "from": "4px",
-                                     "to": "10px",
-                                     "dur": "5s",
-                                     "attributeName": "width",
-                                     "attributeType": "XML",
-                                     "fill": "freeze",
-                                     "begin": "tween_transition.begin"})]
+                [Element("{http://www.w3.org/2000/svg}animate", {"id":"tween_0",
+                                                                 "from": "4px",
+                                                                 "to": "10px",
+                                                                 "dur": "5s",
+                                                                 "attributeName": "width",
+                                                                 "attributeType": "XML",
+                                                                 "fill": "freeze",
+                                                                 "begin": "tween_transition.begin"})]
             ),
             (
                 {"transform": "scale(1)"},
                 {"transform": "scale(20)"},
-                [Element("animateTransform", {"id":"tween_1",
-                                              "from": "1",
-                                              "to": "20",
-                                              "type": "scale",
-                                              "dur": "5s",
-                                              "attributeName": "transform",
-                                              "attributeType": "XML",
-                                              "fill": "freeze",
-                                              "begin": "tween_transition.begin"})]
+                [Element("{http://www.w3.org/2000/svg}animateTransform", {"id":"tween_1",
+                                                                          "from": "1",
+                                                                          "to": "20",
+                                                                          "type": "scale",
+                                                                          "dur": "5s",
+                                                                          "attributeName": "transform",
+                                                                          "attributeType": "XML",
+                                                                          "fill": "freeze",
+                                                                          "begin": "tween_transition.begin"})]
             ),
             (
                 {"d": "M0 0L1 1"},
                 {"d": "M0 0L1 2"},
-                [Element("animate", {"id":"tween_2",
-                                     "from": "M 0 0 L 1 1",
-                                     "to": "M 0 0 L 1 2",
-                                     "dur": "5s",
-                                     "attributeName": "d",
-                                     "attributeType": "XML",
-                                     "fill": "freeze",
-                                     "begin": "tween_transition.begin"})]
+                [Element("{http://www.w3.org/2000/svg}animate", {"id":"tween_2",
+                                                                 "from": "M 0 0 L 1 1",
+                                                                 "to": "M 0 0 L 1 2",
+                                                                 "dur": "5s",
+                                                                 "attributeName": "d",
+                                                                 "attributeType": "XML",
+                                                                 "fill": "freeze",
+                                                                 "begin": "tween_transition.begin"})]
             )
         ]
         uut = AnimationGenerator.AnimationGenerator("5s")
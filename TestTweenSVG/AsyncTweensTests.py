@@ -0,0 +1,102 @@
+"""
+    Test module for AsyncTweens module
+"""
+import asyncio
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+import threading
+import unittest
+import TweenSVG
+from TweenSVG.AsyncTweens import atween_svgs
+from TweenSVG.Serializer import Serializer
+from TweenSVG.Stats import Stats
+
+
+FRAMES = ["test_inputs/test2/frame1.svg", "test_inputs/test2/frame2.svg", "test_inputs/test2/frame3.svg"]
+
+
+class _CountingExecutor(ThreadPoolExecutor):
+    """
+        A single thread executor that keeps the futures it was given. Work
+        after the first `free` calls waits for release to be set
+    """
+
+    def __init__(self, free=0):
+        ThreadPoolExecutor.__init__(self, max_workers=1)
+        self.futures = []
+        self.free = free
+        self.release = threading.Event()
+
+    def submit(self, func, *args, **kwargs):
+        wait = len(self.futures) >= self.free
+        def wait_then_call():
+            if wait:
+                self.release.wait()
+            return func(*args, **kwargs)
+        future = ThreadPoolExecutor.submit(self, wait_then_call)
+        self.futures.append(future)
+        return future
+
+
+class AsyncTweensTests(unittest.TestCase):
+    """
+        Test class for atween_svgs
+    """
+
+    def __init__(self, args):
+        unittest.TestCase.__init__(self, args)
+        self.uut = atween_svgs
+
+    async def _collect(self, files, **options):
+        return [Serializer().tostring(tween) async for tween in self.uut(files, **options)]
+
+    def test_same_as_sync(self):
+        expected = list(TweenSVG.tween_svg_bytes_from_filenames(FRAMES * 2, group_matching=True))
+        stats = Stats()
+        self.assertEqual(asyncio.run(self._collect(FRAMES * 2, group_matching=True, stats=stats)), expected)
+        self.assertEqual(stats.counts["tweens"], 5)
+        self.assertEqual(stats.counts["keyframes"], 6)
+        with ProcessPoolExecutor(max_workers=2) as executor:
+            self.assertEqual(asyncio.run(self._collect(FRAMES * 2, group_matching=True, executor=executor, max_pending=4)),
+                             expected)
+
+    def test_backpressure_and_close(self):
+        executor = _CountingExecutor(free=1)
+
+        async def first_tween():
+            tweens = self.uut(FRAMES * 4, executor=executor, max_pending=3)
+            await tweens.__anext__()
+            # Only max_pending pairs were submitted before the first was yielded
+            self.assertEqual(len(executor.futures), 3)
+            await tweens.aclose()
+
+        with executor:
+            asyncio.run(first_tween())
+            executor.release.set()
+        self.assertEqual(len(executor.futures), 3)
+        # The third cannot have started while the second waited
+        self.assertTrue(executor.futures[2].cancelled())
+
+    def test_cancel(self):
+        executor = _CountingExecutor()
+
+        async def consume():
+            async for _ in self.uut(FRAMES * 4, executor=executor):
+                pass
+
+        async def cancel_consumer():
+            task = asyncio.ensure_future(consume())
+            while len(executor.futures) < 2:
+                await asyncio.sleep(0.01)
+            task.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await task
+
+        with executor:
+            asyncio.run(cancel_consumer())
+            executor.release.set()
+        self.assertEqual(len(executor.futures), 2)
+        self.assertTrue(executor.futures[1].cancelled())
+
+    def test_max_pending(self):
+        with self.assertRaises(ValueError):
+            asyncio.run(self._collect(FRAMES, max_pending=0))
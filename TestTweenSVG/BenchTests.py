@@ -0,0 +1,91 @@
+"""
+    Test module for bench module
+"""
+import json
+import subprocess
+import sys
+import unittest
+from TweenSVG import bench
+
+
+class BenchTests(unittest.TestCase):
+    """
+        Test class for the bench module
+    """
+
+    def __init__(self, args):
+        unittest.TestCase.__init__(self, args)
+        self.uut = bench
+
+    @staticmethod
+    def _ids(tree, prefix):
+        return {element.attrib["id"] for element in tree.iter()
+                if "id" in element.attrib and element.attrib["id"].startswith(prefix)}
+
+    def test_shapes_keyframes(self):
+        frame1, frame2 = self.uut.shapes_keyframes(elements=40, depth=3, added=25, removed=50)
+        self.assertEqual(len(self._ids(frame1, "e")), 40)
+        self.assertEqual(len(self._ids(frame2, "new")), 10)
+        self.assertTrue(self._ids(frame2, "e") < self._ids(frame1, "e"))
+        # Shapes are 3 groups deep
+        shape = next(element for element in frame1.iter() if element.attrib.get("id") == "e0")
+        parents = {child: parent for parent in frame1.iter() for child in parent}
+        depth = 0
+        while parents[shape] is not frame1.getroot():
+            shape = parents[shape]
+            depth += 1
+        self.assertEqual(depth, 3)
+        # The same parameters give the same keyframes
+        self.assertEqual(self._ids(self.uut.shapes_keyframes(elements=40, depth=3, added=25, removed=50)[1], ""),
+                         self._ids(frame2, ""))
+
+    def test_graph_keyframes(self):
+        frame1, frame2 = self.uut.graph_keyframes(nodes=20, added=0, removed=0)
+        self.assertEqual(self._ids(frame1, "node"), {"node%d" % (node) for node in range(1, 21)})
+        self.assertEqual(self._ids(frame1, "edge"), self._ids(frame2, "edge"))
+
+    def test_run_case(self):
+        result = self.uut.run_case(self.uut.shapes_keyframes, repeat=1, elements=10, path_length=5)
+        self.assertEqual(set(result["seconds"]), set(self.uut.STAGES) | {"total"})
+        self.assertTrue(all(seconds >= 0 for seconds in result["seconds"].values()))
+        json.dumps(result)
+
+    def test_serializer_case(self):
+        corpus = self.uut.corpus_keyframes("test_inputs")
+        self.assertIn(["test_inputs/test1/frame1.svg", "test_inputs/test1/frame2.svg"], corpus)
+        result = self.uut.serializer_case(corpus + [self.uut.shapes_keyframes(elements=10)], repeat=1)
+        self.assertEqual(result["tweens"], sum(len(keyframes) - 1 for keyframes in corpus) + 1)
+        self.assertTrue(result["identical"])
+        self.assertEqual(set(result["seconds"]), {"elementtree", "serializer"})
+
+    def test_compare(self):
+        old = {"cases": {"a": {"seconds": {"total": 1.0}}, "b": {"seconds": {"total": 1.0}}}}
+        new = {"cases": {"a": {"seconds": {"total": 1.2}}, "b": {"seconds": {"total": 3.0}}}}
+        lines, slower = self.uut.compare(old, new, 1.5)
+        self.assertEqual(len(lines), 2)
+        self.assertTrue(slower)
+        self.assertFalse(self.uut.compare(old, old, 1.5)[1])
+        # Import time is compared with the earlier run, not an absolute budget
+        old_import = dict(old, import_seconds=0.01)
+        lines, slower = self.uut.compare(old_import, dict(old, import_seconds=0.012), 1.5)
+        self.assertEqual(len(lines), 3)
+        self.assertFalse(slower)
+        self.assertTrue(self.uut.compare(old_import, dict(old, import_seconds=0.05), 1.5)[1])
+
+    def test_import_budget(self):
+        # The budget is enforced as the modules that importing TweenSVG may
+        # import, the wall clock time depends on the machine and the
+        # benchmark checks it against IMPORT_BUDGET
+        engine = ["TweenSVG.Tweener", "xml.etree", "defusedxml", "numpy", "asyncio", "multiprocessing"]
+        seconds, modules = self.uut.import_time("TweenSVG")
+        self.assertGreater(seconds, 0)
+        self.assertIn("TweenSVG", modules)
+        for name in engine:
+            self.assertNotIn(name, modules)
+        script = "import sys, TweenSVG; print('\\n'.join(sys.modules))"
+        result = subprocess.run([sys.executable, "-X", "importtime", "-c", script], stdout=subprocess.PIPE,
+                                stderr=subprocess.PIPE, universal_newlines=True, check=True)
+        imported = set(result.stdout.split())
+        self.assertIn("TweenSVG", imported)
+        for name in engine:
+            self.assertNotIn(name, imported)
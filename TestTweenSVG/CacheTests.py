@@ -0,0 +1,101 @@
+"""
+    Test module for Cache module
+"""
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+import TweenSVG
+from TweenSVG.Cache import TweenCache
+from TweenSVG.Tweener import Tweener
+from TweenSVG.Stats import Stats
+
+
+FRAMES = ["test_inputs/test2/frame1.svg", "test_inputs/test2/frame2.svg", "test_inputs/test2/frame3.svg"]
+
+
+class CacheTests(unittest.TestCase):
+    """
+        Test class for TweenCache and tweening with a cache
+    """
+
+    def __init__(self, args):
+        unittest.TestCase.__init__(self, args)
+        self.uut = TweenCache
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def _tween_bytes(self, files, stats=None, **options):
+        return list(TweenSVG.tween_svg_bytes_from_filenames(files, stats=stats, cache_dir=self.directory, **options))
+
+    def test_same_as_uncached(self):
+        expected = list(TweenSVG.tween_svg_bytes_from_filenames(FRAMES, group_matching=True))
+        self.assertEqual(self._tween_bytes(FRAMES, group_matching=True), expected)
+        self.assertEqual(self._tween_bytes(FRAMES, group_matching=True), expected)
+        trees = list(TweenSVG.tween_svgs_from_filenames(FRAMES, group_matching=True, cache_dir=self.directory))
+        self.assertEqual(len(trees), 2)
+
+    def test_hits_skip_parsing(self):
+        self._tween_bytes(FRAMES)
+        stats = Stats()
+        with mock.patch.object(Tweener, "load_keyframe", side_effect=AssertionError("parsed")):
+            self._tween_bytes(FRAMES, stats=stats)
+        self.assertEqual(stats.counts["cache_hits"], 2)
+        self.assertNotIn("cache_misses", stats.counts)
+
+    def test_changed_file_and_options(self):
+        files = [os.path.join(self.directory, os.path.basename(filename)) for filename in FRAMES]
+        for source, target in zip(FRAMES, files):
+            shutil.copyfile(source, target)
+        self._tween_bytes(files)
+        # Touching the last keyframe only misses the pair that uses it
+        with open(files[2], "ab") as frame:
+            frame.write(b"\n")
+        stats = Stats()
+        self._tween_bytes(files, stats=stats)
+        self.assertEqual((stats.counts["cache_hits"], stats.counts["cache_misses"]), (1, 1))
+        self.assertEqual(stats.counts["keyframes"], 2)
+        stats = Stats()
+        self._tween_bytes(files, stats=stats, duration="2s")
+        self.assertEqual(stats.counts["cache_misses"], 2)
+
+    def test_key(self):
+        cache = self.uut(self.directory)
+        options = {"duration": "5s"}
+        key = cache.key("a", "b", options, (1, 2))
+        self.assertEqual(key, cache.key("a", "b", dict(options), [1, 2]))
+        self.assertNotEqual(key, cache.key("b", "a", options, (1, 2)))
+        self.assertNotEqual(key, cache.key("a", "b", {"duration": "1s"}, (1, 2)))
+        self.assertNotEqual(key, cache.key("a", "b", options, (1, 3)))
+        with mock.patch("TweenSVG.Cache.OUTPUT_FORMAT", 0):
+            self.assertNotEqual(key, cache.key("a", "b", options, (1, 2)))
+        with mock.patch("TweenSVG.Cache.__version__", "0"):
+            self.assertNotEqual(key, cache.key("a", "b", options, (1, 2)))
+
+    def test_replace(self):
+        cache = self.uut(self.directory, max_bytes=1000)
+        key = cache.key("a", "b", {}, ())
+        for _ in range(5):
+            cache.put(key, b"x" * 300)
+        # Replacing an entry doesn't add to the total, so nothing is evicted
+        self.assertEqual(cache._total_bytes, 300)
+        self.assertEqual(cache.get(key), b"x" * 300)
+
+    def test_eviction(self):
+        cache = self.uut(self.directory, max_bytes=1000)
+        for num in range(5):
+            key = cache.key(str(num), "", {}, ())
+            cache.put(key, b"x" * 300)
+            # Modification times are used to find the least recently used
+            os.utime(cache._path(key), (num, num))
+        cache.get(cache.key("0", "", {}, ()))
+        total = sum(size for _, size, _ in cache._entries())
+        self.assertTrue(total <= 1000)
+        self.assertIn(cache.key("4", "", {}, ()), cache)
+        self.assertNotIn(cache.key("1", "", {}, ()), cache)
+        self.assertEqual(self.uut(self.directory, max_bytes=1000)._total_bytes, total)
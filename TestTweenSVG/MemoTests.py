@@ -0,0 +1,93 @@
+"""
+    Test module for Memo module
+"""
+import unittest
+from unittest import mock
+from xml.etree.ElementTree import ElementTree
+from xml.etree.ElementTree import Element
+from TweenSVG.Memo import LRUMemo, AttributeMemo
+from TweenSVG.SVGUtils import SVGUtils
+from TweenSVG.Tweener import Tweener
+from TweenSVG.Stats import Stats
+
+
+class MemoTests(unittest.TestCase):
+    """
+        Test class for LRUMemo and AttributeMemo
+    """
+
+    def __init__(self, args):
+        unittest.TestCase.__init__(self, args)
+        self.uut = LRUMemo
+
+    def test_hits_and_misses(self):
+        memo = self.uut()
+        func = mock.Mock(side_effect=lambda value: value * 2)
+        self.assertEqual(memo.lookup("a", 1, func, 1), 2)
+        self.assertEqual(memo.lookup("a", 1, func, 1), 2)
+        self.assertEqual(func.call_count, 1)
+        self.assertEqual((memo.hits, memo.misses), (1, 1))
+
+    def test_evicts_least_recently_used(self):
+        memo = self.uut(max_entries=2)
+        for key in ["a", "b", "a", "c"]:
+            memo.lookup(key, 1, str.upper, key)
+        self.assertEqual(len(memo), 2)
+        self.assertEqual(memo.misses, 3)
+        # "b" was used least recently so it was evicted
+        memo.lookup("a", 1, str.upper, "a")
+        memo.lookup("b", 1, str.upper, "b")
+        self.assertEqual(memo.misses, 4)
+
+    def test_evicts_by_size(self):
+        memo = self.uut(max_chars=10)
+        memo.lookup("a", 6, str.upper, "a")
+        memo.lookup("b", 6, str.upper, "b")
+        self.assertEqual(len(memo), 1)
+        # An entry bigger than the limit is still kept until the next one
+        memo.lookup("c", 20, str.upper, "c")
+        self.assertEqual(len(memo), 1)
+
+    def test_attribute_memo_counts(self):
+        stats = Stats()
+        memo = AttributeMemo(stats=stats)
+        first = memo.parse(SVGUtils.path_data, "M0 0 L1 1")
+        # Equal strings from different elements are one entry
+        self.assertIs(memo.parse(SVGUtils.path_data, "".join(["M0 0 ", "L1 1"])), first)
+        memo.pair("d", "a", "b", lambda from_val, to_val: (from_val, to_val))
+        memo.pair("d", "a", "b", lambda from_val, to_val: (from_val, to_val))
+        memo.pair("d", "b", "a", lambda from_val, to_val: (from_val, to_val))
+        self.assertEqual(stats.counts, {"value_memo_misses": 1, "value_memo_hits": 1,
+                                        "pair_memo_misses": 2, "pair_memo_hits": 1})
+
+    @staticmethod
+    def _keyframe(paths):
+        svg = Element("svg", attrib={'width': '10px', 'height': '10px'})
+        for index, d in enumerate(paths):
+            svg.append(Element("path", attrib={'id': 'p%d' % (index), 'd': d}))
+        return ElementTree(svg)
+
+    def test_shared_across_keyframes(self):
+        tweener = Tweener()
+        tweener.add_keyframe(self._keyframe(["M0 0 L1 1"] * 5))
+        tweener.add_keyframe(self._keyframe(["M0 0 L2 2"] * 5))
+        tweener.add_keyframe(self._keyframe(["M0 0 L1 1"] * 5))
+        with mock.patch.object(SVGUtils, 'path_data', wraps=SVGUtils.path_data) as path_data, \
+             mock.patch.object(SVGUtils, 'tweenable_paths', wraps=SVGUtils.tweenable_paths) as tweenable_paths:
+            tweens = list(tweener.tweens())
+        self.assertEqual(len(tweens), 2)
+        # Two distinct path strings, and two distinct pairs of them
+        self.assertEqual(path_data.call_count, 2)
+        self.assertEqual(tweenable_paths.call_count, 2)
+
+    def test_shared_memo(self):
+        memo = AttributeMemo()
+        first = Tweener(memo=memo)
+        second = Tweener(memo=memo)
+        for tweener in (first, second):
+            tweener.add_keyframe(self._keyframe(["M0 0 L1 1"]))
+            tweener.add_keyframe(self._keyframe(["M0 0 L3 3"]))
+        expected = list(first.tweens())
+        with mock.patch.object(SVGUtils, 'tweenable_paths', wraps=SVGUtils.tweenable_paths) as tweenable_paths:
+            self.assertEqual(len(list(second.tweens())), len(expected))
+        tweenable_paths.assert_not_called()
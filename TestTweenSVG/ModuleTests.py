@@ -1,12 +1,20 @@
 """
     Test the TweenSVG module
 """
+import os
+import pathlib
+import subprocess
+import sys
+import tempfile
 import unittest
 from tempfile import NamedTemporaryFile
 import TweenSVG
+from TweenSVG.Tweener import Tweener
+from TweenSVG.Serializer import Serializer
 import itertools
 from itertools import chain
 from xml.etree.ElementTree import ElementTree
+from xml.etree.ElementTree import tostring
 
 
 class ModuleTests(unittest.TestCase):
@@ -133,3 +141,100 @@ class ModuleTests(unittest.TestCase):
             "test_inputs/test4/frame1.svg",
             "test_inputs/test4/frame2.svg"
         ])
+
+    def test_tween_svgs_streaming(self):
+        files = [
+            "test_inputs/test2/frame1.svg",
+            "test_inputs/test2/frame2.svg",
+            "test_inputs/test2/frame3.svg"
+        ]
+        expected = [tostring(tween.getroot()) for tween in TweenSVG.tween_svgs_from_filenames(files)]
+        # Filenames and file objects can be mixed
+        with open(files[1], "rb") as file2:
+            tweens = TweenSVG.tween_svgs_streaming(iter([files[0], file2, files[2]]))
+            self.assertEqual([tostring(tween.getroot()) for tween in tweens], expected)
+
+    def test_path_objects(self):
+        files = [
+            "test_inputs/test2/frame1.svg",
+            "test_inputs/test2/frame2.svg",
+            "test_inputs/test2/frame3.svg"
+        ]
+        expected = [tostring(tween.getroot()) for tween in TweenSVG.tween_svgs_from_filenames(files)]
+        paths = [pathlib.Path(filename) for filename in files]
+        self.assertEqual([tostring(tween.getroot()) for tween in TweenSVG.tween_svgs_from_filenames(paths)], expected)
+        tweens = TweenSVG.tween_svgs_streaming(paths, prescan=True)
+        self.assertEqual([tostring(tween.getroot()) for tween in tweens], expected)
+
+    def test_tweens_independent(self):
+        # "c" fades in in the first tween and is kept as it is in the second,
+        # both are made from the same keyframe element
+        frames = [
+            '<svg xmlns="http://www.w3.org/2000/svg" width="10" height="10">%s</svg>' % (rects)
+            for rects in ['<rect id="a" x="0"/>',
+                          '<rect id="a" x="1"/><rect id="c" x="2"/>',
+                          '<rect id="c" x="2"/>']]
+        with tempfile.TemporaryDirectory() as directory:
+            files = []
+            for count, frame in enumerate(frames):
+                files.append(os.path.join(directory, "frame%d.svg" % (count)))
+                with open(files[-1], "w") as frame_file:
+                    frame_file.write(frame)
+            for tweens in [TweenSVG.tween_svgs_from_filenames(files), TweenSVG.tween_svgs_streaming(files)]:
+                tween1, tween2 = tweens
+                expected = tostring(tween2.getroot())
+                for element in tween1.iter():
+                    element.set("modified", "1")
+                self.assertEqual(tostring(tween2.getroot()), expected)
+
+    def test_lazy_names(self):
+        # The classes, not the modules of the same name
+        self.assertIs(TweenSVG.Tweener, Tweener)
+        self.assertIs(TweenSVG.Serializer, Serializer)
+        with self.assertRaises(AttributeError):
+            TweenSVG.not_a_name
+
+    def test_submodule_imports(self):
+        # In a new interpreter, so that the engine modules are imported for the first time
+        script = "; ".join([
+            "import importlib, types",
+            "import TweenSVG.Tweener",
+            "import TweenSVG.Cache",
+            "import TweenSVG",
+            "module = importlib.import_module('TweenSVG.Tweener')",
+            "assert isinstance(module, types.ModuleType)",
+            "assert TweenSVG.Tweener is module.Tweener",
+            "assert isinstance(TweenSVG.Cache, types.ModuleType)",
+            "from TweenSVG.Serializer import Serializer",
+            "assert TweenSVG.Serializer is Serializer",
+        ])
+        result = subprocess.run([sys.executable, "-c", script], stderr=subprocess.PIPE, universal_newlines=True)
+        self.assertEqual(result.returncode, 0, result.stderr)
+
+    def test_tweener_import_orders(self):
+        # The class and the module can be imported either way round
+        class_first = [
+            "from TweenSVG import Tweener",
+            "import TweenSVG.Tweener",
+        ]
+        module_first = list(reversed(class_first))
+        checks = [
+            "import sys, types, TweenSVG",
+            "module = sys.modules['TweenSVG.Tweener']",
+            "assert isinstance(module, types.ModuleType)",
+            "assert Tweener is module.Tweener",
+            "assert TweenSVG.Tweener is Tweener",
+        ]
+        for imports in [class_first, module_first]:
+            result = subprocess.run([sys.executable, "-c", "; ".join(imports + checks)],
+                                    stderr=subprocess.PIPE, universal_newlines=True)
+            self.assertEqual(result.returncode, 0, result.stderr)
+
+    def test_help_skips_engine(self):
+        script = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "tweensvg")
+        result = subprocess.run([sys.executable, "-X", "importtime", script, "--help"],
+                                stdout=subprocess.PIPE, stderr=subprocess.PIPE, universal_newlines=True)
+        self.assertEqual(result.returncode, 0)
+        self.assertIn("--serve", result.stdout)
+        self.assertNotIn("TweenSVG", result.stderr)
+        self.assertNotIn("defusedxml", result.stderr)
@@ -0,0 +1,121 @@
+"""
+    Test module for Node module
+"""
+import pathlib
+import unittest
+from io import BytesIO
+from xml.etree.ElementTree import tostring, ParseError
+from defusedxml import EntitiesForbidden
+from defusedxml.ElementTree import parse as defused_parse
+from TweenSVG.Node import Node, NodeTree, parse, as_element
+from TweenSVG.Keyframe import Keyframe
+from TweenSVG.Tweener import Tweener
+
+SVG_NS = "{http://www.w3.org/2000/svg}"
+INKSCAPE_NS = "{http://www.inkscape.org/namespaces/inkscape}"
+
+EDITED_SVG = b"""<?xml version="1.0"?>
+<!-- Made by hand -->
+<svg xmlns="http://www.w3.org/2000/svg"
+     xmlns:inkscape="http://www.inkscape.org/namespaces/inkscape"
+     xmlns:sodipodi="http://sodipodi.sourceforge.net/DTD/sodipodi-0.dtd"
+     width="100" height="100">
+  <metadata><title>Drawing</title></metadata>
+  <sodipodi:namedview id="view" inkscape:zoom="2"/>
+  <g id="layer" inkscape:label="Layer 1" inkscape:groupmode="layer">
+    <rect id="a" x="1" y="2" width="3" height="4"/>
+    <text id="b">Hello<tspan>world</tspan>!</text>
+  </g>
+</svg>
+"""
+
+
+class NodeTests(unittest.TestCase):
+    """
+        Test class for Node and parse()
+    """
+
+    def __init__(self, args):
+        unittest.TestCase.__init__(self, args)
+        self.uut = parse
+
+    def test_same_as_defusedxml(self):
+        for filename in ["test_inputs/test1/frame1.svg", "test_inputs/test3/paths1.svg"]:
+            tree = self.uut(filename)
+            self.assertIsInstance(tree, NodeTree)
+            self.assertEqual(tostring(tree.getroot().to_element()),
+                             tostring(defused_parse(filename).getroot()))
+        # Paths and files opened in text mode too
+        tree = self.uut(pathlib.Path("test_inputs/test1/frame1.svg"))
+        self.assertEqual(tostring(tree.getroot().to_element()),
+                         tostring(defused_parse("test_inputs/test1/frame1.svg").getroot()))
+        with open("test_inputs/test1/frame1.svg") as text_file:
+            tree = self.uut(text_file)
+        self.assertEqual(tostring(tree.getroot().to_element()),
+                         tostring(defused_parse("test_inputs/test1/frame1.svg").getroot()))
+        tree = self.uut(BytesIO(EDITED_SVG))
+        self.assertEqual(tostring(as_element(tree.getroot())),
+                         tostring(defused_parse(BytesIO(EDITED_SVG)).getroot()))
+
+    def test_element_functions(self):
+        root = self.uut(BytesIO(EDITED_SVG)).getroot()
+        self.assertEqual(root.tag, SVG_NS + "svg")
+        self.assertEqual(root.get("width"), "100")
+        self.assertIsNone(root.get("missing"))
+        self.assertEqual(len(root), 3)
+        self.assertEqual(root[2].get("id"), "layer")
+        self.assertEqual([node.get("id") for node in root.iter() if node.get("id")],
+                         ["view", "layer", "a", "b"])
+        text = root[2][1]
+        self.assertEqual((text.text, text[0].text, text[0].tail), ("Hello", "world", "!"))
+        # Leaves share the same empty children
+        self.assertEqual(list(root[2][0]), [])
+        self.assertIs(root[2][0]._children, root[1]._children)
+
+    def test_names_interned(self):
+        first = self.uut(BytesIO(EDITED_SVG)).getroot()
+        second = self.uut(BytesIO(EDITED_SVG)).getroot()
+        self.assertIs(first[2].tag, second[2].tag)
+        first_names = sorted(first[2].attrib, key=str)
+        second_names = sorted(second[2].attrib, key=str)
+        self.assertTrue(all(a is b for a, b in zip(first_names, second_names)))
+
+    def test_strip_metadata(self):
+        root = self.uut(BytesIO(EDITED_SVG), strip_metadata=True).getroot()
+        self.assertEqual([node.tag for node in root], [SVG_NS + "g"])
+        self.assertEqual(root[0].attrib, {"id": "layer"})
+        output = tostring(root.to_element())
+        self.assertNotIn(b"inkscape", output)
+        self.assertNotIn(b"Drawing", output)
+        self.assertIn(b"Hello", output)
+        # Everything is kept without strip_metadata
+        root = self.uut(BytesIO(EDITED_SVG)).getroot()
+        self.assertEqual(root[2].get(INKSCAPE_NS + "label"), "Layer 1")
+
+    def test_entities_forbidden(self):
+        source = b"""<?xml version="1.0"?>
+<!DOCTYPE svg [<!ENTITY lol "lol"><!ENTITY lols "&lol;&lol;&lol;">]>
+<svg xmlns="http://www.w3.org/2000/svg"><text>&lols;</text></svg>"""
+        with self.assertRaises(EntitiesForbidden):
+            self.uut(BytesIO(source))
+
+    def test_no_root(self):
+        with self.assertRaises(ParseError):
+            self.uut(BytesIO(b""))
+
+    def test_keyframe(self):
+        keyframe = Keyframe(self.uut(BytesIO(EDITED_SVG)))
+        self.assertIsInstance(keyframe.tree.getroot(), Node)
+        with self.assertRaises(TypeError):
+            Keyframe(self.uut(BytesIO(EDITED_SVG)).getroot())
+
+    def test_compact_tweens(self):
+        filenames = ["test_inputs/test1/frame1.svg", "test_inputs/test1/frame2.svg"]
+        outputs = {}
+        for compact, workers in [(False, None), (True, None), (True, 2)]:
+            TestTweener = Tweener(compact=compact, workers=workers)
+            for filename in filenames:
+                TestTweener.add_keyframe_from_file(filename)
+            outputs[compact, workers] = [tostring(tween.getroot()) for tween in TestTweener.tweens()]
+        self.assertEqual(outputs[True, None], outputs[False, None])
+        self.assertEqual(outputs[True, 2], outputs[False, None])
@@ -0,0 +1,91 @@
+"""
+    Test module for NumPyPaths module
+"""
+import random
+import unittest
+from unittest import mock
+from TweenSVG import NumPyPaths
+from TweenSVG.PathData import PathData, PathCursor, ARG_COUNTS
+from TweenSVG.SVGUtils import SVGUtils
+
+
+def random_path(rand, length, relative):
+    """ Return a PathData of length random segments, each relative with a probability of `relative` """
+    commands = []
+    coords = []
+    for _ in range(length):
+        if rand.random() < 0.1:
+            command = rand.choice("MmZz")
+        else:
+            command = rand.choice("LHVCSQTA")
+            if rand.random() < relative:
+                command = command.lower()
+        commands.append(command)
+        coords.extend(rand.choice([rand.uniform(-100, 100), 0.1, 3.0, -0.0]) for _ in range(ARG_COUNTS[command]))
+    return PathData("".join(commands).encode("ascii"), coords)
+
+
+@unittest.skipIf(not NumPyPaths.available(), "NumPy is not installed")
+class NumPyPathsTests(unittest.TestCase):
+    """
+        Test class for the NumPyPaths module, results must be the same as
+        the pure Python functions of SVGUtils
+    """
+
+    def __init__(self, args):
+        unittest.TestCase.__init__(self, args)
+        self.uut = NumPyPaths
+
+    @staticmethod
+    def _both(func):
+        """ Return the result of func without and then with NumPy, for paths of any length """
+        with mock.patch.object(NumPyPaths, "ENABLED", False):
+            python_result = func()
+        with mock.patch.object(NumPyPaths, "MIN_SEGMENTS", 0):
+            numpy_result = func()
+        return python_result, numpy_result
+
+    def test_end_points(self):
+        rand = random.Random(1)
+        for _ in range(100):
+            path = random_path(rand, rand.randint(0, 60), rand.random())
+            cursor = PathCursor()
+            expected = []
+            for command, args in path:
+                cursor.advance(command, args)
+                expected.append(cursor.point())
+            end_x, end_y = self.uut.end_points(path)
+            self.assertEqual(list(zip(end_x.tolist(), end_y.tolist())), expected)
+
+    def test_long_relative_runs(self):
+        # Sums of relative moves are rounded the same as when added up one by one
+        path = PathData(b"M" + b"l" * 1000 + b"zm" + b"l" * 10, [0.1, 0.2] + [0.1, 0.7] * 1000 + [0.3, 0.3] + [0.1, 0.1] * 10)
+        cursor = PathCursor()
+        cursor.advance_path(path)
+        end_x, end_y = self.uut.end_points(path)
+        self.assertEqual((end_x[-1], end_y[-1]), cursor.point())
+
+    def test_path_to_point(self):
+        rand = random.Random(2)
+        for _ in range(100):
+            path = random_path(rand, rand.randint(0, 60), rand.random())
+            point = (rand.uniform(-5, 5), rand.uniform(-5, 5))
+            python_path, numpy_path = self._both(lambda: SVGUtils.path_to_point(path, point))
+            self.assertEqual(numpy_path, python_path)
+            python_parts, numpy_parts = self._both(lambda: SVGUtils.path_to_point(path.to_parts(), point))
+            self.assertEqual(numpy_parts, python_parts)
+
+    def test_tweenable_paths(self):
+        rand = random.Random(3)
+        for _ in range(100):
+            path1 = random_path(rand, rand.randint(0, 60), rand.random())
+            path2 = random_path(rand, rand.randint(0, 60), rand.random())
+            python_paths, numpy_paths = self._both(lambda: SVGUtils.tweenable_paths(path1, path2))
+            self.assertEqual(numpy_paths, python_paths)
+            self.assertEqual([path.to_string() for path in numpy_paths], [path.to_string() for path in python_paths])
+
+    def test_use_for(self):
+        self.assertFalse(self.uut.use_for(self.uut.MIN_SEGMENTS - 1))
+        self.assertTrue(self.uut.use_for(self.uut.MIN_SEGMENTS))
+        with mock.patch.object(NumPyPaths, "ENABLED", False):
+            self.assertFalse(self.uut.use_for(self.uut.MIN_SEGMENTS))
@@ -0,0 +1,125 @@
+"""
+    Test module for PathData module
+"""
+import unittest
+import random
+from TweenSVG.PathData import PathData, PathCursor, coord_str, coord_strs, coords_str
+from TweenSVG.SVGUtils import SVGUtils
+
+
+class PathDataTests(unittest.TestCase):
+    """
+        Test class for PathData class
+    """
+
+    def __init__(self, args):
+        unittest.TestCase.__init__(self, args)
+        self.uut = PathData
+
+    def test_parts_round_trip(self):
+        test_vector = [
+            [],
+            [("M", ["0", "0"])],
+            [("M", ["1.5", "-2"]), ("L", ["0.001", "1e-07"]), ("z", [])],
+            [("M", ["0", "0"]), ("A", ["1", "2", "30", "0", "1", "4", "5"]), ("Z", [])],
+            [("m", ["1", "1"]), ("c", ["1", "2", "3", "4", "5", "6"]), ("h", ["7"]), ("V", ["8"])],
+        ]
+        for parts in test_vector:
+            path = self.uut.from_parts(parts)
+            self.assertEqual(len(path), len(parts))
+            self.assertEqual(path.to_parts(), parts)
+            self.assertEqual(path.to_string(), SVGUtils.path_string(parts))
+
+    def test_coord_strs(self):
+        rand = random.Random(0)
+        values = [rand.uniform(-1e4, 1e4) for _ in range(1000)] + [rand.uniform(-1, 1) * 10 ** rand.randint(-20, 20) for _ in range(1000)]
+        values += [0.0, -0.0, 1.0, -3.0, 100.0, 1e16, 1e-7, 0.1 + 0.2]
+        strings = coord_strs(values)
+        self.assertEqual(strings, [coord_str(value) for value in values])
+        self.assertEqual([float(string) for string in strings], [value + 0.0 for value in values])
+        self.assertEqual(coord_strs([]), [])
+        self.assertEqual(coord_strs([1.25, 100.0, 0.3333333, -0.0000001, 2.5], precision=2), ["1.25", "100", "0.33", "-0", "2.5"])
+        self.assertEqual(coord_strs([100.0, 2.5], precision=0), ["100", "2"])
+        self.assertEqual(coords_str([1.5, -0.0, 2], separator=","), "1.5,0,2")
+        path = self.uut(b"MLz", [0.123456, 1, 2.5, -1.0 / 3])
+        self.assertEqual(path.to_string(3), "M 0.123 1 L 2.5 -0.333 z")
+        self.assertEqual(SVGUtils.path_string(path), "M 0.123456 1 L 2.5 %r z" % (-1.0 / 3))
+
+    def test_segments(self):
+        path = SVGUtils.path_data("M1 2 C3 4 5 6 7 8 h9 z")
+        self.assertEqual(path.command_string(), "MChz")
+        self.assertEqual(list(path.coords), [1, 2, 3, 4, 5, 6, 7, 8, 9])
+        self.assertEqual(list(path.offsets()), [0, 2, 8, 9])
+        self.assertEqual([(command, list(args)) for command, args in path], [
+            ("M", [1, 2]),
+            ("C", [3, 4, 5, 6, 7, 8]),
+            ("h", [9]),
+            ("z", []),
+        ])
+        command, args = path[2]
+        self.assertEqual((command, list(args)), ("h", [9]))
+        path.append("l", [1, 1])
+        self.assertEqual(path[4][0], "l")
+        self.assertEqual(path.to_string(), "M 1 2 C 3 4, 5 6, 7 8 h 9 z l 1 1")
+
+    def test_invalid(self):
+        with self.assertRaises(ValueError):
+            self.uut(b"M", [0])
+        with self.assertRaises(ValueError):
+            self.uut().append("L", [1, 2, 3])
+        with self.assertRaises(KeyError):
+            self.uut().append("X", [])
+
+    def test_path_functions_accept_path_data(self):
+        test_vector = [
+            ("M0 0 L1 1", "M0 0 L1 2 L3 3"),
+            ("M0 0 C1 1 2 2 3 3 z", "M0 0 L1 1 C1 1 2 2 3 3 z"),
+            ("m10 10 h5 v5 a1 1 0 0 1 2 2", "m10 10 v5 h5"),
+        ]
+        for path1, path2 in test_vector:
+            parts1, parts2 = SVGUtils.path_parts(path1), SVGUtils.path_parts(path2)
+            data1, data2 = SVGUtils.path_data(path1), SVGUtils.path_data(path2)
+            self.assertEqual(data1.to_parts(), parts1)
+            self.assertEqual(SVGUtils.path_end_point(data2), SVGUtils.path_end_point(parts2))
+            self.assertEqual(SVGUtils.path_to_point(data1, (1, 2)).to_parts(),
+                             SVGUtils.path_to_point(parts1, (1, 2)))
+            out_parts = SVGUtils.tweenable_paths(parts1, parts2)
+            out_data = SVGUtils.tweenable_paths(data1, data2)
+            self.assertEqual([path.to_parts() for path in out_data], list(out_parts))
+            self.assertEqual(out_data[0].command_string(), out_data[1].command_string())
+
+
+class PathCursorTests(unittest.TestCase):
+    """
+        Test class for PathCursor class
+    """
+
+    def test_advance(self):
+        cursor = PathCursor()
+        self.assertEqual(cursor.point(), (0, 0))
+        cursor.advance("M", [1, 2])
+        self.assertEqual(cursor.point(), (1, 2))
+        cursor.advance("l", [1, 1])
+        cursor.advance("h", [3])
+        cursor.advance(ord("v"), [-4])
+        self.assertEqual(cursor.point(), (5, -1))
+        cursor.advance("z", [])
+        # Closing the path goes back to the start of the subpath
+        self.assertEqual(cursor.point(), (1, 2))
+        cursor.advance("m", [1, 1])
+        cursor.advance("C", [0, 0, 0, 0, 7, 7])
+        cursor.advance("Z", [])
+        self.assertEqual(cursor.point(), (2, 3))
+
+    def test_advance_path(self):
+        test_vector = {
+            "M0,0 m1,1 l1,1 c0 0, 0 0, 1 1 s0 0, 1 1 q 0 0, 1 1 t 1 1 a 0 0 0 0 0 1 1": (7, 7),
+            "M1 1 L5 5 Z": (1, 1),
+            "M1 1 L5 5 z m1 1": (2, 2),
+            "M1 1 L5 5 z M4 4 l1 1 z l1 1": (5, 5),
+        }
+        for input_val, expected_output in test_vector.items():
+            cursor = PathCursor()
+            cursor.advance_path(SVGUtils.path_data(input_val))
+            self.assertEqual(cursor.point(), expected_output)
+            self.assertEqual(SVGUtils.path_end_point(SVGUtils.path_parts(input_val)), expected_output)
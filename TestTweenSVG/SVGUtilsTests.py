@@ -1,6 +1,7 @@
 """
     Test module for SVGUtils module
 """
+import time
 import unittest
 from TweenSVG import SVGUtils
 from itertools import chain
@@ -229,6 +230,58 @@ class SVGUtilsTests(unittest.TestCase):
             with self.assertRaises(ValueError):
                 self.uut.path_parts(input_value)
 
+    def test_path_parts_numbers(self):
+        test_vector = {
+            # Exponents
+            "M1e2 -1.5E-3": [("M", ["1e2", "-1.5E-3"])],
+            "M1e+2,2e-2": [("M", ["1e+2", "2e-2"])],
+            # A second decimal point starts a new number
+            "M1.5.5": [("M", ["1.5", ".5"])],
+            "M.5.5 .5.5": [("M", [".5", ".5"]), ("L", [".5", ".5"])],
+            # Signs start a new number
+            "M1-2L-3-4": [("M", ["1", "-2"]), ("L", ["-3", "-4"])],
+            "M+1+2": [("M", ["+1", "+2"])],
+            # Whitespace of any sort
+            "M\t1\n2\r\nz": [("M", ["1", "2"]), ("z", [])],
+            # Trailing separators
+            "M 1 2 L 3 4 ": [("M", ["1", "2"]), ("L", ["3", "4"])],
+            "M1,2L3,4,": [("M", ["1", "2"]), ("L", ["3", "4"])],
+            "M1 2Z \n": [("M", ["1", "2"]), ("Z", [])],
+        }
+        for input_value, expected_output in test_vector.items():
+            output = self.uut.path_parts(input_value)
+            self.assertEqual(output, expected_output)
+
+        error_test_vector=[
+            "0 0",
+            "M0 0 z 1",
+            "M1e",
+            "M1 2 L3 z",
+        ]
+        for input_value in error_test_vector:
+            with self.assertRaises(ValueError):
+                self.uut.path_parts(input_value)
+
+    @staticmethod
+    def _best_time(func, *args, repeat=3):
+        best = None
+        for _ in range(repeat):
+            start = time.perf_counter()
+            func(*args)
+            duration = time.perf_counter() - start
+            best = duration if best is None else min(best, duration)
+        return best
+
+    def test_path_parts_scaling(self):
+        # Parse time should grow linearly with path length, allow plenty of
+        # slack for noisy machines, a quadratic parser is ~16 times over this
+        small = "M0 0" + " C1.5,2.5 -3e1,4 5.5.5" * 2000
+        large = "M0 0" + " C1.5,2.5 -3e1,4 5.5.5" * 32000
+        self.assertEqual(len(self.uut.path_parts(large)), 32001)
+        small_time = self._best_time(self.uut.path_parts, small)
+        large_time = self._best_time(self.uut.path_parts, large)
+        self.assertLess(large_time / small_time, 16 * 3)
+
     def test_path_string(self):
         test_vector = {
             "M 0 0": [("M", ["0", "0"])],
@@ -335,6 +388,80 @@ class SVGUtilsTests(unittest.TestCase):
             self.assertEqual(orig_a, list(range(len(path_a))), "New path shape is different to old path shape")
             self.assertEqual(orig_b, list(range(len(path_b))), "New path shape is different to old path shape")
 
+    def _check_alignment(self, path_a, path_b, out_a, out_b):
+        self.assertEqual(len(out_a), len(out_b), "match_paths returned different length lists")
+        orig_a = list(i for i in out_a if i >= 0)
+        orig_b = list(i for i in out_b if i >= 0)
+        self.assertEqual(orig_a, list(range(len(path_a))), "New path shape is different to old path shape")
+        self.assertEqual(orig_b, list(range(len(path_b))), "New path shape is different to old path shape")
+
+    def test_match_paths_fewest_gaps(self):
+        # (path a, path b, number of pairs in the best alignment)
+        test_vector = [
+            ("Hello", "Hello", 5),
+            ("abcdef", "defghij", 3),
+            ("ababab", "abcabab", 6),
+            ("abca", "acba", 3),
+            ("MLCLCZ", "MCLCLZ", 5),
+            ("MLLLLC", "MCLLLL", 5),
+            ("", "MLZ", 0),
+            ("MLZ", "", 0),
+        ]
+        for path_a, path_b, num_pairs in test_vector:
+            out_a, out_b = self.uut.match_paths(path_a, path_b)
+            self._check_alignment(path_a, path_b, out_a, out_b)
+            pairs = [(a, b) for a, b in zip(out_a, out_b) if a >= 0 and b >= 0]
+            self.assertTrue(all(path_a[a] == path_b[b] for a, b in pairs))
+            self.assertEqual(len(pairs), num_pairs)
+
+    def test_match_paths_long(self):
+        # Very different long paths must still be aligned quickly
+        path_a = "M" + "L" * 5000 + "C" * 5000
+        path_b = "M" + "C" * 5000 + "L" * 5000
+        out_a, out_b = self.uut.match_paths(path_a, path_b)
+        self._check_alignment(path_a, path_b, out_a, out_b)
+        self.assertTrue(all(path_a[a] == path_b[b] for a, b in zip(out_a, out_b) if a >= 0 and b >= 0))
+
+    def test_match_paths_cost(self):
+        def cost(command_a, command_b):
+            if command_a == command_b:
+                return 0
+            if {command_a, command_b} == {"L", "C"}:
+                return 0.5
+            return 2
+        test_vector = [
+            # Lines and curves are paired rather than gapped
+            ("MLLZ", "MCCZ", [0, 1, 2, 3], [0, 1, 2, 3]),
+            ("MLZ", "MCCZ", [0, 1, -1, 2], [0, 1, 2, 3]),
+            # Anything else is still gapped
+            ("MZ", "MLZ", [0, -1, 1], [0, 1, 2]),
+            ("MHZ", "MVZ", [0, 1, -1, 2], [0, -1, 1, 2]),
+        ]
+        for path_a, path_b, expected_a, expected_b in test_vector:
+            out_a, out_b = self.uut.match_paths(path_a, path_b, cost=cost)
+            self._check_alignment(path_a, path_b, out_a, out_b)
+            self.assertEqual((out_a, out_b), (expected_a, expected_b))
+
+    def test_tweenable_paths_gap_scaling(self):
+        # Filling gaps should take time linear in the length of the path
+        def gap_fill_time(num):
+            path1 = self.uut.path_data("M0 0" + " l1 1 c1 1 2 2 3 3" * num)
+            path2 = self.uut.path_data("M0 0" + " h1 q1 1 2 2" * num)
+            indicies1, indicies2 = self.uut.match_paths(path1.command_string(), path2.command_string())
+            return self._best_time(self.uut._indicies_to_path, indicies1, path1, indicies2, path2)
+        self.assertLess(gap_fill_time(8000) / gap_fill_time(1000), 8 * 3)
+
+    def test_tweenable_paths(self):
+        test_vector = [
+            ("M0 0 L1 1", "M0 0 L1 1 L2 2", "M 0 0 L 1 1 L 1 1", "M 0 0 L 1 1 L 2 2"),
+            # Gaps are collapsed onto the end of the path so far, including after closing it
+            ("M1 1 L5 5 z", "M1 1 L5 5 z l2 2", "M 1 1 L 5 5 z l 0 0", "M 1 1 L 5 5 z l 2 2"),
+            ("M1 1 L5 5 z", "M1 1 L5 5 z L2 2", "M 1 1 L 5 5 z L 1 1", "M 1 1 L 5 5 z L 2 2"),
+        ]
+        for path1, path2, expected1, expected2 in test_vector:
+            out1, out2 = self.uut.tweenable_paths(self.uut.path_data(path1), self.uut.path_data(path2))
+            self.assertEqual((self.uut.path_string(out1), self.uut.path_string(out2)), (expected1, expected2))
+
     @staticmethod
     def _path_commands_match(path1, path2):
         for (command1, args1), (command2, args2) in zip(chain(*path1), chain(*path2)):
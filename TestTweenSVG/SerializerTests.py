@@ -0,0 +1,72 @@
+"""
+    Test module for Serializer module
+"""
+import copy
+import socket
+import unittest
+from io import BytesIO
+from xml.etree import ElementTree as ElementTreeModule
+from xml.etree.ElementTree import ElementTree, Element, Comment
+import TweenSVG
+from TweenSVG.Serializer import Serializer
+
+
+def et_bytes(tree):
+    output = BytesIO()
+    tree.write(output, xml_declaration=True, encoding='utf-8', method='xml')
+    return output.getvalue()
+
+
+class SerializerTests(unittest.TestCase):
+    """
+        Test class for Serializer class
+    """
+
+    def __init__(self, args):
+        unittest.TestCase.__init__(self, args)
+        self.uut = Serializer
+
+    def test_same_as_elementtree(self):
+        for files in [
+                ["test_inputs/test1/frame1.svg", "test_inputs/test1/frame2.svg"],
+                ["test_inputs/test2/frame1.svg", "test_inputs/test2/frame2.svg", "test_inputs/test2/frame3.svg"],
+                ["test_inputs/test3/paths1.svg", "test_inputs/test3/paths2.svg"],
+                ["test_inputs/test4/frame1.svg", "test_inputs/test4/frame2.svg"]]:
+            for tween in TweenSVG.tween_svgs_from_filenames(files, group_matching=True):
+                self.assertEqual(self.uut().tostring(tween), et_bytes(tween))
+
+    def test_escaping_and_namespaces(self):
+        root = Element("{http://www.w3.org/2000/svg}svg", {"title": "a<b & \"c\"\n\td>"})
+        root.text = "x < y & z > w"
+        child = Element("{http://example.com/a}thing", {"{http://www.w3.org/1999/xlink}href": "#r",
+                                                       "{http://example.com/b}attr": "1"})
+        child.tail = "é✓"
+        root.append(child)
+        comment = Comment(" note ")
+        comment.tail = "&"
+        root.append(comment)
+        root.append(Element("{http://example.com/a}empty"))
+        tree = ElementTree(root)
+        self.assertEqual(self.uut().tostring(tree), et_bytes(tree))
+        self.assertEqual(self.uut(xml_declaration=False).tostring(root),
+                         ElementTreeModule.tostring(root, encoding="utf-8", xml_declaration=False))
+
+    def test_indent(self):
+        tree = ElementTreeModule.parse("test_inputs/test2/frame1.svg")
+        before = et_bytes(tree)
+        indented = copy.deepcopy(tree)
+        ElementTreeModule.indent(indented, space="\t")
+        self.assertEqual(self.uut(indent="\t").tostring(tree), et_bytes(indented))
+        # The tree itself is left as it was
+        self.assertEqual(et_bytes(tree), before)
+
+    def test_write(self):
+        tree = ElementTree(Element("{http://www.w3.org/2000/svg}svg", {"width": "1px"}))
+        expected = et_bytes(tree)
+        output = BytesIO()
+        self.uut().write(tree, output)
+        self.assertEqual(output.getvalue(), expected)
+        sender, receiver = socket.socketpair()
+        with sender, receiver:
+            self.uut().write(tree, sender)
+            self.assertEqual(receiver.recv(len(expected) + 1), expected)
@@ -0,0 +1,147 @@
+"""
+    Test module for Server module
+"""
+import os
+import shutil
+import socket
+import tempfile
+import threading
+import unittest
+from unittest import mock
+import TweenSVG
+from TweenSVG.Keyframe import Keyframe
+from TweenSVG.Server import TweenServer
+from TweenSVG.Client import submit, parse_address, read_token
+
+
+FRAMES = ["test_inputs/test2/frame1.svg", "test_inputs/test2/frame2.svg", "test_inputs/test2/frame3.svg"]
+
+
+class ServerTests(unittest.TestCase):
+    """
+        Test class for TweenServer and its client
+    """
+
+    def __init__(self, args):
+        unittest.TestCase.__init__(self, args)
+        self.uut = TweenServer
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.address = os.path.join(self.directory, "tweensvg.sock")
+        self.server = self.uut(self.address)
+        self.thread = threading.Thread(target=self.server.serve_forever)
+        self.thread.start()
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.thread.join()
+        self.server.server_close()
+        shutil.rmtree(self.directory)
+
+    def test_parse_address(self):
+        self.assertEqual(parse_address("localhost:8000"), ("localhost", 8000))
+        self.assertEqual(parse_address(":8000"), ("127.0.0.1", 8000))
+        self.assertEqual(parse_address("/tmp/tween.sock"), "/tmp/tween.sock")
+        self.assertEqual(parse_address("tween.sock"), "tween.sock")
+
+    def test_tweens(self):
+        expected = [data.decode("utf-8") for data in
+                    TweenSVG.tween_svg_bytes_from_filenames(FRAMES, group_matching=True)]
+        job = {"files": FRAMES, "options": {"group_matching": True}, "stats": True}
+        response = submit(self.address, job)
+        self.assertTrue(response["ok"])
+        self.assertEqual(response["tweens"], expected)
+        self.assertEqual(response["stats"]["counts"]["tweens"], 2)
+        # The second time nothing is parsed or tweened
+        response = submit(self.address, job)
+        self.assertEqual(response["tweens"], expected)
+        self.assertEqual(response["stats"]["counts"]["cache_hits"], 2)
+        self.assertNotIn("tweens", response["stats"]["counts"])
+        # With other options the keyframes are not parsed again
+        response = submit(self.address, dict(job, options={}))
+        self.assertEqual(response["stats"]["counts"]["warm_keyframes"], 3)
+        self.assertEqual(response["stats"]["counts"]["tweens"], 2)
+
+    def test_changed_keyframe(self):
+        files = []
+        for index, frame in enumerate(FRAMES):
+            files.append(os.path.join(self.directory, "frame%d.svg" % (index)))
+            shutil.copy(frame, files[-1])
+        submit(self.address, {"files": files})
+        with open(FRAMES[1], "rb") as frame, open(files[2], "wb") as changed:
+            changed.write(frame.read() + b"<!-- changed -->\n")
+        response = submit(self.address, {"files": files, "stats": True})
+        self.assertEqual(response["tweens"][1],
+                         list(TweenSVG.tween_svg_bytes_from_filenames(files))[1].decode("utf-8"))
+        # Only the changed keyframe is parsed and only its pair is tweened
+        self.assertEqual(response["stats"]["counts"]["warm_keyframes"], 1)
+        self.assertEqual(response["stats"]["counts"]["cache_hits"], 1)
+        self.assertEqual(response["stats"]["counts"]["tweens"], 1)
+
+    def test_output_dir(self):
+        response = submit(self.address, {"files": FRAMES, "output_dir": self.directory})
+        self.assertEqual(response["written"], [os.path.join(self.directory, "tween%04d.svg" % (count))
+                                               for count in range(2)])
+        with open(response["written"][1], "rb") as tween_file:
+            self.assertEqual(tween_file.read(), list(TweenSVG.tween_svg_bytes_from_filenames(FRAMES))[1])
+
+    def test_errors(self):
+        self.assertFalse(submit(self.address, {"files": FRAMES[:1]})["ok"])
+        self.assertFalse(submit(self.address, {"files": FRAMES, "options": {"workers": 4}})["ok"])
+        response = submit(self.address, {"files": FRAMES + ["missing.svg"]})
+        self.assertIn("missing.svg", response["error"])
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+            client.connect(self.address)
+            client.sendall(b"not json\n")
+            self.assertIn(b"Invalid job", client.recv(4096))
+        for job in [{"files": FRAMES, "options": ["duration"]}, {"files": [1, 2]},
+                    {"files": FRAMES, "output_dir": 1}]:
+            self.assertFalse(submit(self.address, job)["ok"])
+        # The server is still running
+        self.assertTrue(submit(self.address, {"files": FRAMES})["ok"])
+
+    def test_local_only(self):
+        self.assertEqual(os.stat(self.address).st_mode & 0o777, 0o600)
+        token_file = os.path.join(self.directory, "token")
+        for address in ["0.0.0.0:0", ":::0"]:
+            with self.assertRaises(ValueError):
+                self.uut(address, token_file=token_file)
+        # Any local user can connect to a TCP port, so it needs a token
+        with self.assertRaises(ValueError):
+            self.uut("127.0.0.1:0")
+
+    def test_token(self):
+        token_file = os.path.join(self.directory, "token")
+        server = self.uut("127.0.0.1:0", token_file=token_file)
+        thread = threading.Thread(target=server.serve_forever)
+        thread.start()
+        try:
+            self.assertEqual(os.stat(token_file).st_mode & 0o777, 0o600)
+            for token in [None, "wrong"]:
+                response = submit(server.address, {"files": FRAMES}, token=token)
+                self.assertFalse(response["ok"])
+                self.assertIn("token", response["error"])
+            self.assertTrue(submit(server.address, {"files": FRAMES}, token=read_token(token_file))["ok"])
+        finally:
+            server.shutdown()
+            thread.join()
+            server.server_close()
+
+    def test_warm_keyframes(self):
+        # Indexes and hashes are kept with the keyframes for later jobs
+        with mock.patch.object(Keyframe, "evict") as evict:
+            self.assertTrue(submit(self.address, {"files": FRAMES})["ok"])
+        evict.assert_not_called()
+        keyframes = [keyframe for keyframe, _ in self.server._keyframes._entries.values()]
+        self.assertEqual(len(keyframes), 3)
+        self.assertTrue(all(keyframe._hashes is not None for keyframe in keyframes))
+
+    def test_stale_socket(self):
+        address = os.path.join(self.directory, "stale.sock")
+        stale = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        stale.bind(address)
+        stale.close()
+        server = self.uut(address)
+        server.server_close()
+        self.assertFalse(os.path.exists(address))
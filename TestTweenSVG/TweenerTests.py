@@ -1,10 +1,21 @@
 """
     Test module for Tweener module
 """
+from io import BytesIO
+import time
+import tracemalloc
 import unittest
+from unittest import mock
 from TweenSVG.Tweener import Tweener
+from TweenSVG.SVGUtils import SVGUtils
+from TweenSVG.AnimationGenerator import FadeGroup
+from TweenSVG.Keyframe import Keyframe, KeyframeHeader
+from TweenSVG.Serializer import Serializer
+from TweenSVG.Stats import Stats
 from xml.etree.ElementTree import ElementTree
 from xml.etree.ElementTree import Element
+from xml.etree.ElementTree import SubElement
+from xml.etree.ElementTree import tostring
 
 class TweenerTests(unittest.TestCase):
     """ 
@@ -35,3 +46,373 @@ class TweenerTests(unittest.TestCase):
         with self.assertRaises(ValueError):
             TestTweener.add_keyframe(mm_svg)
             TestTweener.add_keyframe(px_svg)
+
+    @staticmethod
+    def _path_keyframe(d, transform):
+        svg = Element("svg", attrib={'width': '10px', 'height':'10px'})
+        svg.append(Element("path", attrib={'id': 'p', 'd': d, 'transform': transform}))
+        return ElementTree(svg)
+
+    def test_keyframes_parsed_once(self):
+        TestTweener = self.uut()
+        for index in range(4):
+            TestTweener.add_keyframe(self._path_keyframe(
+                "M0 0 L%d %d" % (index, index), "translate(%d)" % (index)))
+        with mock.patch.object(SVGUtils, 'path_data', wraps=SVGUtils.path_data) as path_data, \
+             mock.patch.object(SVGUtils, 'transforms', wraps=SVGUtils.transforms) as transforms:
+            tweens = list(TestTweener.tweens())
+        self.assertEqual(len(tweens), 3)
+        # Each keyframe is the "to" side of one pair and the "from" side of the next
+        # but its attributes are only parsed once
+        self.assertEqual(path_data.call_count, 4)
+        self.assertEqual(transforms.call_count, 4)
+
+    @staticmethod
+    def _group_keyframe(ids, x):
+        svg = Element("svg", attrib={'width': '10px', 'height':'10px'})
+        group = Element("g", attrib={'id': 'group'})
+        for eid in ids:
+            group.append(Element("rect", attrib={'id': eid, 'x': str(x)}))
+        svg.append(group)
+        return ElementTree(svg)
+
+    @staticmethod
+    def _animations(tweened):
+        """ Return the tweened element and a list of its animations, looking inside fade groups """
+        if isinstance(tweened, FadeGroup):
+            return tweened[0], list(tweened)[1:]
+        return tweened, list(tweened)
+
+    def test_id_matching(self):
+        TestTweener = self.uut()
+        TestTweener.add_keyframe(self._group_keyframe(["a", "b", "c"], 0))
+        TestTweener.add_keyframe(self._group_keyframe(["d", "c", "b"], 1))
+        tween, = TestTweener.tweens()
+        rects = tween.getroot()[0]
+        # a fades out, b and c move, d fades in
+        self.assertEqual([self._animations(rect)[0].attrib["id"] for rect in rects], ["a", "b", "c", "d"])
+        for rect, fades in zip(rects, [True, False, False, True]):
+            anim_names = [anim.attrib["attributeName"] for anim in self._animations(rect)[1]]
+            self.assertEqual(anim_names, ["opacity"] if fades else ["x"])
+
+    def _time_tween(self, make_keyframe, num, **options):
+        best = None
+        for _ in range(3):
+            TestTweener = self.uut(**options)
+            TestTweener.add_keyframe(make_keyframe(num, 0))
+            TestTweener.add_keyframe(make_keyframe(num, 1))
+            start = time.perf_counter()
+            list(TestTweener.tweens())
+            duration = time.perf_counter() - start
+            best = duration if best is None else min(best, duration)
+        return best
+
+    def test_id_matching_scaling(self):
+        # Matching should be linear in the number of elements in a group
+        def make_keyframe(num, x):
+            ids = ["rect%d" % (index) for index in range(num)]
+            if x:
+                ids.reverse()
+            return self._group_keyframe(ids, x)
+        self.assertLess(self._time_tween(make_keyframe, 4000) / self._time_tween(make_keyframe, 500), 8 * 3)
+
+    @staticmethod
+    def _anonymous_keyframe(tags, x):
+        svg = Element("svg", attrib={'width': '10px', 'height':'10px'})
+        group = Element("g", attrib={'id': 'group'})
+        for tag in tags:
+            child = Element(tag, attrib={'x': str(x)})
+            if tag == "text":
+                child.text = "label"
+            group.append(child)
+        svg.append(group)
+        return ElementTree(svg)
+
+    def test_group_matching(self):
+        TestTweener = self.uut(group_matching=True)
+        TestTweener.add_keyframe(self._anonymous_keyframe(["path", "text", "path", "path"], 0))
+        TestTweener.add_keyframe(self._anonymous_keyframe(["text", "path", "text", "path"], 1))
+        tween, = TestTweener.tweens()
+        children = tween.getroot()[0]
+        # Elements are merged with the next unmerged element with the same tag,
+        # the leftover path fades out and the leftover text fades in
+        tags = [self._animations(child)[0].tag.split("}")[-1] for child in children]
+        self.assertEqual(tags, ["path", "text", "path", "path", "text"])
+        for child, fades in zip(children, [False, False, False, True, True]):
+            anim_names = [anim.attrib["attributeName"] for anim in self._animations(child)[1]]
+            self.assertEqual(anim_names, ["opacity"] if fades else ["x"])
+
+    def test_group_matching_scaling(self):
+        # Merging anonymous elements should be linear in the number of elements in a group
+        def make_keyframe(num, x):
+            tags = ["path", "text"] * (num // 2)
+            if x:
+                tags.reverse()
+            return self._anonymous_keyframe(tags, x)
+        self.assertLess(self._time_tween(make_keyframe, 4000, group_matching=True) /
+                        self._time_tween(make_keyframe, 500, group_matching=True), 8 * 3)
+
+    def test_fades_share_keyframe_elements(self):
+        frame1 = self._group_keyframe(["a", "b"], 0)
+        frame2 = self._group_keyframe(["b", "c"], 1)
+        frame3 = self._group_keyframe(["c"], 2)
+        frame_bytes = [tostring(frame.getroot()) for frame in [frame1, frame2, frame3]]
+        TestTweener = self.uut()
+        for frame in [frame1, frame2, frame3]:
+            TestTweener.add_keyframe(frame)
+        tween1, tween2 = TestTweener.tweens()
+        # Faded elements are wrapped rather than copied
+        fade_out_a = tween1.getroot()[0][0]
+        fade_in_c = tween1.getroot()[0][2]
+        self.assertIsInstance(fade_out_a, FadeGroup)
+        self.assertIs(fade_out_a[0], frame1.getroot()[0][0])
+        self.assertIs(fade_in_c[0], frame2.getroot()[0][1])
+        self.assertEqual(fade_in_c.attrib["opacity"], "0")
+        # and the keyframes are left as they were
+        self.assertEqual([tostring(frame.getroot()) for frame in [frame1, frame2, frame3]], frame_bytes)
+        for tween in [tween1, tween2]:
+            tostring(tween.getroot())
+
+    def test_fades_without_groups(self):
+        # <g> isn't allowed inside <text> or gradients, so faded elements
+        # there are copied and faded themselves
+        def keyframe(stop_id, tspan_id):
+            svg = Element("svg", attrib={'width': '10px', 'height':'10px'})
+            gradient = SubElement(SubElement(svg, "defs", attrib={'id': 'defs'}), "linearGradient", attrib={'id': 'gradient'})
+            SubElement(gradient, "stop", attrib={'id': stop_id, 'offset': '0'})
+            text = SubElement(svg, "text", attrib={'id': 'text'})
+            SubElement(text, "tspan", attrib={'id': tspan_id}).text = "Hello"
+            return ElementTree(svg)
+        frame1 = keyframe("stop1", "tspan1")
+        frame2 = keyframe("stop2", "tspan2")
+        frame_bytes = [tostring(frame.getroot()) for frame in [frame1, frame2]]
+        TestTweener = self.uut()
+        TestTweener.add_keyframe(frame1)
+        TestTweener.add_keyframe(frame2)
+        tween, = TestTweener.tweens()
+        root = tween.getroot()
+        stops = list(root[0][0])
+        tspans = list(root[1])
+        for faded, eid, opacity in [(stops[0], "stop1", "1"), (stops[1], "stop2", "0"),
+                                    (tspans[0], "tspan1", "1"), (tspans[1], "tspan2", "0")]:
+            self.assertNotIsInstance(faded, FadeGroup)
+            self.assertEqual(faded.attrib["id"], eid)
+            self.assertEqual(faded.attrib["opacity"], opacity)
+            self.assertEqual(faded[-1].attrib["attributeName"], "opacity")
+        self.assertEqual(tspans[0].text, "Hello")
+        self.assertEqual([tostring(frame.getroot()) for frame in [frame1, frame2]], frame_bytes)
+
+    def test_output_namespace(self):
+        TestTweener = self.uut()
+        TestTweener.add_keyframe(self._group_keyframe(["a", "b"], 0))
+        TestTweener.add_keyframe(self._group_keyframe(["b", "c"], 1))
+        tween, = TestTweener.tweens()
+        root = tween.getroot()
+        # Elements created for the tween are in the SVG namespace, with plain attributes
+        self.assertEqual(root.tag, "{http://www.w3.org/2000/svg}svg")
+        self.assertEqual(root[0].tag, "{http://www.w3.org/2000/svg}g")
+        moved_b = root[0][1]
+        self.assertEqual(moved_b.tag, "{http://www.w3.org/2000/svg}rect")
+        self.assertEqual(moved_b[0].tag, "{http://www.w3.org/2000/svg}animate")
+        self.assertIn("attributeName", moved_b[0].attrib)
+        self.assertEqual(root[-1].tag, "{http://www.w3.org/2000/svg}g")
+        # and the default namespace is used when written out
+        output = tostring(root, encoding="unicode")
+        self.assertTrue(output.startswith('<svg xmlns="http://www.w3.org/2000/svg"'))
+        self.assertNotIn("ns0:", output)
+
+    def test_parallel_tweens(self):
+        frames = [self._group_keyframe(ids, x) for x, ids in enumerate(
+            [["a", "b"], ["b", "c"], ["c"], ["a", "c"], ["a"]])]
+        outputs = {}
+        for workers in [None, 2]:
+            TestTweener = self.uut(workers=workers)
+            for frame in frames:
+                TestTweener.add_keyframe(frame)
+            outputs[workers] = [tostring(tween.getroot()) for tween in TestTweener.tweens()]
+        # Tweens come back in order and the same as when made one at a time
+        self.assertEqual(len(outputs[None]), 4)
+        self.assertEqual(outputs[2], outputs[None])
+        # Animation ids are numbered from zero in each tween
+        self.assertTrue(all(b'id="tween_0"' in output for output in outputs[None]))
+        with self.assertRaises(ValueError):
+            self.uut(workers=0)
+
+    def test_stream_tweens_memory(self):
+        # Only the current pair of keyframes is kept, so peak memory does not
+        # grow with the number of keyframes
+        def sources(num):
+            for x in range(num):
+                frame = self._group_keyframe(["rect%d" % (index) for index in range(300)], x)
+                yield BytesIO(tostring(frame.getroot()))
+        def peak_memory(num):
+            TestTweener = self.uut()
+            count = 0
+            tracemalloc.start()
+            try:
+                for tween in TestTweener.stream_tweens(sources(num)):
+                    count += 1
+                    del tween
+                peak = tracemalloc.get_traced_memory()[1]
+            finally:
+                tracemalloc.stop()
+            self.assertEqual(count, num - 1)
+            self.assertEqual(TestTweener.keyframes, [])
+            return peak
+        self.assertLess(peak_memory(40), 1.5 * peak_memory(5))
+
+    def test_prescan(self):
+        def frame(size, x):
+            svg = Element("svg", attrib={'width': '%dpx' % (size), 'height': '10px',
+                                         'viewBox': '0 0 %d 10' % (size)})
+            svg.append(Element("rect", attrib={'id': 'r', 'x': str(x)}))
+            return tostring(svg)
+        frames = [frame(10, 0), frame(30, 1), frame(20, 2)]
+        TestTweener = self.uut()
+        for data in frames:
+            TestTweener.add_keyframe_from_file(BytesIO(data))
+        expected = [tostring(tween.getroot()) for tween in TestTweener.tweens()]
+        # With a prescan even the first tween is sized to fit every keyframe
+        sources = [BytesIO(data) for data in frames]
+        TestTweener = self.uut()
+        TestTweener.prescan(sources)
+        self.assertEqual([source.tell() for source in sources], [0, 0, 0])
+        self.assertEqual([tostring(tween.getroot()) for tween in TestTweener.stream_tweens(sources)], expected)
+        # Only the root start tag is read
+        header = KeyframeHeader.read(BytesIO(b'<svg width="5mm" viewBox="0 0 1 2"><rect></svg'))
+        self.assertEqual((header.width, header.height, header.viewbox), ((5.0, "mm"), None, (0.0, 0.0, 1.0, 2.0)))
+
+    def test_stats(self):
+        self.assertFalse(self.uut().stats.enabled)
+        frames = [self._group_keyframe(["a", "b", "c"], 0), self._group_keyframe(["d", "c", "b"], 1),
+                  self._path_keyframe("M0 0 L1 1", "scale(1)"), self._path_keyframe("M0 0 L1 1 L2 2", "scale(2)")]
+        counts = {}
+        for workers in [None, 2]:
+            stats = Stats()
+            TestTweener = self.uut(workers=workers, stats=stats)
+            for frame in frames:
+                TestTweener.add_keyframe(frame)
+            serializer = Serializer(stats=stats)
+            for tween in TestTweener.tweens():
+                serializer.tostring(tween)
+            serializer.write(ElementTree(Element("svg")), BytesIO())
+            self.assertEqual(set(stats.seconds), {"tween", "path_alignment", "serialize"})
+            counts[workers] = stats.counts
+        self.assertEqual(counts[2], counts[None])
+        counts = counts[None]
+        self.assertEqual(counts["keyframes"], 4)
+        self.assertEqual(counts["tweens"], 3)
+        # a fades out, b and c match by id, d fades in, then the group fades out
+        # and the path fades in, then the path is matched and a gap added to it
+        self.assertEqual(counts["fade_outs"], 2)
+        self.assertEqual(counts["fade_ins"], 2)
+        self.assertEqual(counts["id_matches"], 4)
+        self.assertEqual(counts["paths"], 1)
+        self.assertEqual(counts["path_gaps"], 1)
+        self.assertEqual(counts["bytes_written"], len(Serializer().tostring(ElementTree(Element("svg")))))
+        # Paths found in the memo are counted too
+        stats = Stats()
+        TestTweener = self.uut(stats=stats)
+        for frame in frames[2:]:
+            TestTweener.add_keyframe(frame)
+        for _ in range(2):
+            list(TestTweener.tweens())
+        self.assertEqual(stats.counts["pair_memo_hits"], 2)
+        self.assertEqual((stats.counts["paths"], stats.counts["path_gaps"]), (2, 2))
+
+    @staticmethod
+    def _sized_keyframe(ids, x, width=10):
+        svg = Element("svg", attrib={'width': '%dpx' % (width), 'height':'10px'})
+        for eid in ids:
+            svg.append(Element("rect", attrib={'id': eid, 'x': str(x)}))
+        return ElementTree(svg)
+
+    def test_incremental_tweens(self):
+        frames = [self._sized_keyframe(["a", "b"], x) for x in range(10)]
+        def fresh_tweens(frames):
+            TestTweener = self.uut()
+            for frame in frames:
+                TestTweener.add_keyframe(frame)
+            return [tostring(tween.getroot()) for tween in TestTweener.tweens()]
+        TestTweener = self.uut(incremental=True)
+        for frame in frames:
+            TestTweener.add_keyframe(frame)
+        list(TestTweener.tweens())
+        edits = [
+            # Edit, number of pairs tweened again, the same edit to the list of frames
+            (lambda: TestTweener.replace_keyframe(5, frames[5]), 2, lambda: frames.__setitem__(5, frames[5])),
+            (lambda: TestTweener.insert_keyframe(3, frames[0]), 2, lambda: frames.insert(3, frames[0])),
+            (lambda: TestTweener.remove_keyframe(7), 1, lambda: frames.pop(7)),
+            (lambda: TestTweener.remove_keyframe(0), 0, lambda: frames.pop(0)),
+            # A wider keyframe changes the root attributes of every tween
+            (lambda: TestTweener.insert_keyframe(9, self._sized_keyframe(["b"], 0, width=50)), 1,
+             lambda: frames.insert(9, self._sized_keyframe(["b"], 0, width=50))),
+            (lambda: TestTweener.replace_keyframe(9, frames[0]), 1, lambda: frames.__setitem__(9, frames[0])),
+        ]
+        for edit, retweened, edit_frames in edits:
+            edit()
+            edit_frames()
+            with mock.patch.object(TestTweener, '_tween_pair', wraps=TestTweener._tween_pair) as tween_pair:
+                tweens = [tostring(tween.getroot()) for tween in TestTweener.tweens()]
+            self.assertEqual(tween_pair.call_count, retweened)
+            self.assertEqual(tweens, fresh_tweens(frames))
+        # Mixed units are refused and the keyframes are left as they were
+        with self.assertRaises(ValueError):
+            TestTweener.replace_keyframe(0, ElementTree(Element("svg", attrib={'width': '2mm', 'height':'10px'})))
+        self.assertEqual([tostring(tween.getroot()) for tween in TestTweener.tweens()], fresh_tweens(frames))
+
+    def test_tweens_not_kept(self):
+        TestTweener = self.uut()
+        for x in range(3):
+            TestTweener.add_keyframe(self._sized_keyframe(["a", "b"], x))
+        first = list(TestTweener.tweens())
+        self.assertEqual(TestTweener._pair_results, {})
+        with mock.patch.object(TestTweener, '_tween_pair', wraps=TestTweener._tween_pair) as tween_pair:
+            second = list(TestTweener.tweens())
+        self.assertEqual(tween_pair.call_count, 2)
+        self.assertEqual([tostring(tween.getroot()) for tween in second],
+                         [tostring(tween.getroot()) for tween in first])
+
+    def test_same_subtrees_shared(self):
+        svg = SVGUtils.svg_tag
+        def keyframe(x, static_id_less=False):
+            root = Element(svg("svg"), {"width": "10px", "height": "10px"})
+            static = Element(svg("g"), {"id": "static"})
+            static.text = ""
+            for num in range(3):
+                static.append(Element(svg("rect"), {"id": "r%d" % (num), "x": str(num)}))
+            if static_id_less:
+                static.append(Element(svg("rect"), {"x": "9"}))
+            moving = Element(svg("g"), {"id": "moving"})
+            moving.append(Element(svg("rect"), {"id": "m", "x": str(x)}))
+            root.extend([static, moving])
+            return ElementTree(root)
+        frame1, frame2 = keyframe(0), keyframe(5)
+        kf1, kf2 = Keyframe(frame1), Keyframe(frame2)
+        self.assertEqual(kf1.subtree_hash(frame1.getroot()[0]), kf2.subtree_hash(frame2.getroot()[0]))
+        self.assertNotEqual(kf1.subtree_hash(frame1.getroot()[1]), kf2.subtree_hash(frame2.getroot()[1]))
+        # Tails are left out, None and empty texts are not the same
+        frame2.getroot()[0].tail = "\n"
+        frame2.getroot()[0].text = None
+        kf2.evict()
+        self.assertNotEqual(kf1.subtree_hash(frame1.getroot()[0]), kf2.subtree_hash(frame2.getroot()[0]))
+        frame2.getroot()[0].text = ""
+        kf2.evict()
+        self.assertEqual(kf1.subtree_hash(frame1.getroot()[0]), kf2.subtree_hash(frame2.getroot()[0]))
+
+        stats = Stats()
+        TestTweener = self.uut(stats=stats)
+        TestTweener.add_keyframe(frame1)
+        TestTweener.add_keyframe(frame2)
+        tween = next(TestTweener.tweens()).getroot()
+        self.assertIs(tween[0], frame1.getroot()[0])
+        self.assertIsNot(tween[1], frame1.getroot()[1])
+        self.assertEqual(stats.counts["same_subtrees"], 1)
+
+        # Children without ids are faded, so such subtrees are tweened as before
+        TestTweener = self.uut()
+        frame1 = keyframe(0, static_id_less=True)
+        TestTweener.add_keyframe(frame1)
+        TestTweener.add_keyframe(keyframe(5, static_id_less=True))
+        self.assertIsNone(Keyframe(frame1).subtree_hash(frame1.getroot()[0]))
+        self.assertIsNot(next(TestTweener.tweens()).getroot()[0], frame1.getroot()[0])
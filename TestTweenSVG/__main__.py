@@ -3,7 +3,7 @@ Test suite for TweenSVG
 """
 import sys 
 import unittest
-from TestTweenSVG import SVGUtilsTests, ModuleTests, AnimationGeneratorTests, TweenerTests
+from TestTweenSVG import SVGUtilsTests, ModuleTests, AnimationGeneratorTests, TweenerTests, PathDataTests, SerializerTests, BenchTests, CacheTests, NumPyPathsTests, MemoTests, AsyncTweensTests, ServerTests, NodeTests
 
 def run_tests():
     """ 
@@ -13,7 +13,17 @@ def run_tests():
         SVGUtilsTests.SVGUtilsTests,
         ModuleTests.ModuleTests,
         TweenerTests.TweenerTests,
-        AnimationGeneratorTests.AnimationGeneratorTests
+        AnimationGeneratorTests.AnimationGeneratorTests,
+        PathDataTests.PathDataTests,
+        PathDataTests.PathCursorTests,
+        SerializerTests.SerializerTests,
+        BenchTests.BenchTests,
+        CacheTests.CacheTests,
+        NumPyPathsTests.NumPyPathsTests,
+        MemoTests.MemoTests,
+        AsyncTweensTests.AsyncTweensTests,
+        ServerTests.ServerTests,
+        NodeTests.NodeTests
     ]   
 
     loader = unittest.TestLoader()
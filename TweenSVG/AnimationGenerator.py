@@ -1,16 +1,38 @@
-import itertools
-from defusedxml.ElementTree import parse
 from xml.etree import ElementTree as ElementTreeModule
-from xml.etree.ElementTree import ElementTree # Dr Watson
 from xml.etree.ElementTree import Element
-import re
 
-from TweenSVG.SVGUtils import SVGUtils as SVU
+from TweenSVG.SVGUtils import SVGUtils as SVU, SVG_NAMESPACE
+from TweenSVG.Stats import NULL_STATS
+from TweenSVG.Memo import AttributeMemo
+from TweenSVG.Node import as_element
+
+ElementTreeModule.register_namespace('', SVG_NAMESPACE)
+
+# Tags of the elements created here, already in the SVG namespace
+_ANIMATE = SVU.svg_tag("animate")
+_ANIMATE_TRANSFORM = SVU.svg_tag("animateTransform")
+_G = SVU.svg_tag("g")
+_TEXT = SVU.svg_tag("text")
+
+# Tags of the elements that may have a <g> as a child. Other elements, e.g.
+# <text>, gradients, <filter> and <clipPath>, can't have their children wrapped
+_GROUP_PARENTS = frozenset(SVU.svg_tag(tag) for tag in [
+    "svg", "g", "defs", "symbol", "marker", "mask", "pattern", "a", "switch"])
+
+
+class FadeGroup(Element):
+    """
+        A <g> element that wraps an element from a keyframe so that it can be
+        faded in or out without copying it. The wrapped element is always the
+        first child and is shared with the keyframe, so must not be modified.
+    """
 
-ElementTreeModule.register_namespace('', "http://www.w3.org/2000/svg")
 
 class AnimationGenerator():
-    def __init__(self, duration="5s", fadein_late=False, fadeout_early=False):
+    def __init__(self, duration="5s", fadein_late=False, fadeout_early=False, stats=NULL_STATS, memo=None):
+        """ Animations between pairs of path and transform values are kept in memo, an AttributeMemo """
+        self.stats = stats
+        self.memo = AttributeMemo(stats=stats) if memo is None else memo
         self.animation_number = 0
         self.fadein_duration = "1s"
         self.fadeout_duration = "1s"
@@ -36,7 +58,13 @@ class AnimationGenerator():
         assert "id" not in anim_from, "Erm, something's really wrong, I can't animate an id attribute!?!?!?!?!?"
         return anim_from, anim_to
 
-    def animate_tags_custom(self, from_attrs, to_attrs, begin=None, eid=None, dur=None):
+    def animate_tags_custom(self, from_attrs, to_attrs, begin=None, eid=None, dur=None, from_parser=SVU, to_parser=SVU):
+        """
+            Generate animation tags for the differences between from_attrs and to_attrs.
+            from_parser and to_parser are used to parse path and transform values,
+            they default to SVGUtils but may be anything with the same path_data()
+            and transforms() functions, such as a cache.
+        """
         def common_attrs(animtag):
             if begin is not None:
                 animtag.attrib['begin'] = begin
@@ -52,35 +80,28 @@ class AnimationGenerator():
             to_val = to_attrs[attr]
             # For path sequences, make the paths tweenable
             if attr == 'd':
-                from_parts = SVU.path_parts(from_val)
-                to_parts = SVU.path_parts(to_val)
-                from_parts, to_parts = SVU.tweenable_paths(from_parts, to_parts)
-                from_val = SVU.path_string(from_parts)
-                to_val = SVU.path_string(to_parts)
+                from_val, to_val, gaps = self.memo.pair(attr, from_val, to_val, self._tweenable_path_strings, from_parser, to_parser)
+                self.stats.count("paths")
+                self.stats.count("path_gaps", gaps)
 
             if attr == 'transform':
                 # Transforms are handled with animateTransform tags
-                from_transforms = SVU.transforms(from_val)
-                to_transforms = SVU.transforms(to_val)
-                if len(from_transforms) == len(to_transforms):
-                
-                    for (from_type, from_args), (to_type, to_args) in zip(from_transforms, to_transforms):
-                        if from_type != to_type:
-                            break
-                        if from_args != to_args:
-                            animtag = Element("animateTransform",
-                                              {
-                                                  "attributeType": "XML",
-                                                  "attributeName": "transform",
-                                                  "type": from_type,
-                                                  "from": from_args,
-                                                  "to": to_args,
-                                                  "dur": dur,
-                                              })
-                            common_attrs(animtag)
-                            yield animtag
+                for from_type, from_args, to_args in self.memo.pair(
+                        attr, from_val, to_val, self._transform_changes, from_parser, to_parser):
+                    animtag = Element(_ANIMATE_TRANSFORM,
+                                      {
+                                          "attributeType": "XML",
+                                          "attributeName": "transform",
+                                          "type": from_type,
+                                          "from": from_args,
+                                          "to": to_args,
+                                          "dur": dur,
+                                      })
+                    common_attrs(animtag)
+                    self.stats.count("animations")
+                    yield animtag
             else:
-                animtag = Element("animate",
+                animtag = Element(_ANIMATE,
                                   {
                                       "attributeType": "XML",
                                       "attributeName": attr,
@@ -90,10 +111,35 @@ class AnimationGenerator():
                                       #"repeatCount": "indefinite"
                                   })
                 common_attrs(animtag)
+                self.stats.count("animations")
                 yield animtag
 
-    def animate_tags(self, from_attrs, to_attrs):
-        return self.animate_tags_custom(from_attrs, to_attrs, begin="tween_transition.begin")
+    def _tweenable_path_strings(self, from_val, to_val, from_parser, to_parser):
+        """ Return path strings for two path values with matching sequences of commands, and the number of gaps filled in them """
+        from_path = from_parser.path_data(from_val)
+        to_path = to_parser.path_data(to_val)
+        # Paths and gaps are counted by the caller, so that memo hits are counted too
+        with self.stats.timer("path_alignment"):
+            from_parts, to_parts = SVU.tweenable_paths(from_path, to_path)
+        gaps = 2 * len(from_parts) - len(from_path) - len(to_path)
+        return SVU.path_string(from_parts), SVU.path_string(to_parts), gaps
+
+    def _transform_changes(self, from_val, to_val, from_parser, to_parser):
+        """ Return a tuple of (type, from args, to args) for each transform that needs animating between two transform values """
+        from_transforms = from_parser.transforms(from_val)
+        to_transforms = to_parser.transforms(to_val)
+        changes = []
+        if len(from_transforms) == len(to_transforms):
+            for (from_type, from_args), (to_type, to_args) in zip(from_transforms, to_transforms):
+                if from_type != to_type:
+                    break
+                if from_args != to_args:
+                    changes.append((from_type, from_args, to_args))
+        return tuple(changes)
+
+    def animate_tags(self, from_attrs, to_attrs, from_parser=SVU, to_parser=SVU):
+        return self.animate_tags_custom(from_attrs, to_attrs, begin="tween_transition.begin",
+                                        from_parser=from_parser, to_parser=to_parser)
 
     def _fade_animation(self, direction, opacity, begin=None, dur=None):
         assert direction in {-1, 1}, "Direction must be 1 or -1"
@@ -108,6 +154,24 @@ class AnimationGenerator():
     def fade_out_animation(self, opacity, begin="tween_fadeout.begin"):
         return self._fade_animation(-1, opacity, begin=begin, dur=self.fadeout_duration)
 
+    def fade_group(self, element, parent_tag):
+        """
+            Wrap element, a child of an element with tag parent_tag, in a
+            FadeGroup, ready to be passed to fade_out_element() or
+            fade_in_element(). If a <g> can't be a child of parent_tag,
+            return a shallow copy of element instead, sharing its children,
+            so that its own opacity can be faded.
+        """
+        if SVU.svg_tag(parent_tag) in _GROUP_PARENTS:
+            group = FadeGroup(_G)
+            group.append(as_element(element))
+            return group
+        copy = Element(element.tag, element.attrib)
+        copy.text = element.text
+        copy.tail = element.tail
+        copy.extend(as_element(child) for child in element)
+        return copy
+
     def fade_out_element(self, element, transition_phase=False):
         opacity = element.attrib.get("opacity", "1")
         element.attrib['opacity'] = opacity
@@ -127,8 +191,8 @@ class AnimationGenerator():
     def sync_element(self):
         # Create an invisible dummy element to contain
         # root animations for synchronisation
-        invisible = Element("g", {"opacity": "0"})
-        text = Element("text", {"y": "20", "opacity": "0"})
+        invisible = Element(_G, {"opacity": "0"})
+        text = Element(_TEXT, {"y": "20", "opacity": "0"})
         text.text = "Test"
         common_attrs = {"attributeName": "opacity",
                         "attributeType": "XML",
@@ -157,9 +221,9 @@ class AnimationGenerator():
         if self.fadein_late:
             fadein_attribs['begin'] = "tween_transition.end"
 
-        start_fadein = Element("animate", fadein_attribs)
-        start_transition = Element("animate", transition_attribs)
-        start_fadeout = Element("animate", fadeout_attribs)
+        start_fadein = Element(_ANIMATE, fadein_attribs)
+        start_transition = Element(_ANIMATE, transition_attribs)
+        start_fadeout = Element(_ANIMATE, fadeout_attribs)
         text.append(start_fadein)
         text.append(start_transition)
         text.append(start_fadeout)
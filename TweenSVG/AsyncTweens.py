@@ -0,0 +1,70 @@
+"""
+    Tweening from asyncio code
+    atween_svgs() is an async iterator over the tweens of a list of keyframe
+    files that never blocks the event loop: files are read in the loop's
+    default thread pool and each pair of keyframes is parsed and tweened in
+    an executor, which may be a ProcessPoolExecutor to use several cores.
+"""
+import asyncio
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from TweenSVG.Tweener import Tweener, _tween_bytes_worker
+
+# Default number of tweens being made or waiting to be yielded
+DEFAULT_MAX_PENDING = 2
+
+
+def _read_bytes(filename):
+    with open(filename, "rb") as source:
+        return source.read()
+
+
+async def atween_svgs(filenames, duration='5s', group_matching=False, fadeout_early=False, fadein_late=False, executor=None, max_pending=DEFAULT_MAX_PENDING, stats=None, compact=False, strip_metadata=False):
+    """
+        Yield an ElementTree for each pair of consecutive keyframe files, in
+        order, like tween_svgs_from_filenames(). Pairs are tweened in
+        executor, or one at a time in a thread of their own if it is None.
+        At most max_pending pairs are read and tweened ahead of the tween
+        the caller is waiting for, so tweens don't pile up when they are
+        used slowly. Cancelling the caller, or closing the iterator, cancels
+        the pairs that have not been started.
+    """
+    if max_pending < 1:
+        raise ValueError("max_pending must be at least 1")
+    loop = asyncio.get_running_loop()
+    tweener = Tweener(duration=duration, group_matching=group_matching, fadein_late=fadein_late, fadeout_early=fadeout_early, stats=stats, compact=compact, strip_metadata=strip_metadata)
+    stats = tweener.stats
+    filenames = list(filenames)
+    await loop.run_in_executor(None, tweener.prescan, filenames)
+    dimensions = tweener.dimensions()
+    # Tweening is CPU bound, so more threads would only contend for the GIL
+    own_executor = None
+    if executor is None:
+        executor = own_executor = ThreadPoolExecutor(max_workers=1)
+
+    def result(tween_and_stats):
+        tween, tween_stats = tween_and_stats
+        if tween_stats is not None:
+            stats.merge(tween_stats)
+        return tween
+
+    pending = deque()
+    try:
+        from_data = None
+        for filename in filenames:
+            to_data = await loop.run_in_executor(None, _read_bytes, filename)
+            stats.count("keyframes")
+            if from_data is not None:
+                pending.append(loop.run_in_executor(
+                    executor, _tween_bytes_worker, tweener.options, dimensions, from_data, to_data, stats.enabled))
+                if len(pending) >= max_pending:
+                    yield result(await pending.popleft())
+            from_data = to_data
+        while pending:
+            yield result(await pending.popleft())
+    finally:
+        for future in pending:
+            future.cancel()
+        if own_executor is not None:
+            own_executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,177 @@
+"""
+    On-disk cache of serialized tweens
+    A tween is stored under a hash of the bytes of its two keyframe files,
+    the Tweener options, the dimensions of the animation, the version of
+    TweenSVG and OUTPUT_FORMAT, so a pair of keyframes that has not changed
+    since an earlier run can be written out again without parsing or
+    tweening it.
+"""
+import hashlib
+import json
+import os
+import tempfile
+
+from TweenSVG import __version__, DEFAULT_MAX_BYTES
+
+# Version of the tweens made from given keyframes and options. Bump it
+# whenever a change to the Tweener or Serializer changes their output, so
+# that tweens cached before the change are not used even if __version__
+# has not changed
+OUTPUT_FORMAT = 1
+
+_SUFFIX = ".svg"
+
+
+def file_digest(source):
+    """ Return a hex digest of the bytes of a file, given its filename """
+    digest = hashlib.blake2b(digest_size=20)
+    with open(source, "rb") as source_file:
+        for block in iter(lambda: source_file.read(1 << 16), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class TweenCache():
+    """
+        A directory of serialized tweens, each in a file named by its key.
+        When the files add up to more than max_bytes, the least recently
+        used are removed, using the file modification time which is updated
+        whenever a tween is read back.
+    """
+
+    def __init__(self, directory, max_bytes=DEFAULT_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        os.makedirs(directory, exist_ok=True)
+        self._total_bytes = sum(size for _, size, _ in self._entries())
+
+    def key(self, from_digest, to_digest, options, dimensions):
+        """
+            Return the key of the tween between two keyframes, given the
+            digests of their files, the Tweener options and dimensions
+        """
+        digest = hashlib.blake2b(digest_size=20)
+        digest.update(json.dumps([__version__, OUTPUT_FORMAT, from_digest, to_digest, options, list(dimensions)],
+                                 sort_keys=True).encode("utf-8"))
+        return digest.hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.directory, key[:2], key + _SUFFIX)
+
+    def __contains__(self, key):
+        return os.path.exists(self._path(key))
+
+    def get(self, key):
+        """ Return the bytes stored for key, or None if there are none """
+        path = self._path(key)
+        try:
+            with open(path, "rb") as cached_file:
+                data = cached_file.read()
+        except FileNotFoundError:
+            return None
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            pass # Evicted by another process since it was read
+        return data
+
+    def put(self, key, data):
+        """ Store data for key, then remove old entries if the cache is too big """
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        try:
+            replaced_bytes = os.stat(path).st_size
+        except FileNotFoundError:
+            replaced_bytes = 0
+        # Written to a temporary file first so that readers never see part of a tween
+        handle, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        try:
+            with os.fdopen(handle, "wb") as temp_file:
+                temp_file.write(data)
+            os.replace(temp_path, path)
+        except BaseException:
+            os.unlink(temp_path)
+            raise
+        self._total_bytes += len(data) - replaced_bytes
+        if self._total_bytes > self.max_bytes:
+            self._evict()
+
+    def _entries(self):
+        """ Yield (path, size, modification time) of every entry in the cache """
+        with os.scandir(self.directory) as subdirectories:
+            for subdirectory in subdirectories:
+                if not subdirectory.is_dir():
+                    continue
+                with os.scandir(subdirectory.path) as entries:
+                    for entry in entries:
+                        if entry.name.endswith(_SUFFIX):
+                            try:
+                                stat = entry.stat()
+                            except FileNotFoundError:
+                                continue
+                            yield entry.path, stat.st_size, stat.st_mtime
+
+    def _evict(self):
+        entries = sorted(self._entries(), key=lambda entry: entry[2])
+        total = sum(size for _, size, _ in entries)
+        # Go down to 90% of the limit so that eviction doesn't happen on every put
+        target = self.max_bytes * 0.9
+        for path, size, _ in entries:
+            if total <= target:
+                break
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+        self._total_bytes = total
+
+
+def cached_tween_bytes(tweener, filenames, cache, serializer):
+    """
+        Yield the serialized bytes of the tween of each pair of consecutive
+        keyframe files, as made by tweener. Tweens found in cache are read
+        from it, only the keyframes of the other pairs are parsed and those
+        tweens are added to the cache. The tweener must not have keyframes
+        added to it.
+    """
+    filenames = list(filenames)
+    tweener.prescan(filenames)
+    stats = tweener.stats
+    digests = [file_digest(filename) for filename in filenames]
+    dimensions = tweener.dimensions()
+    keys = [cache.key(from_digest, to_digest, tweener.options, dimensions)
+            for from_digest, to_digest in zip(digests, digests[1:])]
+    missing = [index for index, key in enumerate(keys) if key not in cache]
+
+    def missing_pairs():
+        # Consecutive missing pairs share a keyframe, so it is only parsed once
+        last_index, last_keyframe = None, None
+        for index in missing:
+            if last_index == index:
+                from_keyframe = last_keyframe
+            else:
+                from_keyframe = tweener.load_keyframe(filenames[index])
+            last_index, last_keyframe = index + 1, tweener.load_keyframe(filenames[index + 1])
+            yield from_keyframe, last_keyframe
+
+    made = tweener._pair_tweens(missing_pairs())
+    missing = set(missing)
+    try:
+        for index, key in enumerate(keys):
+            data = None if index in missing else cache.get(key)
+            if data is not None:
+                stats.count("cache_hits")
+            else:
+                if index in missing:
+                    tween = next(made)
+                else:
+                    # Removed from the cache since it was looked for
+                    tween = tweener._tween_pair(tweener.load_keyframe(filenames[index]),
+                                                tweener.load_keyframe(filenames[index + 1]))
+                data = serializer.tostring(tween)
+                cache.put(key, data)
+                stats.count("cache_misses")
+            yield data
+    finally:
+        made.close()
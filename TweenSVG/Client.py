@@ -0,0 +1,49 @@
+"""
+    Client for TweenServer
+    Kept apart from the server so that sending a job to it doesn't import
+    the tween engine. See TweenSVG.Server for the format of jobs.
+"""
+import json
+import socket
+
+
+def parse_address(address):
+    """
+        Return the socket address of a server given as "HOST:PORT" or
+        ":PORT" (localhost) for TCP, otherwise as the path of a Unix socket
+    """
+    host, colon, port = address.rpartition(":")
+    if colon and "/" not in address and port.isdigit():
+        return (host or "127.0.0.1", int(port))
+    return address
+
+
+def _connect(address):
+    if isinstance(address, tuple):
+        return socket.create_connection(address)
+    client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        client.connect(address)
+    except BaseException:
+        client.close()
+        raise
+    return client
+
+
+def read_token(token_file):
+    """ Return the token a TweenServer wrote to token_file """
+    with open(token_file) as token_input:
+        return token_input.read().strip()
+
+
+def submit(address, job, token=None):
+    """ Send a job to the server at address, see parse_address(), and return its response """
+    if token is not None:
+        job = dict(job, token=token)
+    with _connect(address) as client:
+        client.sendall(json.dumps(job).encode("utf-8") + b"\n")
+        with client.makefile("rb") as response:
+            line = response.readline()
+    if not line:
+        raise ConnectionError("No response from tween server")
+    return json.loads(line.decode("utf-8"))
@@ -0,0 +1,187 @@
+"""
+    Per keyframe data for the Tweener module
+    A keyframe takes part in up to two tweens, one with the keyframe before it
+    and one with the keyframe after it. Anything derived from the keyframe is
+    kept here so that it is only worked out once.
+"""
+import hashlib
+from xml.etree.ElementTree import ElementTree
+from defusedxml.ElementTree import iterparse
+
+from TweenSVG.SVGUtils import SVGUtils as SVU
+from TweenSVG.Memo import AttributeMemo
+from TweenSVG.Node import NodeTree
+
+
+def _root_dimensions(root_attrs):
+    """ Return the width, height and viewBox of a keyframe from the attributes of its root element """
+    width = height = viewbox = None
+    if 'width' in root_attrs:
+        width = SVU.value_unit(root_attrs['width'])
+    if 'height' in root_attrs:
+        height = SVU.value_unit(root_attrs['height'])
+    if 'viewBox' in root_attrs:
+        viewbox = SVU.viewbox_vals(root_attrs['viewBox'])
+    return width, height, viewbox
+
+
+class KeyframeHeader():
+    """
+        The dimensions of a keyframe, read from the root element's start tag
+        without parsing the rest of the document. Has the same width, height
+        and viewbox attributes as a Keyframe.
+    """
+    __slots__ = ("width", "height", "viewbox")
+
+    def __init__(self, root_attrs):
+        self.width, self.height, self.viewbox = _root_dimensions(root_attrs)
+
+    @classmethod
+    def read(cls, source):
+        """
+            Read the header of a keyframe from a filename (or path-like
+            object) or a file object.
+            A file object is left at the position it was at so that it can
+            then be parsed in full, so it must be seekable.
+        """
+        if not hasattr(source, "read"):
+            with open(source, "rb") as keyframe_file:
+                return cls._read_file(keyframe_file)
+        position = source.tell()
+        try:
+            return cls._read_file(source)
+        finally:
+            source.seek(position)
+
+    @classmethod
+    def _read_file(cls, keyframe_file):
+        # Stop at the first start tag, only the first block of the file is read
+        for _, root in iterparse(keyframe_file, events=("start",)):
+            return cls(root.attrib)
+        raise ValueError("Keyframe has no root element")
+
+
+class Keyframe():
+    """
+        Wraps the ElementTree (or NodeTree) of a keyframe along with its root dimensions,
+        indexes of its elements by id, hashes of its subtrees and a memo of
+        parsed attribute values. The memo may be shared with other keyframes,
+        otherwise the keyframe has one of its own.
+    """
+
+    def __init__(self, tree, memo=None):
+        if not isinstance(tree, (ElementTree, NodeTree)):
+            raise TypeError("keyframe must be an ElementTree or NodeTree object")
+        self.tree = tree
+        # width and height are tuples of (value, unit), viewbox is a tuple of
+        # (left, top, width, height), each is None if the root has no such attribute
+        self.width, self.height, self.viewbox = _root_dimensions(tree.getroot().attrib)
+        self._own_memo = memo is None
+        self.memo = AttributeMemo() if memo is None else memo
+        self._parser = _MemoParser(self.memo)
+        self._ids = None
+        self._child_ids = None
+        self._hashes = None
+
+    def getroot(self):
+        return self.tree.getroot()
+
+    def _build_id_indexes(self):
+        ids = {}
+        child_ids = {}
+        for parent in self.tree.getroot().iter():
+            children = None
+            for child in parent:
+                eid = child.attrib.get('id', None)
+                if eid is not None:
+                    ids.setdefault(eid, child)
+                    if children is None:
+                        children = child_ids[id(parent)] = {}
+                    # If a tag and id are repeated the last one is used
+                    children[(child.tag, eid)] = child
+        self._ids = ids
+        self._child_ids = child_ids
+
+    def element_by_id(self, eid):
+        """ Return the first element in the keyframe with the given id, or None """
+        if self._ids is None:
+            self._build_id_indexes()
+        return self._ids.get(eid, None)
+
+    def child_by_id(self, parent, tag, eid):
+        """ Return the child element of parent with the given tag and id, or None """
+        if self._child_ids is None:
+            self._build_id_indexes()
+        children = self._child_ids.get(id(parent), None)
+        if children is None:
+            return None
+        return children.get((tag, eid), None)
+
+    def _hash_subtree(self, element):
+        hashes = self._hashes
+        child_hashes = []
+        child_ids = set()
+        shareable = isinstance(element.tag, str) and element.tag[:1] == "{"
+        for child in element:
+            child_hash = self._hash_subtree(child)
+            eid = child.attrib.get('id', None)
+            # Children are only tweened as copies of themselves if they can be matched by id
+            if child_hash is None or eid is None or eid in child_ids:
+                shareable = False
+            child_ids.add(eid)
+            child_hashes.append(child_hash)
+        if not shareable:
+            hashes[id(element)] = None
+            return None
+        # XML text cannot contain NUL so it separates the fields. Attributes
+        # are hashed in document order, which parsers keep
+        fields = [element.tag, str(len(child_hashes))]
+        # None and "" are different texts to the tweener
+        fields.append("\1" if element.text is None else "\2" + element.text)
+        for name_value in element.attrib.items():
+            fields.extend(name_value)
+        data = "\0".join(fields).encode("utf-8") + b"".join(child_hashes)
+        element_hash = hashes[id(element)] = hashlib.blake2b(data, digest_size=16).digest()
+        return element_hash
+
+    def subtree_hash(self, element):
+        """
+            Return a hash of the tag, attributes and text of element and of
+            all the elements under it, or None if tweening the subtree with
+            an identical one would not give a copy of it (e.g. it has
+            children without ids). Tails are not included.
+        """
+        if self._hashes is None:
+            self._hashes = {}
+            self._hash_subtree(self.tree.getroot())
+        return self._hashes.get(id(element), None)
+
+    def parser(self):
+        """ Return a parser for attribute values of the keyframe's elements that keeps its results in the keyframe's memo """
+        return self._parser
+
+    def evict(self):
+        """ Drop all indexes, hashes and parse results (unless the memo is shared), they are rebuilt if needed again """
+        if self._own_memo:
+            self.memo.clear()
+        self._ids = None
+        self._child_ids = None
+        self._hashes = None
+
+
+class _MemoParser():
+    """
+        Has the same parsing functions as SVGUtils, but the results are
+        kept in an AttributeMemo keyed by the attribute value.
+        Results are shared so must not be modified.
+    """
+    __slots__ = ("memo",)
+
+    def __init__(self, memo):
+        self.memo = memo
+
+    def path_data(self, value):
+        return self.memo.parse(SVU.path_data, value)
+
+    def transforms(self, value):
+        return self.memo.parse(SVU.transforms, value)
@@ -0,0 +1,116 @@
+"""
+    Memos of parsed attribute values and of the animations between pairs of
+    attribute values, shared by all the keyframes of a Tweener.
+    SVGs from tools such as Graphviz and Inkscape repeat the same path and
+    transform strings across many elements and keyframes, so each distinct
+    string only needs parsing (and each distinct pair aligning) once.
+"""
+from collections import OrderedDict
+import sys
+
+from TweenSVG.Stats import NULL_STATS
+
+# Default limits on the number of entries in a memo and on the total
+# length of the strings they are keyed by
+DEFAULT_MAX_ENTRIES = 4096
+DEFAULT_MAX_CHARS = 16 * 1024 * 1024
+
+
+class LRUMemo():
+    """
+        Maps keys to the results of a function, keeping the most recently used
+        entries up to max_entries of them and up to max_chars for the total
+        size given with each. Counts hits and misses.
+    """
+
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES, max_chars=DEFAULT_MAX_CHARS):
+        self.max_entries = max_entries
+        self.max_chars = max_chars
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict() # key: (result, size)
+        self._chars = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def lookup(self, key, size, func, *args):
+        """ Return func(*args), from the memo if key has been looked up before. Results are shared so must not be modified """
+        entries = self._entries
+        try:
+            result, _ = entries[key]
+        except KeyError:
+            pass
+        else:
+            entries.move_to_end(key)
+            self.hits += 1
+            return result
+        self.misses += 1
+        result = func(*args)
+        self.put(key, result, size)
+        return result
+
+    def get(self, key, default=None):
+        """ Return the result stored for key, or default. Not counted as a hit or miss """
+        try:
+            result, _ = self._entries[key]
+        except KeyError:
+            return default
+        self._entries.move_to_end(key)
+        return result
+
+    def put(self, key, result, size):
+        """ Store result for key, then drop the least recently used entries if the memo is too big """
+        entries = self._entries
+        old = entries.pop(key, None)
+        if old is not None:
+            self._chars -= old[1]
+        entries[key] = (result, size)
+        self._chars += size
+        while len(entries) > self.max_entries or (self._chars > self.max_chars and len(entries) > 1):
+            _, (_, old_size) = entries.popitem(last=False)
+            self._chars -= old_size
+
+    def clear(self):
+        self._entries.clear()
+        self._chars = 0
+
+
+class AttributeMemo():
+    """
+        An LRUMemo of parsed attribute values, keyed by the parsing function
+        and the value, and one of results worked out from pairs of values,
+        keyed by the attribute name and both values. Values are interned so
+        that equal strings from different elements are the same key object.
+        Hits and misses are counted in stats as value_memo_hits,
+        value_memo_misses, pair_memo_hits and pair_memo_misses.
+    """
+
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES, max_chars=DEFAULT_MAX_CHARS, stats=NULL_STATS):
+        self.values = LRUMemo(max_entries, max_chars)
+        self.pairs = LRUMemo(max_entries, max_chars)
+        self.stats = stats
+
+    def parse(self, parse_func, value):
+        """ Return parse_func(value) """
+        values = self.values
+        hits = values.hits
+        value = sys.intern(value)
+        result = values.lookup((parse_func, value), len(value), parse_func, value)
+        self.stats.count("value_memo_hits" if values.hits != hits else "value_memo_misses")
+        return result
+
+    def pair(self, attr, from_value, to_value, func, *args):
+        """ Return func(from_value, to_value, *args), for the values of attribute attr """
+        pairs = self.pairs
+        hits = pairs.hits
+        from_value = sys.intern(from_value)
+        to_value = sys.intern(to_value)
+        result = pairs.lookup((attr, from_value, to_value), len(from_value) + len(to_value),
+                              func, from_value, to_value, *args)
+        self.stats.count("pair_memo_hits" if pairs.hits != hits else "pair_memo_misses")
+        return result
+
+    def clear(self):
+        self.values.clear()
+        self.pairs.clear()
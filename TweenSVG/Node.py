@@ -0,0 +1,209 @@
+"""
+    A compact tree of the elements of a keyframe
+    The tweener only needs the tag, attributes, text, tail and children of
+    each keyframe element, so parse() builds a tree of Nodes, which hold no
+    more than that, straight from the events of defusedxml's parser, with
+    the same protections as defusedxml.ElementTree.parse(). Tag and attribute
+    names are interned. Optionally, Inkscape and Sodipodi elements and
+    attributes and <metadata> elements are dropped too.
+    A NodeTree can be used wherever the Tweener takes an ElementTree.
+"""
+import sys
+from xml.etree.ElementTree import Element, SubElement
+from defusedxml.ElementTree import DefusedXMLParser
+
+# Namespaces of editor data that is dropped with strip_metadata
+_METADATA_NAMESPACES = ("{http://www.inkscape.org/namespaces/inkscape}",
+                        "{http://sodipodi.sourceforge.net/DTD/sodipodi-0.dtd}")
+_METADATA_TAGS = frozenset(["metadata", "{http://www.w3.org/2000/svg}metadata"])
+
+_intern = sys.intern
+
+# Children of nodes without any, shared to save a list for every leaf
+_NO_CHILDREN = ()
+
+
+class Node():
+    """
+        An element of a keyframe. Has the tag, attrib, text and tail of an
+        Element and its children can be iterated over, but there are none
+        of the other Element functions
+    """
+    __slots__ = ("tag", "attrib", "text", "tail", "_children")
+
+    def __init__(self, tag, attrib):
+        self.tag = tag
+        self.attrib = attrib
+        self.text = None
+        self.tail = None
+        self._children = _NO_CHILDREN
+
+    def __repr__(self):
+        return "<Node %r at %#x>" % (self.tag, id(self))
+
+    def __iter__(self):
+        return iter(self._children)
+
+    def __len__(self):
+        return len(self._children)
+
+    def __getitem__(self, index):
+        return self._children[index]
+
+    def get(self, key, default=None):
+        return self.attrib.get(key, default)
+
+    def iter(self):
+        """ Yield this node and all the nodes under it, in document order """
+        stack = [self]
+        while stack:
+            node = stack.pop()
+            yield node
+            stack.extend(reversed(node._children))
+
+    def to_element(self):
+        """ Return a copy of this node and all the nodes under it as Elements """
+        root = Element(self.tag, self.attrib)
+        stack = [(self, root)]
+        while stack:
+            node, element = stack.pop()
+            element.text = node.text
+            element.tail = node.tail
+            for child in node._children:
+                stack.append((child, SubElement(element, child.tag, child.attrib)))
+        return root
+
+
+class NodeTree():
+    """ Holds the root Node of a keyframe, as an ElementTree holds its root Element """
+    __slots__ = ("_root",)
+
+    def __init__(self, root):
+        self._root = root
+
+    def getroot(self):
+        return self._root
+
+    def iter(self):
+        return self._root.iter()
+
+
+class _NodeBuilder():
+    """
+        Builds a tree of Nodes from the events of an expat parser, in the
+        same way as xml.etree's XMLParser and TreeBuilder build Elements
+    """
+
+    def __init__(self, strip_metadata):
+        self.strip_metadata = strip_metadata
+        self._names = {} # Expat's names, e.g. "namespace}tag", to interned names or None if dropped
+        self._root = None
+        self._open = [] # Nodes whose end tag has not been parsed yet
+        self._data = []
+        self._last = None # The last node started or ended
+        self._tail = False # Whether data is the tail of _last, or its text
+        self._skipped = 0 # Depth inside a dropped element
+
+    def _name(self, raw_name):
+        name = "{" + raw_name if "}" in raw_name else raw_name
+        if self.strip_metadata and (name in _METADATA_TAGS or name.startswith(_METADATA_NAMESPACES)):
+            name = None
+        else:
+            name = _intern(name)
+        self._names[raw_name] = name
+        return name
+
+    def _flush(self):
+        if self._data:
+            if self._last is not None:
+                text = "".join(self._data)
+                # Mostly indentation, which is repeated throughout the file
+                if text.isspace():
+                    text = _intern(text)
+                if self._tail:
+                    self._last.tail = text
+                else:
+                    self._last.text = text
+            self._data = []
+
+    def data(self, data):
+        if not self._skipped:
+            self._data.append(data)
+
+    def start(self, raw_tag, attr_list):
+        if self._skipped:
+            self._skipped += 1
+            return
+        names = self._names
+        tag = names[raw_tag] if raw_tag in names else self._name(raw_tag)
+        if tag is None:
+            self._skipped = 1
+            return
+        if self._data:
+            self._flush()
+        attrib = {}
+        # attr_list is a flat list of names and values
+        for index in range(0, len(attr_list), 2):
+            raw_name = attr_list[index]
+            name = names[raw_name] if raw_name in names else self._name(raw_name)
+            if name is not None:
+                attrib[name] = _intern(attr_list[index + 1])
+        node = Node(tag, attrib)
+        if self._open:
+            parent = self._open[-1]
+            if parent._children is _NO_CHILDREN:
+                parent._children = [node]
+            else:
+                parent._children.append(node)
+        else:
+            self._root = node
+        self._open.append(node)
+        self._last = node
+        self._tail = False
+
+    def end(self, raw_tag):
+        if self._skipped:
+            self._skipped -= 1
+            return
+        if self._data:
+            self._flush()
+        self._last = self._open.pop()
+        self._tail = True
+
+    def close(self):
+        if self._root is None:
+            raise ValueError("Keyframe has no root element")
+        return self._root
+
+
+def parse(source, strip_metadata=False):
+    """
+        Parse a keyframe from a filename, path or file object into a
+        NodeTree. Comments and processing instructions are dropped, as
+        they are by defusedxml.ElementTree.parse(). With strip_metadata,
+        Inkscape and Sodipodi elements and attributes and <metadata>
+        elements are dropped too.
+    """
+    if not hasattr(source, "read"):
+        with open(source, "rb") as source_file:
+            return parse(source_file, strip_metadata)
+    builder = _NodeBuilder(strip_metadata)
+    parser = DefusedXMLParser(target=builder)
+    # defusedxml's protections are handlers of the expat parser, elements
+    # are built from its events directly rather than through XMLParser
+    parser.parser.StartElementHandler = builder.start
+    parser.parser.EndElementHandler = builder.end
+    # Text mode files give str blocks, which expat takes as ElementTree feeds them
+    while True:
+        block = source.read(1 << 16)
+        if not block:
+            break
+        parser.feed(block)
+    return NodeTree(parser.close())
+
+
+def as_element(element):
+    """ Return element if it is an Element, otherwise a copy of the Node and all the nodes under it as Elements """
+    if isinstance(element, Node):
+        return element.to_element()
+    return element
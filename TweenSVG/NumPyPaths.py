@@ -0,0 +1,265 @@
+"""
+    NumPy versions of the path functions of SVGUtils that walk through a path
+    one segment at a time: collapsing a path into a point and filling the gaps
+    in paths made tweenable, which needs the end point of every segment.
+    NumPy is optional and only imported when the first long path is seen.
+    SVGUtils uses these functions for long paths when it is installed and
+    its own pure Python code otherwise. Results are the same
+    either way, relative coordinates are added up in the same order as
+    PathCursor adds them.
+"""
+from TweenSVG.PathData import PathData, ARG_COUNTS, _END_POINT_ARGS, _MOVETO_CODES, _CLOSEPATH_CODES, _COLLAPSE_ARGS
+
+numpy = None
+
+# Whether numpy could be imported, None until available() is first called
+_available = None
+
+# Set to False to always use the pure Python functions
+ENABLED = True
+
+# Shorter paths are quicker to walk through in Python than to convert to arrays
+MIN_SEGMENTS = 256
+
+# Kinds of collapsed arguments, see _COLLAPSE_ARGS
+_KIND_X, _KIND_Y, _KIND_ZERO, _KIND_KEEP = range(4)
+
+
+def available():
+    """ Import NumPy if it has not been yet, return True if it is installed """
+    global numpy, _available
+    if _available is None:
+        try:
+            import numpy as numpy_module
+        except ImportError:
+            _available = False
+        else:
+            numpy = numpy_module
+            _make_tables()
+            _available = True
+    return _available
+
+
+def _make_tables():
+    global _ARG_COUNTS, _X_INDEX, _Y_INDEX, _RELATIVE, _MOVETO, _CLOSEPATH, _COLLAPSED, _COLLAPSE_KINDS
+    # Tables indexed by the byte code of a path command
+    _ARG_COUNTS = numpy.zeros(256, dtype=numpy.intp)
+    _X_INDEX = numpy.full(256, -1, dtype=numpy.intp)
+    _Y_INDEX = numpy.full(256, -1, dtype=numpy.intp)
+    _RELATIVE = numpy.zeros(256, dtype=bool)
+    _MOVETO = numpy.zeros(256, dtype=bool)
+    _CLOSEPATH = numpy.zeros(256, dtype=bool)
+    _COLLAPSED = numpy.zeros(256, dtype=bool) # False if the segment is dropped when collapsed
+    _COLLAPSE_KINDS = numpy.zeros((256, max(ARG_COUNTS.values())), dtype=numpy.intp)
+    for command, count in ARG_COUNTS.items():
+        code = ord(command)
+        _ARG_COUNTS[code] = count
+        x_index, y_index, _RELATIVE[code] = _END_POINT_ARGS[code]
+        _X_INDEX[code] = -1 if x_index is None else x_index
+        _Y_INDEX[code] = -1 if y_index is None else y_index
+        _MOVETO[code] = code in _MOVETO_CODES
+        _CLOSEPATH[code] = code in _CLOSEPATH_CODES
+        if _COLLAPSE_ARGS[code] is not None:
+            _COLLAPSED[code] = True
+            _COLLAPSE_KINDS[code, :count] = ["xy0k".index(kind) for kind in _COLLAPSE_ARGS[code]]
+
+
+def use_for(num_segments):
+    """ True if the functions in this module should be used for a path of num_segments segments """
+    return ENABLED and num_segments >= MIN_SEGMENTS and available()
+
+
+def _segmented_cumsum(values, starts):
+    """
+        Return the running sums of values, starting again from each index
+        where starts is True (starts[0] must be True). Each sum is added up
+        from left to right, as a Python loop would.
+    """
+    size = len(values)
+    begins = numpy.flatnonzero(starts)
+    lengths = numpy.diff(numpy.append(begins, size))
+    out = numpy.empty(size)
+    # Runs are padded into rows of a block and summed along the rows in one go,
+    # grouped by their bit length so that no row is more than half padding
+    groups = numpy.frexp(lengths)[1]
+    for group in numpy.unique(groups):
+        rows = groups == group
+        row_lengths = lengths[rows]
+        columns = numpy.arange(row_lengths.max())
+        index = begins[rows][:, None] + columns
+        mask = columns < row_lengths[:, None]
+        block = numpy.where(mask, values[numpy.minimum(index, size - 1)], 0.0)
+        out[index[mask]] = numpy.cumsum(block, axis=1)[mask]
+    return out
+
+
+def _axis_end_points(has_arg, relative, args, moveto, closepath):
+    """
+        Return the x or y coordinate of the end point of each segment of a
+        path, given for each segment whether it has an argument for the
+        coordinate, whether it is relative, the argument, whether it is a
+        moveto and whether it is a closepath
+    """
+    size = len(args)
+    absolute = has_arg & ~relative
+    # Index 0 is the start of the path, segments follow. Each run of relative
+    # segments is summed from the absolute value (or closepath) it follows
+    values = numpy.empty(size + 1)
+    values[0] = 0.0
+    values[1:] = numpy.where(has_arg, args, 0.0)
+    starts = numpy.empty(size + 1, dtype=bool)
+    starts[0] = True
+    starts[1:] = absolute | closepath
+    closepaths = numpy.flatnonzero(closepath) + 1
+    if len(closepaths):
+        _closepath_values(values, starts, moveto, closepaths)
+    return _segmented_cumsum(values, starts)[1:]
+
+
+def _closepath_values(values, starts, moveto, closepaths):
+    """
+        Set the value of each closepath in values to the coordinate of the
+        moveto that started its subpath. Each depends on the ones before it,
+        so this is a loop, but only over the segments between each moveto
+        and the start of its run.
+    """
+    positions = numpy.arange(len(values))
+    last_start = numpy.maximum.accumulate(numpy.where(starts, positions, 0)).tolist()
+    moveto_positions = numpy.zeros(len(values), dtype=numpy.intp)
+    moveto_positions[1:] = numpy.where(moveto, positions[1:], 0)
+    last_moveto = numpy.maximum.accumulate(moveto_positions)[closepaths].tolist()
+    value_list = values.tolist()
+    moveto_values = {0: 0.0}
+    for closepath, moveto_position in zip(closepaths.tolist(), last_moveto):
+        value = moveto_values.get(moveto_position, None)
+        if value is None:
+            start = last_start[moveto_position]
+            value = value_list[start]
+            for index in range(start + 1, moveto_position + 1):
+                value += value_list[index]
+            moveto_values[moveto_position] = value
+        value_list[closepath] = value
+    values[closepaths] = [value_list[closepath] for closepath in closepaths.tolist()]
+
+
+def _arrays(path):
+    codes = numpy.frombuffer(bytes(path.commands), dtype=numpy.uint8)
+    coords = numpy.array(path.coords, dtype=numpy.float64)
+    counts = _ARG_COUNTS[codes]
+    offsets = numpy.cumsum(counts) - counts
+    return codes, coords, offsets
+
+
+def _args_at(coords, offsets, arg_index):
+    """ Return coords[offsets + arg_index], or 0.0 where arg_index is -1 """
+    if not len(coords):
+        return numpy.zeros(len(offsets))
+    return numpy.where(arg_index >= 0, coords[numpy.minimum(offsets + arg_index, len(coords) - 1)], 0.0)
+
+
+def _end_points(codes, coords, offsets):
+    x_index = _X_INDEX[codes]
+    y_index = _Y_INDEX[codes]
+    relative = _RELATIVE[codes]
+    moveto = _MOVETO[codes]
+    closepath = _CLOSEPATH[codes]
+    end_x = _axis_end_points(x_index >= 0, relative, _args_at(coords, offsets, x_index), moveto, closepath)
+    end_y = _axis_end_points(y_index >= 0, relative, _args_at(coords, offsets, y_index), moveto, closepath)
+    return end_x, end_y
+
+
+def end_points(path):
+    """ Return two arrays of the x and y coordinates of the end point of each segment of a PathData """
+    return _end_points(*_arrays(path))
+
+
+def _collapsed_args(codes, counts, positions, sources, point_x, point_y):
+    """
+        Return the arguments of segments with command codes `codes`, each
+        collapsed into its point in point_x and point_y. counts and positions
+        are from _arg_positions() and arguments that are kept as they were
+        are taken from sources, which has one per argument
+    """
+    segment = numpy.repeat(numpy.arange(len(codes)), counts)
+    kinds = _COLLAPSE_KINDS[codes[segment], positions]
+    return numpy.select(
+        [kinds == _KIND_X, kinds == _KIND_Y, kinds == _KIND_KEEP],
+        [point_x[segment], point_y[segment], sources], 0.0)
+
+
+def _arg_positions(codes):
+    """
+        Return the number of arguments of each segment with command codes
+        `codes`, the index of the first argument of each segment and the
+        index of each argument within its segment
+    """
+    counts = _ARG_COUNTS[codes]
+    firsts = numpy.cumsum(counts) - counts
+    return counts, firsts, numpy.arange(int(counts.sum())) - numpy.repeat(firsts, counts)
+
+
+def _segment_args(coords, offsets, counts, positions):
+    """ Return the arguments of segments starting at `offsets` in coords, see _arg_positions() """
+    if not len(coords):
+        return numpy.zeros(len(positions))
+    return coords[numpy.minimum(numpy.repeat(offsets, counts) + positions, len(coords) - 1)]
+
+
+def path_to_point(path, point):
+    """ Same as SVGUtils.path_to_point() for a PathData """
+    codes, coords, offsets = _arrays(path)
+    kept = _COLLAPSED[codes]
+    codes = codes[kept]
+    counts, _, positions = _arg_positions(codes)
+    point_x = numpy.full(len(codes), float(point[0]))
+    point_y = numpy.full(len(codes), float(point[1]))
+    sources = _segment_args(coords, offsets[kept], counts, positions)
+    args = _collapsed_args(codes, counts, positions, sources, point_x, point_y)
+    return PathData._from_buffers(codes.tobytes(), args.tobytes())
+
+
+def _take(values, index):
+    """ Return values[index], with 0 where index is -1 """
+    if not len(values):
+        return numpy.zeros(len(index), dtype=values.dtype)
+    return numpy.where(index >= 0, values[numpy.maximum(index, 0)], 0)
+
+
+def indicies_to_path(indicies, path, fallback_indicies, fallback_path):
+    """ Same as SVGUtils._indicies_to_path() """
+    index = numpy.array(indicies, dtype=numpy.intp)
+    fallback_index = numpy.array(fallback_indicies, dtype=numpy.intp)
+    codes, coords, offsets = _arrays(path)
+    fallback_codes, fallback_coords, fallback_offsets = _arrays(fallback_path)
+    gap = index < 0
+    out_codes = numpy.where(gap, _take(fallback_codes, fallback_index), _take(codes, index)).astype(numpy.uint8)
+    # Gaps filled with segments that are dropped when collapsed are left out
+    kept = ~gap | _COLLAPSED[out_codes]
+    out_codes, gap, index, fallback_index = out_codes[kept], gap[kept], index[kept], fallback_index[kept]
+    counts, firsts, positions = _arg_positions(out_codes)
+    segment_offsets = _take(offsets, index)
+    args = _segment_args(coords, segment_offsets, counts, positions)
+    gaps = numpy.flatnonzero(gap)
+    if not len(gaps):
+        return PathData._from_buffers(out_codes.tobytes(), args.tobytes())
+
+    # Each gap is collapsed into the end point of the output before it. Collapsed
+    # segments don't move it so it can be found with them treated as relative
+    # moves by 0 (a moveto still starts a subpath)
+    copied = ~gap
+    x_index = numpy.where(copied, _X_INDEX[out_codes], -1)
+    y_index = numpy.where(copied, _Y_INDEX[out_codes], -1)
+    relative = _RELATIVE[out_codes] | gap
+    moveto = _MOVETO[out_codes]
+    closepath = _CLOSEPATH[out_codes] & copied
+    end_x = _axis_end_points((x_index >= 0) | gap, relative, _args_at(coords, segment_offsets, x_index), moveto, closepath)
+    end_y = _axis_end_points((y_index >= 0) | gap, relative, _args_at(coords, segment_offsets, y_index), moveto, closepath)
+    point_x = numpy.concatenate(([0.0], end_x))[gaps]
+    point_y = numpy.concatenate(([0.0], end_y))[gaps]
+
+    gap_codes = out_codes[gaps]
+    gap_counts, _, gap_positions = _arg_positions(gap_codes)
+    sources = _segment_args(fallback_coords, _take(fallback_offsets, fallback_index[gaps]), gap_counts, gap_positions)
+    args[numpy.repeat(firsts[gaps], gap_counts) + gap_positions] = _collapsed_args(
+        gap_codes, gap_counts, gap_positions, sources, point_x, point_y)
+    return PathData._from_buffers(out_codes.tobytes(), args.tobytes())
@@ -0,0 +1,263 @@
+"""
+    Compact storage for parsed SVG path data
+    Used by SVGUtils so that path coordinates are parsed to floats once and
+    are not kept around as one python string per number.
+"""
+from array import array
+
+# The argument pattern of each path command, see SVGUtils.num_args_for_path_command
+ARG_GROUPS = {
+    "m": [2],
+    "l": [2],
+    "h": [1],
+    "v": [1],
+    "c": [2, 2, 2],
+    "s": [2, 2],
+    "q": [2, 2],
+    "t": [2],
+    "a": [7],
+    "z": [0]
+}
+ARG_GROUPS.update({command.upper(): groups for command, groups in list(ARG_GROUPS.items())})
+
+# Total number of arguments taken by each path command
+ARG_COUNTS = {command: sum(groups) for command, groups in ARG_GROUPS.items()}
+
+# The same, indexed by the byte code of the command
+_CODE_ARG_COUNTS = {ord(command): count for command, count in ARG_COUNTS.items()}
+
+_MOVETO_CODES = {ord("M"), ord("m")}
+_CLOSEPATH_CODES = {ord("Z"), ord("z")}
+
+# The argument index of the end point x and y coordinates of each path
+# command and whether they are relative to the current point
+_END_POINT_ARGS = {
+    ord("M"): (0, 1, False), ord("m"): (0, 1, True),
+    ord("L"): (0, 1, False), ord("l"): (0, 1, True),
+    ord("T"): (0, 1, False), ord("t"): (0, 1, True),
+    ord("H"): (0, None, False), ord("h"): (0, None, True),
+    ord("V"): (None, 0, False), ord("v"): (None, 0, True),
+    ord("C"): (4, 5, False), ord("c"): (4, 5, True),
+    ord("S"): (2, 3, False), ord("s"): (2, 3, True),
+    ord("Q"): (2, 3, False), ord("q"): (2, 3, True),
+    ord("A"): (5, 6, False), ord("a"): (5, 6, True),
+    ord("Z"): (None, None, False), ord("z"): (None, None, False),
+}
+
+# How to collapse each argument of each path command into a single point
+# x and y are the point coordinates, 0 is zero and k keeps the original value
+# Commands that are dropped when collapsed map to None
+_COLLAPSE_ARGS = {
+    ord("M"): "xy", ord("m"): "00",
+    ord("L"): "xy", ord("l"): "00",
+    ord("T"): "xy", ord("t"): "00",
+    ord("H"): "x", ord("h"): "0",
+    ord("V"): "y", ord("v"): "0",
+    ord("C"): "xyxyxy", ord("c"): "000000",
+    ord("S"): "xyxy", ord("s"): "0000",
+    ord("Q"): "xyxy", ord("q"): "0000",
+    ord("A"): "kkkkkxy", ord("a"): "kkkkk00",
+    ord("Z"): None, ord("z"): None,
+}
+
+
+def _command_format(command):
+    """ Return the format of a path command and its arguments in a path string, e.g. "C %s %s, %s %s, %s %s" """
+    groups = [" ".join(["%s"] * num) for num in ARG_GROUPS[command] if num]
+    return " ".join([command] + ([", ".join(groups)] if groups else []))
+
+
+# The same for each byte code of a path command
+_CODE_FORMATS = {ord(command): _command_format(command) for command in ARG_GROUPS}
+
+
+def coord_strs(values, precision=None):
+    """
+        Format a sequence of floats and return a list of strings. Each is the
+        shortest string that reads back as the same float, as coord_str(), or
+        with precision given it is rounded to that many decimal places and
+        trailing zeros are dropped.
+        Shortest strings are formatted in one go, which is much faster than
+        formatting each value on its own for long sequences.
+    """
+    if precision is None:
+        values = [float(value) + 0.0 for value in values] # + 0.0 turns -0.0 into 0.0
+        if not values:
+            return []
+        # repr() of a list formats each float as repr() does, with ", " between them
+        string = repr(values)[1:-1] + ", "
+        return string.replace(".0, ", ", ").split(", ")[:-1]
+    fixed_format = "%%.%df" % (precision)
+    if precision == 0:
+        return [fixed_format % (value) for value in values]
+    return [(fixed_format % (value)).rstrip("0").rstrip(".") for value in values]
+
+
+def coords_str(values, precision=None, separator=" "):
+    """ Format a sequence of floats as coord_strs() does and join them with separator """
+    return separator.join(coord_strs(values, precision))
+
+
+def coord_str(value):
+    """ Format a coordinate as the shortest string that reads back as the same float """
+    str_value = repr(float(value) + 0.0) # + 0.0 turns -0.0 into 0.0
+    if str_value[-2:] == '.0':
+        str_value = str_value[0:-2]
+    return str_value
+
+
+class PathData():
+    """
+        A parsed SVG path (the 'd' attribute of a <path> tag).
+        The command letter of each segment is stored as one byte in `commands`
+        and the arguments of all segments are stored as floats, in order, in
+        `coords`. Segments can be read back as (command, args) tuples where
+        command is a one character string and args is a sequence of floats.
+    """
+    __slots__ = ("commands", "coords", "_offsets")
+
+    def __init__(self, commands=b"", coords=()):
+        self.commands = bytearray(commands)
+        self.coords = array('d', coords)
+        self._offsets = None
+        if len(self.coords) != sum(_CODE_ARG_COUNTS[code] for code in self.commands):
+            raise ValueError("Wrong number of coordinates for path commands")
+
+    @classmethod
+    def _from_buffers(cls, commands, coords):
+        """ Build a PathData from the bytes of its command codes and of its coords as doubles, without checking that they match """
+        path = cls()
+        path.commands = bytearray(commands)
+        path.coords = array('d', coords)
+        return path
+
+    @classmethod
+    def from_parts(cls, parts):
+        """ Build a PathData from a list of (command, args) tuples as output by SVGUtils.path_parts() """
+        path = cls()
+        for command, args in parts:
+            path.append(command, [float(arg) for arg in args])
+        return path
+
+    def to_parts(self):
+        """ Return the path as a list of (command, args) tuples where args is a list of strings, as output by SVGUtils.path_parts() """
+        strings = coord_strs(self.coords)
+        parts = []
+        index = 0
+        for code in self.commands:
+            num = _CODE_ARG_COUNTS[code]
+            parts.append((chr(code), strings[index:index+num]))
+            index += num
+        return parts
+
+    def append(self, command, args):
+        """ Add a segment to the end of the path """
+        if len(args) != ARG_COUNTS[command]:
+            raise ValueError("Wrong number of arguments for path command '%s'" % (command))
+        self.commands.append(ord(command))
+        self.coords.extend(args)
+        self._offsets = None
+
+    def extend(self, other):
+        """ Add all the segments of another PathData to the end of this one """
+        self.commands.extend(other.commands)
+        self.coords.extend(other.coords)
+        self._offsets = None
+
+    def command_string(self):
+        """ Return the command letters of all segments as a string """
+        return self.commands.decode('ascii')
+
+    def offsets(self):
+        """ Return an array of the index in `coords` of the first argument of each segment """
+        if self._offsets is None:
+            offsets = array('L')
+            offset = 0
+            for code in self.commands:
+                offsets.append(offset)
+                offset += _CODE_ARG_COUNTS[code]
+            self._offsets = offsets
+        return self._offsets
+
+    def to_string(self, precision=None):
+        """
+            Return the path as an SVG path string, in the format output by
+            SVGUtils.path_string(). Coordinates are formatted by coord_strs()
+        """
+        return " ".join([_CODE_FORMATS[code] for code in self.commands]) % tuple(coord_strs(self.coords, precision))
+
+    def __len__(self):
+        return len(self.commands)
+
+    def __iter__(self):
+        coords = self.coords
+        index = 0
+        for code in self.commands:
+            num = _CODE_ARG_COUNTS[code]
+            yield chr(code), coords[index:index+num]
+            index += num
+
+    def __getitem__(self, index):
+        code = self.commands[index]
+        offset = self.offsets()[index]
+        return chr(code), self.coords[offset:offset+_CODE_ARG_COUNTS[code]]
+
+    def __eq__(self, other):
+        if not isinstance(other, PathData):
+            return NotImplemented
+        return self.commands == other.commands and self.coords == other.coords
+
+    def __repr__(self):
+        return "PathData(%r)" % (self.to_string())
+
+
+class PathCursor():
+    """
+        Tracks the current point and the start of the current subpath while
+        walking through the segments of a path, so that the position at any
+        segment can be found without going back to the start of the path.
+    """
+    __slots__ = ("x", "y", "start_x", "start_y")
+
+    def __init__(self):
+        self.x = 0.0
+        self.y = 0.0
+        self.start_x = 0.0
+        self.start_y = 0.0
+
+    def point(self):
+        """ Return the current point as a tuple of two floats (x, y) """
+        return self.x, self.y
+
+    def advance(self, command, args):
+        """ Move the cursor to the end of a segment, command may be a command letter or its byte code """
+        if isinstance(command, str):
+            command = ord(command)
+        self._advance(command, args, 0)
+
+    def advance_path(self, path):
+        """ Move the cursor to the end of every segment of a PathData in turn """
+        coords = path.coords
+        index = 0
+        for code in path.commands:
+            self._advance(code, coords, index)
+            index += _CODE_ARG_COUNTS[code]
+
+    def _advance(self, code, coords, index):
+        x_index, y_index, relative = _END_POINT_ARGS[code]
+        if x_index is not None:
+            if relative:
+                self.x += coords[index + x_index]
+            else:
+                self.x = coords[index + x_index]
+        if y_index is not None:
+            if relative:
+                self.y += coords[index + y_index]
+            else:
+                self.y = coords[index + y_index]
+        if code in _MOVETO_CODES:
+            # Start a new subpath
+            self.start_x, self.start_y = self.x, self.y
+        elif code in _CLOSEPATH_CODES:
+            # Back to the start of the subpath
+            self.x, self.y = self.start_x, self.start_y
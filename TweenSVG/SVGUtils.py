@@ -4,16 +4,42 @@
     and so the API of this module will change if needed
     to satisfy Tweener.
 """
+import itertools
 import re
 
+from TweenSVG.PathData import PathData, PathCursor, ARG_GROUPS, ARG_COUNTS, coords_str, _CODE_ARG_COUNTS, _COLLAPSE_ARGS
+from TweenSVG.Stats import NULL_STATS
+from TweenSVG import NumPyPaths
+
+# Tokenizer for path data, each match is either a command letter, a number or
+# an invalid character. Separators (whitespace and commas) are skipped, trailing
+# ones match nothing so they are ignored. Numbers
+# may have exponents and need no separator when the next one starts with a
+# sign or a second decimal point (e.g. "1.5.5-2" is 1.5, .5 and -2)
+_PATH_TOKEN_RE = re.compile(
+    r"[\s,]*(?:([MmLlHhVvCcSsQqTtAaZz])|([-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?)|([^\s,]))")
+
+# A dimension value and its unit, e.g. "10.5mm"
+_VALUE_UNIT_RE = re.compile(r" *([\d\.]+) *([^\d\n]*) *")
+
+_VIEWBOX_RE = re.compile(
+    r"(-?\d+(?:\.\d)?\d*) *[, ] *(-?\d+(?:\.\d)?\d*) *[, ] *(-?\d+(?:\.\d)?\d*) *[, ] *(-?\d+(?:\.\d)?\d*)")
+
+# A transform and its unparsed arguments, e.g. "translate(1, 2)"
+_TRANSFORM_RE = re.compile(r"(translate|rotate|scale|matrix|skew(?:x|y))\(([^)]+)\)", re.IGNORECASE)
+
+SVG_NAMESPACE = "http://www.w3.org/2000/svg"
+
+# A moveto followed by more coordinates implicitly starts a lineto
+_IMPLICIT_COMMANDS = {"M": "L", "m": "l"}
+
+
+# Decimal places of dimensions and viewBox values
+_DIMENSION_PRECISION = 6
+
 
 def minimal_float_str(float_val):
-    str_value = "%f" % (float(float_val))
-    while str_value[-1] == '0' and str_value[-2] != '.':
-        str_value = str_value[0:-1]
-    if str_value[-2:] == '.0':
-        str_value = str_value[0:-2]
-    return str_value
+    return coords_str((float_val,), _DIMENSION_PRECISION)
 
 class SVGUtils():
     """
@@ -21,13 +47,20 @@ class SVGUtils():
         transforming SVG data.
     """
 
+    @staticmethod
+    def svg_tag(tag):
+        """ Return tag in the SVG namespace, in ElementTree's {namespace}tag form. Tags that already have a namespace are returned unchanged """
+        if tag[:1] == "{":
+            return tag
+        return "{%s}%s" % (SVG_NAMESPACE, tag)
+
     @staticmethod
     def value_unit(string):
         """
             Parses an SVG dimension value and returns a tuple of two strings.
             The first string is the value and the second is the units.
         """
-        m = re.match(r" *([\d\.]+) *([^\d\n]*) *", string)
+        m = _VALUE_UNIT_RE.match(string)
         if not m:
             raise ValueError("invalid dimension value '%s'" % (string))
         g = m.groups()
@@ -36,14 +69,13 @@ class SVGUtils():
     @staticmethod
     def to_unit_val(value, unit):
         """ Take a floating point value and a string unit and return an SVG dimension string """
-        str_value = minimal_float_str(value)
+        str_value = coords_str((value,), _DIMENSION_PRECISION)
         return "%s%s" % (str_value, unit)
 
     @staticmethod
     def viewbox_vals(string):
         """ Parse an SVG viewbox string and return a 4-tuple of (left, top, widht, height) floats """
-        m = re.match(
-            r"(-?\d+(?:\.\d)?\d*) *[, ] *(-?\d+(?:\.\d)?\d*) *[, ] *(-?\d+(?:\.\d)?\d*) *[, ] *(-?\d+(?:\.\d)?\d*)", string)
+        m = _VIEWBOX_RE.match(string)
         if not m:
             raise ValueError("invalid viewbox string")
         groups = m.groups()
@@ -52,14 +84,12 @@ class SVGUtils():
     @staticmethod
     def to_viewbox_val(left, top, width, height):
         """ Return an SVG viewbox string given floating point values for left, top, width and height """
-        return " ".join(minimal_float_str(val) for val in [left, top, width, height])
+        return coords_str((left, top, width, height), _DIMENSION_PRECISION)
 
     @staticmethod
     def transforms(string):
         """ Parse an SVG transform string and return a list of tuples of transforms. The tuples are of the form (trasform_type, args), both are strings, the args string is not parsed further and is provided as-is"""
-        matches = re.findall(
-            r"(translate|rotate|scale|matrix|skew(?:x|y))\(([^)]+)\)", string, flags=re.IGNORECASE)
-        return [(transform, args) for transform, args in matches]
+        return _TRANSFORM_RE.findall(string)
 
     @staticmethod
     def num_args_for_path_command(command):
@@ -71,215 +101,330 @@ class SVGUtils():
         something like the c command is more complicated. num_args_for_path_command("c") == [2,2,2]
         That means this is valid: "c 1,2 3,4 5,6" (three groups of 2)  """
         try:
-            return {
-                "m": [2],
-                "l": [2],
-                "h": [1],
-                "v": [1],
-                "c": [2, 2, 2],
-                "s": [2, 2],
-                "q": [2, 2],
-                "t": [2],
-                "a": [7],
-                "z": [0]
-            }[command.lower()]
+            return list(ARG_GROUPS[command])
         except KeyError:
             # It's not really a keyerror, it's a value error
             raise ValueError
 
     @staticmethod
-    def path_parts(string):
-        """ Given an SVG path string (the 'd' attribute of a <path> tag) return a list of parts of a path.
-        Each part is a tuple (command, args) where command is a single character string representing the command and args is a list of strings """
-        TRANS_MOVETO = {ord("M"):"L", ord("m"):"l"}
-        output = []
-        commands = "MmLlHhVvCcSsQqTtAaZz"
-        remaining = string.strip()
-        remaining = ''.join(
-            [char if char != ',' else ' ' for char in remaining])
+    def _split_path(string):
+        """ Tokenize an SVG path string, returning a list of the command letter for each segment and a flat list of all argument strings """
+        commands = []
+        args = []
         cur_command = None
-        num_args = None
-        this_args = []
-        while remaining:
-            first = remaining[0]
-            if first in commands:
-                if this_args != []:
+        num_args = 0
+        this_args = 0
+        # Single pass over the string, each match is one command, number or invalid character
+        for command, number, invalid in _PATH_TOKEN_RE.findall(string):
+            if command:
+                if this_args != 0:
                     # Started new command before previous one complete
                     raise ValueError("Invalid SVG path command sequence")
-                cur_command = first
-                num_args = SVGUtils.num_args_for_path_command(cur_command)
-                if num_args == [0]:
-                    output.append((cur_command, []))
-                remaining = remaining[1:].strip()
-                continue
-            m = re.match("^([-+]?\d+(?:\.\d)?\d*).*", remaining)
-            if not m:
+                cur_command = command
+                num_args = ARG_COUNTS[command]
+                if num_args == 0:
+                    commands.append(cur_command)
+            elif number and num_args:
+                args.append(number)
+                this_args += 1
+                if this_args == num_args:
+                    commands.append(cur_command)
+                    this_args = 0
+                    # If we get here and the current command is moveto
+                    # then we implicitly start a lineto command
+                    cur_command = _IMPLICIT_COMMANDS.get(cur_command, cur_command)
+            else:
                 raise ValueError("Invald SVG path command sequence")
-            arg = m.groups()[0]
-            this_args.append(arg)
-            remaining = remaining[len(arg):].strip()
-            if len(this_args) == sum(num_args):
-                output.append((cur_command, this_args))
-                this_args = []
-                # If we get here and the current command is moveto
-                # then we implicitly start a lineto command
-                cur_command = cur_command.translate(TRANS_MOVETO)
-        return output
+        if this_args != 0:
+            # Drop the incomplete trailing command
+            del args[-this_args:]
+        return commands, args
 
-    def path_string(parts):
-        """ Take a list in the format output by path_parts() and turn it into an SVG path string (the 'd' attribute of a <path> tag """
+    @staticmethod
+    def path_parts(string):
+        """ Given an SVG path string (the 'd' attribute of a <path> tag) return a list of parts of a path.
+        Each part is a tuple (command, args) where command is a single character string representing the command and args is a list of strings """
+        commands, args = SVGUtils._split_path(string)
         output = []
-        for command, args in parts:
-            argnums = SVGUtils.num_args_for_path_command(command)
-            assert len(args) == sum(argnums)
-            output.append(command)
-            arglist = []
-            for num in argnums:
-                this_args, args = args[0:num], args[num:]
-                if this_args:
-                    arglist.append(' '.join(this_args))
-            if arglist:
-                output.append(", ".join(arglist))
-        return ' '.join(output)
+        index = 0
+        for command in commands:
+            num = ARG_COUNTS[command]
+            output.append((command, args[index:index+num]))
+            index += num
+        return output
+
+    @staticmethod
+    def path_data(string):
+        """ Given an SVG path string (the 'd' attribute of a <path> tag) return a PathData object.
+        This is the compact equivalent of path_parts(), all of the other path functions accept either """
+        commands, args = SVGUtils._split_path(string)
+        return PathData(''.join(commands).encode('ascii'), map(float, args))
+
+    def path_string(parts, precision=None):
+        """ Take a PathData or a list in the format output by path_parts() and turn it into an SVG path string (the 'd' attribute of a <path> tag.
+        Coordinates are written in as few digits as read back the same, or rounded to precision decimal places if given """
+        return _as_path_data(parts).to_string(precision)
 
     def path_end_point(parts):
-        """ Find the end point of an SVG path string (the 'd' attribute of a <path> tag) returns a tuple of two floats (x, y) """
-        pos = 0, 0
-        for command, args in parts:
-            if command in ['M', 'L', 'T']:
-                pos = float(args[0]), float(args[1])
-            if command in ['m', 'l', 't']:
-                pos = pos[0] + float(args[0]), pos[1] + float(args[1])
-            if command == 'H':
-                pos = float(args[0]), pos[1]
-            if command == 'h':
-                pos = pos[0] + float(args[0]), pos[1]
-            if command == 'V':
-                pos = pos[0], float(args[0])
-            if command == 'v':
-                pos = pos[0], pos[1] + float(args[0])
-            if command == 'C':
-                pos = float(args[4]), float(args[5])
-            if command == 'c':
-                pos = pos[0] + float(args[4]), pos[1] + float(args[5])
-            if command in ['S', 'Q']:
-                pos = float(args[2]), float(args[3])
-            if command in ['s', 'q']:
-                pos = pos[0] + float(args[2]), pos[1] + float(args[3])
-            if command == 'A':
-                pos = float(args[5]), float(args[6])
-            if command == 'a':
-                pos = pos[0] + float(args[5]), pos[1] + float(args[6])
-        return pos
+        """ Find the end point of a PathData or a list in the format output by path_parts(), returns a tuple of two floats (x, y) """
+        cursor = PathCursor()
+        cursor.advance_path(_as_path_data(parts))
+        return cursor.point()
 
     def path_to_point(parts, point):
         """
-        Take a list of path parts (in the same format as output by path_parts()) and produce a new path with the same types of segments where all points are collapsed into the point specified in point (a tuple of two floats (x, y))
+        Take a PathData or a list of path parts (in the same format as output by path_parts()) and produce a new path with the same types of segments where all points are collapsed into the point specified in point (a tuple of two floats (x, y))
+        The new path is of the same type as the path given
          """
-        newpath = []
-        point = str(point[0]), str(point[1])
-        for command, args in parts:
-            if command in ['M', 'L', 'T']:
-                newpath.append((command, list(point)))
-            if command in ['m', 'l', 't']:
-                newpath.append((command, ['0', '0']))
-            if command == 'H':
-                newpath.append((command, point[0]))
-            if command == 'V':
-                newpath.append((command, point[1]))
-            if command in ['h', 'v']:
-                newpath.append((command, ['0']))
-            if command == 'C':
-                newpath.append(
-                    (command, list(point) + list(point) + list(point)))
-            if command == 'c':
-                newpath.append((command, ['0', '0', '0', '0', '0', '0']))
-            if command in ['S', 'Q']:
-                newpath.append((command, list(point) + list(point)))
-            if command in ['s', 'q']:
-                newpath.append((command, ['0', '0', '0', '0',]))
-            if command == 'A':
-                newpath.append((command, args[0:4+1] + list(point)))
-            if command == 'a':
-                newpath.append((command, args[0:4+1] + ['0', '0']))
-        return newpath
-
-    def match_paths(l1, l2):
-        o1, o2 = [], [] # Outputs
-        i1, i2 = 0, 0 # Current index
-        si1, si2 = 0, 0 # For checking we advanced
+        path = _as_path_data(parts)
+        if NumPyPaths.use_for(len(path)):
+            newpath = NumPyPaths.path_to_point(path, point)
+            if isinstance(parts, PathData):
+                return newpath
+            return newpath.to_parts()
+        point_x, point_y = float(point[0]), float(point[1])
+        newpath = PathData()
+        coords = path.coords
+        index = 0
+        for code in path.commands:
+            _collapse_segment(newpath, code, coords, index, point_x, point_y)
+            index += _CODE_ARG_COUNTS[code]
+        if isinstance(parts, PathData):
+            return newpath
+        return newpath.to_parts()
 
-        def add_paths(o, num, io):
-            """ Add `num` path parts to the path `o` starting at index `io`, returning the new index """
-            for i in range(num):
-                o.append(io)
-                io += 1
-            return io
-
-        def add_gaps(o, num):
-            """ add `num` gaps to the path `o` """
-            o.extend([-1] * num)
+    def match_paths(l1, l2, cost=None):
+        """
+        Align two sequences (e.g. of path commands) for tweening. Returns two lists of equal length,
+        o1 and o2, of indicies into l1 and l2 respectively. Every index of each input appears once, in order,
+        and -1 marks a gap where the item at the same position in the other list has nothing to pair with.
 
-        try:
-            while True:
-                si1, si2 = i1, i2
-                if l1[i1] == l2[i2]:
-                    # Both same, add this path to both
-                    i1 = add_paths(o1, 1, i1)
-                    i2 = add_paths(o2, 1, i2)
-                else:
-                    # Different, get remaining path slice
-                    r1 = l1[i1:]
-                    r2 = l2[i2:]
-                    if l1[i1] not in r2:
-                        # If this isn't in the other one, just add to path now
-                        i1 = add_paths(o1, 1, i1)
-                        add_gaps(o2, 1)
-                    elif l2[i2] not in r1:
-                        # Same as above
-                        i2 = add_paths(o2, 1, i2)
-                        add_gaps(o1, 1)
-                    else:
-                        # Otherwise, pick the shortest distance to the next matching path part
-                        d1 = l2[i2:].index(l1[i1])
-                        d2 = l1[i1:].index(l2[i2])
-                        if d1 < d2:
-                            add_gaps(o1, 1)
-                            i2 = add_paths(o2, 1, i2)
-                        else:
-                            add_gaps(o2, 1)
-                            i1 = add_paths(o1, 1, i1)
-                assert (i1 != si1) or (i2 != si2)
-        except IndexError:
-            # Hit end of one of the strings, stop
-            pass
-        # Keep adding until each one is done (one of these loops won't do anything)
-        while i1 < len(l1):
-            i1 = add_paths(o1, 1, i1)
-            add_gaps(o2, 1)
-        while i2 < len(l2):
-            i2 = add_paths(o2, 1, i2)
-            add_gaps(o1, 1)
+        Without a cost function, items are only paired when they are equal and the alignment has the fewest
+        possible gaps (Myers' O(ND) diff, in linear space).
+        cost(item1, item2) may be given to also pair items that differ, it returns the cost of pairing them
+        where leaving an item unpaired costs 1 (so pairing two unequal items is only worth it for costs below 2).
+        This takes O(len(l1) * len(l2)) time (Hirschberg's algorithm, in linear space).
+        """
+        if cost is None:
+            pairs = _diff_pairs(l1, l2)
+        else:
+            pairs = _cost_pairs(l1, l2, cost)
+        o1, o2 = [], [] # Outputs
+        i1, i2 = 0, 0 # Current index
+        for p1, p2 in itertools.chain(pairs, [(len(l1), len(l2))]):
+            # Everything between the pairs has nothing to pair with
+            o1.extend(range(i1, p1))
+            o2.extend([-1] * (p1 - i1))
+            o1.extend([-1] * (p2 - i2))
+            o2.extend(range(i2, p2))
+            o1.append(p1)
+            o2.append(p2)
+            i1, i2 = p1 + 1, p2 + 1
+        # Remove the end marker
+        o1.pop()
+        o2.pop()
         assert len(o1) == len(o2)
         return o1, o2
 
     def _indicies_to_path(indicies, path, fallback_indicies, fallback_path):
-        output = []
+        if NumPyPaths.use_for(len(indicies)):
+            return NumPyPaths.indicies_to_path(indicies, path, fallback_indicies, fallback_path)
+        output = PathData()
+        # Track the end of the output so far, so gaps can be collapsed onto it
+        cursor = PathCursor()
+        offsets = path.offsets()
+        fallback_offsets = fallback_path.offsets()
         for index, fallback_index in zip(indicies, fallback_indicies):
             if index >= 0:
-                part = path[index]
-                output.append(part)
+                code = path.commands[index]
+                offset = offsets[index]
+                args = path.coords[offset:offset+_CODE_ARG_COUNTS[code]]
+                output.append(chr(code), args)
+                cursor.advance(code, args)
             else:
                 assert fallback_index >= 0
-                cur_end = SVGUtils.path_end_point(output)
-                otherpath = fallback_path[fallback_index]
-                output.extend(SVGUtils.path_to_point([otherpath], cur_end))
+                code = fallback_path.commands[fallback_index]
+                start = len(output.coords)
+                if _collapse_segment(output, code, fallback_path.coords, fallback_offsets[fallback_index], cursor.x, cursor.y):
+                    cursor.advance(code, output.coords[start:])
         return output
 
-    def tweenable_paths(path1, path2):
-        p1sequence = list(command for command, _ in path1)
-        p2sequence = list(command for command, _ in path2)
-        p1indicies, p2indicies = SVGUtils.match_paths(p1sequence, p2sequence)
-        p1out = SVGUtils._indicies_to_path(p1indicies, path1, p2indicies, path2)
-        p2out = SVGUtils._indicies_to_path(p2indicies, path2, p1indicies, path1)
-        return p1out, p2out
+    def tweenable_paths(path1, path2, stats=NULL_STATS):
+        """ Take two paths (PathData or lists in the format output by path_parts()) and return two paths with matching sequences of commands
+        that can be tweened between each other. Missing segments are filled with segments collapsed to a single point.
+        The paths returned are of the same type as the paths given. The time taken and the number of gaps filled are reported to stats """
+        with stats.timer("path_alignment"):
+            p1data = _as_path_data(path1)
+            p2data = _as_path_data(path2)
+            p1indicies, p2indicies = SVGUtils.match_paths(p1data.command_string(), p2data.command_string())
+            p1out = SVGUtils._indicies_to_path(p1indicies, p1data, p2indicies, p2data)
+            p2out = SVGUtils._indicies_to_path(p2indicies, p2data, p1indicies, p1data)
+        stats.count("paths")
+        stats.count("path_gaps", 2 * len(p1indicies) - len(p1data) - len(p2data))
+        if isinstance(path1, PathData):
+            return p1out, p2out
+        return p1out.to_parts(), p2out.to_parts()
+
+
+# Number of edits the middle snake search will look through before settling for a near-optimal split
+_DIFF_COST_LIMIT = 64
+
+
+def _diff_pairs(l1, l2):
+    """ Return a list of (index1, index2) tuples for the items of the longest common subsequence of l1 and l2 """
+    pairs = []
+    _diff_range(l1, 0, len(l1), l2, 0, len(l2), pairs)
+    return pairs
+
+
+def _diff_range(l1, lo1, hi1, l2, lo2, hi2, pairs):
+    """ Add the pairs of the longest common subsequence of l1[lo1:hi1] and l2[lo2:hi2] to pairs """
+    # Strip common prefix and suffix
+    while lo1 < hi1 and lo2 < hi2 and l1[lo1] == l2[lo2]:
+        pairs.append((lo1, lo2))
+        lo1 += 1
+        lo2 += 1
+    suffix_length = 0
+    while lo1 < hi1 - suffix_length and lo2 < hi2 - suffix_length and \
+            l1[hi1 - 1 - suffix_length] == l2[hi2 - 1 - suffix_length]:
+        suffix_length += 1
+    hi1 -= suffix_length
+    hi2 -= suffix_length
+    if lo1 < hi1 and lo2 < hi2:
+        # Both ranges have items left that need at least two edits, split them
+        # around the middle snake, each half needs at most half of the edits
+        x0, y0, x1, y1 = _middle_snake(l1, lo1, hi1, l2, lo2, hi2)
+        _diff_range(l1, lo1, x0, l2, lo2, y0, pairs)
+        pairs.extend(zip(range(x0, x1), range(y0, y1)))
+        _diff_range(l1, x1, hi1, l2, y1, hi2, pairs)
+    pairs.extend(zip(range(hi1, hi1 + suffix_length), range(hi2, hi2 + suffix_length)))
+
+
+def _middle_snake(l1, lo1, hi1, l2, lo2, hi2):
+    """
+    Find the middle snake of the shortest edit script between l1[lo1:hi1] and l2[lo2:hi2].
+    Returns (x0, y0, x1, y1) where l1[x0:x1] and l2[y0:y1] are equal and lie on an optimal alignment,
+    the edit scripts either side of the snake are each at most half the length of the full one.
+    The ranges must not start or end with equal items (so there is at least one edit each side)
+
+    Very different sequences would take O(N^2) time to search in full, so once the search has gone further
+    than _DIFF_COST_LIMIT edits (or the square root of the total length, if greater) it stops and splits
+    at the furthest point reached instead, giving an alignment that is close to, but not always, optimal.
+    """
+    n = hi1 - lo1
+    m = hi2 - lo2
+    delta = n - m
+    odd = delta & 1
+    max_d = min((n + m + 1) // 2, max(_DIFF_COST_LIMIT, int((n + m) ** 0.5)))
+    offset = max_d + 1
+    # Furthest x reached on each diagonal k = x - y, indexed by k + offset.
+    # Backward paths are searched on the reversed sequences
+    forward = [0] * (2 * offset + 1)
+    backward = [0] * (2 * offset + 1)
+    for d in range(max_d + 1):
+        for k in range(-d, d + 1, 2):
+            if k == -d or (k != d and forward[offset + k - 1] < forward[offset + k + 1]):
+                x = forward[offset + k + 1]
+            else:
+                x = forward[offset + k - 1] + 1
+            y = x - k
+            start_x, start_y = x, y
+            while x < n and y < m and l1[lo1 + x] == l2[lo2 + y]:
+                x += 1
+                y += 1
+            forward[offset + k] = x
+            if odd and -(d - 1) <= delta - k <= d - 1 and x + backward[offset + delta - k] >= n:
+                return lo1 + start_x, lo2 + start_y, lo1 + x, lo2 + y
+        for k in range(-d, d + 1, 2):
+            if k == -d or (k != d and backward[offset + k - 1] < backward[offset + k + 1]):
+                x = backward[offset + k + 1]
+            else:
+                x = backward[offset + k - 1] + 1
+            y = x - k
+            start_x, start_y = x, y
+            while x < n and y < m and l1[hi1 - 1 - x] == l2[hi2 - 1 - y]:
+                x += 1
+                y += 1
+            backward[offset + k] = x
+            if not odd and -d <= delta - k <= d and x + forward[offset + delta - k] >= n:
+                return hi1 - x, hi2 - y, hi1 - start_x, hi2 - start_y
+    # Too expensive, split at whichever of the forward or backward paths got furthest
+    def furthest(furthest_x):
+        """ Return the (x, y) point within the ranges that is furthest along the search """
+        points = ((furthest_x[offset + k], furthest_x[offset + k] - k) for k in range(-max_d, max_d + 1, 2))
+        return max((point for point in points if point[0] <= n and 0 <= point[1] <= m), key=sum)
+    forward_x, forward_y = furthest(forward)
+    backward_x, backward_y = furthest(backward)
+    if forward_x + forward_y >= backward_x + backward_y:
+        return lo1 + forward_x, lo2 + forward_y, lo1 + forward_x, lo2 + forward_y
+    return hi1 - backward_x, hi2 - backward_y, hi1 - backward_x, hi2 - backward_y
+
+
+def _cost_pairs(l1, l2, cost):
+    """ Return a list of (index1, index2) tuples of the items of l1 and l2 that are paired by the cheapest alignment, see match_paths() """
+    pairs = []
+    _cost_range(l1, 0, len(l1), l2, 0, len(l2), cost, pairs)
+    return pairs
+
+
+def _cost_range(l1, lo1, hi1, l2, lo2, hi2, cost, pairs):
+    """ Add the pairs of the cheapest alignment of l1[lo1:hi1] and l2[lo2:hi2] to pairs """
+    if hi1 - lo1 == 0 or hi2 - lo2 == 0:
+        return
+    if hi1 - lo1 == 1:
+        # Pair the single item with the cheapest item of the other list, if that beats leaving it out
+        best_cost, best_index = min((cost(l1[lo1], l2[index]), index) for index in range(lo2, hi2))
+        if best_cost < 2:
+            pairs.append((lo1, best_index))
+        return
+    # Find where the best alignment crosses the middle row, from the costs
+    # of aligning the top half forwards and the bottom half backwards
+    mid = (lo1 + hi1) // 2
+    top = _cost_row(l1, range(lo1, mid), l2, range(lo2, hi2), cost)
+    bottom = _cost_row(l1, range(hi1 - 1, mid - 1, -1), l2, range(hi2 - 1, lo2 - 1, -1), cost)
+    split = min(range(hi2 - lo2 + 1), key=lambda index: top[index] + bottom[hi2 - lo2 - index])
+    _cost_range(l1, lo1, mid, l2, lo2, lo2 + split, cost, pairs)
+    _cost_range(l1, mid, hi1, l2, lo2 + split, hi2, cost, pairs)
+
+
+def _cost_row(l1, range1, l2, range2, cost):
+    """ Return the costs of aligning the items of l1 in range1 with each prefix of the items of l2 in range2 """
+    previous = list(range(len(range2) + 1))
+    for row, index1 in enumerate(range1, 1):
+        item1 = l1[index1]
+        current = [row]
+        for column, index2 in enumerate(range2):
+            current.append(min(previous[column] + cost(item1, l2[index2]),
+                               previous[column + 1] + 1,
+                               current[column] + 1))
+        previous = current
+    return previous
+
+
+def _as_path_data(parts):
+    """ Return parts as a PathData, converting it from a list of (command, args) tuples if needed """
+    if isinstance(parts, PathData):
+        return parts
+    return PathData.from_parts(parts)
+
+
+def _collapse_segment(path, code, coords, index, point_x, point_y):
+    """
+    Append the segment with command code `code` and arguments starting at coords[index] to path,
+    collapsed into the point (point_x, point_y). Returns False if the segment is dropped instead
+    """
+    collapse = _COLLAPSE_ARGS[code]
+    if collapse is None:
+        return False
+    new_args = []
+    for arg_index, kind in enumerate(collapse):
+        if kind == 'x':
+            new_args.append(point_x)
+        elif kind == 'y':
+            new_args.append(point_y)
+        elif kind == '0':
+            new_args.append(0.0)
+        else:
+            new_args.append(coords[index + arg_index])
+    path.append(chr(code), new_args)
+    return True
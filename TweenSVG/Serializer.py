@@ -0,0 +1,167 @@
+"""
+    Writes tweens out as SVG files
+    Gives the same bytes as ElementTree.write() with an XML declaration and
+    UTF-8 encoding, but namespaces are collected while the tree is written
+    rather than in a separate walk over the tree.
+"""
+from xml.etree import ElementTree as ElementTreeModule
+from xml.etree.ElementTree import Comment, ProcessingInstruction
+
+from TweenSVG.Stats import NULL_STATS
+
+XML_DECLARATION = "<?xml version='1.0' encoding='utf-8'?>\n"
+
+
+def _escape_cdata(text):
+    if "&" in text:
+        text = text.replace("&", "&amp;")
+    if "<" in text:
+        text = text.replace("<", "&lt;")
+    if ">" in text:
+        text = text.replace(">", "&gt;")
+    return text
+
+# Characters that need escaping in attribute values, in the order ElementTree escapes them
+_ATTRIB_ESCAPES = (("&", "&amp;"), ("<", "&lt;"), (">", "&gt;"), ("\"", "&quot;"),
+                   ("\r", "&#13;"), ("\n", "&#10;"), ("\t", "&#09;"))
+
+def _escape_attrib(text):
+    for char, entity in _ATTRIB_ESCAPES:
+        if char in text:
+            text = text.replace(char, entity)
+    return text
+
+
+class Serializer():
+    """
+        Serializes an ElementTree (or Element) to UTF-8 encoded bytes.
+        If indent is given, elements are written one per line indented by
+        that string, as if ElementTree.indent() had been used, but the tree
+        itself is not changed (tweens share elements with their keyframes).
+        If stats is a Stats object, the time taken and bytes written are recorded in it.
+    """
+
+    def __init__(self, indent=None, xml_declaration=True, stats=None):
+        self.indent = indent
+        self.xml_declaration = xml_declaration
+        self.stats = stats if stats is not None else NULL_STATS
+
+    def tostring(self, tree):
+        """ Return the serialized tree as bytes """
+        with self.stats.timer("serialize"):
+            return "".join(self._chunks(tree)).encode("utf-8", "xmlcharrefreplace")
+
+    def write(self, tree, file):
+        """
+            Write the serialized tree to file, which may be a filename, a
+            binary file object or a socket
+        """
+        data = self.tostring(tree)
+        self.stats.count("bytes_written", len(data))
+        if hasattr(file, "sendall"):
+            file.sendall(data)
+        elif hasattr(file, "write"):
+            file.write(data)
+        else:
+            with open(file, "wb") as output_file:
+                output_file.write(data)
+
+    def _chunks(self, tree):
+        root = tree.getroot() if hasattr(tree, "getroot") else tree
+        chunks = []
+        append = chunks.append
+        if self.xml_declaration:
+            append(XML_DECLARATION)
+
+        qnames = {}
+        namespaces = {} # uri: prefix
+        namespace_map = ElementTreeModule._namespace_map
+        def qname(name):
+            # As ElementTree, namespaces without a registered prefix are
+            # numbered in the order they are first used
+            if name[:1] == "{":
+                uri, local = name[1:].rsplit("}", 1)
+                prefix = namespaces.get(uri)
+                if prefix is None:
+                    prefix = namespace_map.get(uri)
+                    if prefix is None:
+                        prefix = "ns%d" % (len(namespaces))
+                    if prefix != "xml":
+                        namespaces[uri] = prefix
+                qualified = "%s:%s" % (prefix, local) if prefix else local
+            else:
+                qualified = name
+            qnames[name] = qualified
+            return qualified
+
+        # Attribute values repeat a lot in tweens (animation timings, ids of
+        # the sync animations, unchanged styles) so escape each one only once
+        escaped_values = {}
+        def escaped_value(value):
+            escaped = escaped_values[value] = _escape_attrib(value)
+            return escaped
+
+        indent = self.indent
+        indentations = ["\n"]
+        root_start = None # Index of the start tag of the root, namespaces are declared there
+        # Items are either a string to output or a tuple of (element, indent level, tail)
+        stack = [(root, 0, root.tail)]
+        pop = stack.pop
+        push = stack.append
+        while stack:
+            item = pop()
+            if item.__class__ is str:
+                append(item)
+                continue
+            element, level, tail = item
+            tag = element.tag
+            text = element.text
+            if tag is Comment:
+                append("<!--%s-->" % (text))
+            elif tag is ProcessingInstruction:
+                append("<?%s?>" % (text))
+            else:
+                if tag is not None:
+                    tag = qnames.get(tag) or qname(tag)
+                    if element is root:
+                        root_start = len(chunks)
+                    append("<" + tag)
+                    for key, value in element.items():
+                        append(" %s=\"%s\"" % (qnames.get(key) or qname(key),
+                                                escaped_values.get(value) or escaped_value(value)))
+                num_children = len(element)
+                if text or num_children or tag is None:
+                    if num_children and indent is not None:
+                        while len(indentations) < level + 2:
+                            indentations.append(indentations[-1] + indent)
+                        if not text or not text.strip():
+                            text = indentations[level + 1]
+                    if tag is not None:
+                        append(">")
+                    if text:
+                        append(_escape_cdata(text))
+                    # The end tag and tail are written after the children
+                    if tail:
+                        push(_escape_cdata(tail))
+                    if tag is not None:
+                        push("</" + tag + ">")
+                    child_level = level + 1
+                    last = num_children - 1
+                    for index in range(last, -1, -1):
+                        child = element[index]
+                        child_tail = child.tail
+                        if indent is not None and (not child_tail or not child_tail.strip()):
+                            child_tail = indentations[level if index == last else child_level]
+                        push((child, child_level, child_tail))
+                    continue
+                append(" />")
+            if tail:
+                append(_escape_cdata(tail))
+
+        if namespaces and root_start is not None:
+            # Sorted by prefix, as ElementTree does
+            declarations = "".join(
+                " xmlns%s=\"%s\"" % (":" + prefix if prefix else "", _escape_attrib(uri))
+                for uri, prefix in sorted(namespaces.items(), key=lambda item: item[1]))
+            chunks[root_start] += declarations
+        return chunks
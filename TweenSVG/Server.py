@@ -0,0 +1,245 @@
+"""
+    A long running tween server, see TweenSVG.Client for its client
+    Starting Python and parsing keyframes costs more than tweening them when
+    the same keyframes are tweened over and over, e.g. by a build system.
+    TweenServer runs jobs sent to it over a Unix socket or a TCP port on a
+    loopback address and keeps parsed keyframes, with their indexes and
+    hashes, parsed attribute values and tweens in memory between jobs.
+
+    A job can read any file and write tweens into any directory that the
+    user running the server can, so only that user may send jobs. A Unix
+    socket is created with permissions that let only them connect to it.
+    Any local user can connect to a TCP port, so a TCP server needs a token
+    file: the server writes a random token to it, readable only by its user,
+    and every job must carry that token.
+
+    Jobs and responses are JSON objects, one per line. A job has "files", a
+    list of keyframe filenames, and optionally:
+        "options": Tweener options (duration, group_matching, fadein_late,
+                   fadeout_early, compact, strip_metadata)
+        "output_dir": write the tweens there as tween0000.svg, tween0001.svg, ...
+        "stats": true to return the timings and counts of the job
+        "token": the token from the server's token file, if it has one
+    The response has "ok" and either "error", or "written" (the filenames
+    written) or "tweens" (the serialized tweens, if there is no output_dir),
+    and "stats" if asked for.
+"""
+import hmac
+import ipaddress
+import json
+import os
+import secrets
+import socket
+import socketserver
+import stat
+import sys
+
+from TweenSVG.Tweener import Tweener
+from TweenSVG.Serializer import Serializer
+from TweenSVG.Cache import TweenCache, cached_tween_bytes
+from TweenSVG.Memo import AttributeMemo, LRUMemo
+from TweenSVG.Stats import Stats, NULL_STATS
+from TweenSVG.Client import parse_address, _connect
+
+# Default limits on the keyframes and on the total size of the tweens kept between jobs
+DEFAULT_MAX_KEYFRAMES = 256
+DEFAULT_MAX_TWEEN_BYTES = 256 * 1024 * 1024
+
+_OPTIONS = ("duration", "group_matching", "fadein_late", "fadeout_early", "compact", "strip_metadata")
+
+
+class _MemoryCache():
+    """ Has the same functions as TweenCache, for tweens kept in memory """
+    key = TweenCache.key
+
+    def __init__(self, max_bytes):
+        self._tweens = LRUMemo(max_entries=sys.maxsize, max_chars=max_bytes)
+
+    def __contains__(self, key):
+        return self._tweens.get(key) is not None
+
+    def get(self, key):
+        return self._tweens.get(key)
+
+    def put(self, key, data):
+        self._tweens.put(key, data, len(data))
+
+
+class _WarmTweener(Tweener):
+    """ A Tweener that takes keyframes from those kept by a TweenServer """
+
+    def __init__(self, server, **options):
+        Tweener.__init__(self, memo=server.memo, **options)
+        self.server = server
+
+    def _parse_keyframe(self, source):
+        return self.server._keyframe(self, source)
+
+    def _release_keyframe(self, keyframe):
+        # Kept with its indexes and hashes for later jobs, the server bounds how many
+        pass
+
+
+class _JobHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        line = self.rfile.readline()
+        try:
+            response = self.server.tween_server.run_job(json.loads(line.decode("utf-8")))
+        except ValueError as error:
+            response = {"ok": False, "error": "Invalid job: %s" % (error)}
+        self.wfile.write(json.dumps(response).encode("utf-8") + b"\n")
+
+
+class _UnixServer(socketserver.UnixStreamServer):
+    def server_bind(self):
+        # Jobs can read and write any file the server can, so only its user may connect
+        umask = os.umask(0o177)
+        try:
+            socketserver.UnixStreamServer.server_bind(self)
+        finally:
+            os.umask(umask)
+
+
+class _TCPServer(socketserver.TCPServer):
+    allow_reuse_address = True
+
+
+class TweenServer():
+    """
+        Runs tween jobs, one at a time, for clients connecting to address
+        (see parse_address()). Keyframes are kept by their filename and
+        modification time, up to max_keyframes of them, and tweens are kept
+        up to max_tween_bytes in total. A TCP address needs a token_file,
+        which is written with a new token that jobs must carry. A Unix
+        socket may have one too.
+    """
+
+    def __init__(self, address, max_keyframes=DEFAULT_MAX_KEYFRAMES, max_tween_bytes=DEFAULT_MAX_TWEEN_BYTES, token_file=None):
+        self.memo = AttributeMemo()
+        self._keyframes = LRUMemo(max_entries=max_keyframes)
+        self._tweens = _MemoryCache(max_tween_bytes)
+        self.address = parse_address(address)
+        if isinstance(self.address, tuple):
+            _check_loopback(self.address)
+            if token_file is None:
+                raise ValueError("A tween server on a TCP port needs a token file")
+            self._server = _TCPServer(self.address, _JobHandler)
+            # The port actually listened on, if it was 0
+            self.address = self._server.server_address[:2]
+        else:
+            _remove_stale_socket(self.address)
+            self._server = _UnixServer(self.address, _JobHandler)
+        self._server.tween_server = self
+        self._token = None if token_file is None else _write_token(token_file)
+
+    def serve_forever(self):
+        self._server.serve_forever()
+
+    def shutdown(self):
+        """ Stop serve_forever(), which must be running in another thread """
+        self._server.shutdown()
+
+    def server_close(self):
+        self._server.server_close()
+        if not isinstance(self.address, tuple):
+            try:
+                os.unlink(self.address)
+            except FileNotFoundError:
+                pass
+
+    def _keyframe(self, tweener, filename):
+        """ Return the Keyframe of a file, parsing it only if it has changed since it was last parsed """
+        status = os.stat(filename)
+        key = (os.path.abspath(filename), status.st_mtime_ns, status.st_size,
+               tweener.options["compact"], tweener.options["strip_metadata"])
+        keyframe = self._keyframes.get(key)
+        if keyframe is None:
+            keyframe = Tweener._parse_keyframe(tweener, filename)
+            self._keyframes.put(key, keyframe, 1)
+        else:
+            tweener.stats.count("warm_keyframes")
+        return keyframe
+
+    def run_job(self, job):
+        """ Run a job, given as a dict, and return the response dict """
+        if self._token is not None:
+            token = job.get("token", None) if isinstance(job, dict) else None
+            if not isinstance(token, str) or not hmac.compare_digest(token, self._token):
+                return {"ok": False, "error": "Missing or wrong token"}
+        if (not isinstance(job, dict) or not isinstance(job.get("files", None), list)
+                or not all(isinstance(filename, str) for filename in job["files"])):
+            return {"ok": False, "error": "A job must have a list of files"}
+        options = job.get("options", {})
+        if not isinstance(options, dict):
+            return {"ok": False, "error": "Job options must be an object"}
+        if not isinstance(job.get("output_dir", ""), str):
+            return {"ok": False, "error": "Job output_dir must be a string"}
+        unknown = set(options) - set(_OPTIONS)
+        if unknown:
+            return {"ok": False, "error": "Unknown options: %s" % (", ".join(sorted(unknown)))}
+        files = job["files"]
+        if len(files) < 2:
+            return {"ok": False, "error": "Specify at least two keyframes"}
+        stats = Stats() if job.get("stats", False) else None
+        tweener = _WarmTweener(self, stats=stats, **options)
+        self.memo.stats = tweener.stats
+        output_dir = job.get("output_dir", None)
+        response = {"ok": True}
+        try:
+            tweens = cached_tween_bytes(tweener, files, self._tweens, Serializer(stats=stats))
+            if output_dir is None:
+                response["tweens"] = [data.decode("utf-8") for data in tweens]
+            else:
+                response["written"] = written = []
+                for count, data in enumerate(tweens):
+                    filename = os.path.join(output_dir, "tween%04d.svg" % (count))
+                    with open(filename, "wb") as tween_file:
+                        tween_file.write(data)
+                    tweener.stats.count("bytes_written", len(data))
+                    written.append(filename)
+        except Exception as error:
+            # Reported to the client, the server carries on with the next job
+            return {"ok": False, "error": "%s: %s" % (type(error).__name__, error)}
+        finally:
+            self.memo.stats = NULL_STATS
+        if stats is not None:
+            response["stats"] = stats.as_dict()
+        return response
+
+
+def _write_token(token_file):
+    """ Write a new random token to token_file, readable only by this user, and return it """
+    token = secrets.token_hex(32)
+    descriptor = os.open(token_file, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with os.fdopen(descriptor, "w") as token_output:
+        # The file may have been there already, with other permissions
+        os.fchmod(descriptor, 0o600)
+        token_output.write(token + "\n")
+    return token
+
+
+def _check_loopback(address):
+    """ Raise ValueError unless every address that the host of a TCP address resolves to is a loopback address """
+    host, port = address
+    try:
+        infos = socket.getaddrinfo(host, port, type=socket.SOCK_STREAM)
+    except socket.gaierror as error:
+        raise ValueError("Can't resolve tween server host %r: %s" % (host, error))
+    for info in infos:
+        # The scope of IPv6 addresses, e.g. "%lo", is dropped
+        if not ipaddress.ip_address(info[4][0].partition("%")[0]).is_loopback:
+            raise ValueError("Tween server must listen on a loopback address, not %r" % (host))
+
+
+def _remove_stale_socket(path):
+    """ Remove a Unix socket left by a server that has stopped, so that a new one can listen there """
+    try:
+        if not stat.S_ISSOCK(os.stat(path).st_mode):
+            return
+    except FileNotFoundError:
+        return
+    try:
+        with _connect(path):
+            pass
+    except ConnectionRefusedError:
+        os.unlink(path)
@@ -0,0 +1,96 @@
+"""
+    Instrumentation for tweening
+    Tweener, AnimationGenerator, SVGUtils and Serializer report how long each
+    stage takes and count what they do into a Stats object. By default they
+    are given NULL_STATS, which ignores everything.
+"""
+from time import perf_counter
+
+
+class _StageTimer():
+    """ Context manager that adds the time spent inside it to a stage of a Stats object """
+    __slots__ = ("stats", "stage", "start")
+
+    def __init__(self, stats, stage):
+        self.stats = stats
+        self.stage = stage
+        self.start = None
+
+    def __enter__(self):
+        self.start = perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stats.add_time(self.stage, perf_counter() - self.start)
+        return False
+
+
+class Stats():
+    """
+        Wall time per stage, in seconds, and counts of events, by name.
+        Stages can be nested (e.g. path_alignment happens during tween) so
+        times do not add up to the total.
+    """
+    enabled = True
+
+    def __init__(self):
+        self.seconds = {}
+        self.counts = {}
+
+    def timer(self, stage):
+        """ Return a context manager that times a stage """
+        return _StageTimer(self, stage)
+
+    def add_time(self, stage, seconds):
+        self.seconds[stage] = self.seconds.get(stage, 0.0) + seconds
+
+    def count(self, name, num=1):
+        self.counts[name] = self.counts.get(name, 0) + num
+
+    def merge(self, other):
+        """ Add the times and counts of another Stats object, or of the dict returned by its as_dict() """
+        if isinstance(other, Stats):
+            other = other.as_dict()
+        for stage, seconds in other["seconds"].items():
+            self.add_time(stage, seconds)
+        for name, num in other["counts"].items():
+            self.count(name, num)
+
+    def as_dict(self):
+        """ Return the times and counts as a dict that can be dumped as JSON """
+        return {"seconds": dict(self.seconds), "counts": dict(self.counts)}
+
+
+class _NullTimer():
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+class NullStats():
+    """ Has the same functions as Stats but records nothing """
+    __slots__ = ()
+    enabled = False
+    _timer = _NullTimer()
+
+    def timer(self, stage):
+        return self._timer
+
+    def add_time(self, stage, seconds):
+        pass
+
+    def count(self, name, num=1):
+        pass
+
+    def merge(self, other):
+        pass
+
+    def as_dict(self):
+        return {"seconds": {}, "counts": {}}
+
+
+NULL_STATS = NullStats()
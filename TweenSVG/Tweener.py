@@ -1,33 +1,164 @@
-from copy import deepcopy
-import itertools
+from collections import deque
 from defusedxml.ElementTree import parse
+from io import BytesIO
 from xml.etree import ElementTree as ElementTreeModule
 from xml.etree.ElementTree import ElementTree # Dr Watson
 from xml.etree.ElementTree import Element
 import re
+import threading
 
-from TweenSVG.SVGUtils import SVGUtils as SVU
+from TweenSVG.SVGUtils import SVGUtils as SVU, SVG_NAMESPACE
 from TweenSVG.AnimationGenerator import AnimationGenerator as AnimGen
+from TweenSVG.Keyframe import Keyframe, KeyframeHeader
+from TweenSVG.Memo import AttributeMemo
+from TweenSVG.Node import Node, NodeTree, as_element, parse as parse_nodes
+from TweenSVG.Stats import Stats, NULL_STATS
 
-ElementTreeModule.register_namespace('', "http://www.w3.org/2000/svg")
+ElementTreeModule.register_namespace('', SVG_NAMESPACE)
+
+_G = SVU.svg_tag("g")
+
+# Attributes of a Tweener that hold the dimensions of all its keyframes
+_DIMENSION_ATTRS = ("maxwidth", "maxheight", "min_vb_top", "min_vb_left",
+                    "max_vb_width", "max_vb_height", "widthunit", "heightunit")
 
 def pairwise(iterable):
-    a, b = itertools.tee(iterable)
-    next(b, None)
-    return zip(a, b)
+    # Unlike itertools.tee, which buffers items in blocks, this only keeps
+    # the previous item alive, so keyframes can be streamed through it
+    iterator = iter(iterable)
+    for previous in iterator:
+        for item in iterator:
+            yield previous, item
+            previous = item
+
+_TAGNAME_RE = re.compile(r"^(?:\{[^{]*})?(.*)$")
 
 def _tagname(tag):
-    m = re.match("^(?:\{[^{]*})?(.*)$", tag)
+    m = _TAGNAME_RE.match(tag)
     assert m, "Not a valid [namespaced] xml tag name"
     return m.groups()[0]
 
+# Memo of the process (or thread) running _tween_pair_worker
+_worker_local = threading.local()
+
+
+def _parse_tree(source, compact, strip_metadata):
+    """ Parse a keyframe with defusedxml, into a NodeTree if compact or strip_metadata """
+    if compact or strip_metadata:
+        return parse_nodes(source, strip_metadata)
+    return parse(source)
+
+
+def _tree(root):
+    return NodeTree(root) if isinstance(root, Node) else ElementTree(root)
+
+
+def _tween_pair_worker(options, dimensions, from_root, to_root, collect_stats):
+    """
+        Tween one pair of keyframes in a worker process, see Tweener.tweens()
+        Returns the tween and, if collect_stats, a dict of the stats of making it
+    """
+    stats = Stats() if collect_stats else NULL_STATS
+    # The memo is kept for the other pairs given to the same process or thread
+    memo = getattr(_worker_local, "memo", None)
+    if memo is None:
+        memo = _worker_local.memo = AttributeMemo()
+    memo.stats = stats
+    tweener = Tweener(stats=stats, memo=memo, **options)
+    for attr, value in zip(_DIMENSION_ATTRS, dimensions):
+        setattr(tweener, attr, value)
+    tween = tweener._tween_pair(tweener._keyframe(_tree(from_root)), tweener._keyframe(_tree(to_root)))
+    return tween, (stats.as_dict() if collect_stats else None)
+
+
+def _tween_bytes_worker(options, dimensions, from_data, to_data, collect_stats):
+    """ Same as _tween_pair_worker() but parses the two keyframes from their bytes first """
+    from_tree, to_tree = (_parse_tree(BytesIO(data), options["compact"], options["strip_metadata"])
+                          for data in (from_data, to_data))
+    return _tween_pair_worker(options, dimensions, from_tree.getroot(), to_tree.getroot(), collect_stats)
+
 
 class Tweener():
-    def __init__(self, duration="5s", group_matching=False, fadein_late=False, fadeout_early=False):
+    def __init__(self, duration="5s", group_matching=False, fadein_late=False, fadeout_early=False, workers=None, stats=None, memo=None, compact=False, strip_metadata=False, incremental=False):
+        """
+            If workers is more than 1, pairs of keyframes are tweened in
+            parallel by a pool of that many processes.
+            If stats is a Stats object, timings and counts are recorded in it.
+            Parsed attribute values are kept in memo, an AttributeMemo, which
+            may be shared with other Tweeners. By default there is one per Tweener.
+            If compact, keyframe files are parsed into NodeTrees, which take
+            less memory. strip_metadata also drops editor data from them,
+            see TweenSVG.Node.parse().
+            If incremental, tweens are kept between calls to tweens(), see there.
+        """
         #self.duration = duration
         #self.fadein_late = fadein_late
         #self.fadeout_early = fadeout_early
+        if workers is not None and workers < 1:
+            raise ValueError("workers must be at least 1")
+        self.options = {"duration": duration, "group_matching": group_matching,
+                        "fadein_late": fadein_late, "fadeout_early": fadeout_early,
+                        "compact": compact, "strip_metadata": strip_metadata}
+        self.workers = workers
+        self.incremental = incremental
+        self.stats = stats if stats is not None else NULL_STATS
+        self.memo = AttributeMemo(stats=self.stats) if memo is None else memo
         self.group_matching = group_matching
+        self._reset_dimensions()
+        self.keyframes = []
+        # Tweens already made if incremental, see tweens(). Keyed by the pair of Keyframe
+        # objects, values are the tween and the dimensions it was made with
+        self._pair_results = {}
+        self.animation_number = 0
+        self.anim_gen = AnimGen(duration, fadein_late=fadein_late, fadeout_early=fadeout_early, stats=self.stats, memo=self.memo)
+
+    def _keyframe(self, tree):
+        return Keyframe(tree, self.memo)
+
+    def add_keyframe(self, keyframe):
+        """ Add a keyframe, an ElementTree or NodeTree, to the animation. Units must match other frames """
+        keyframe = self._keyframe(keyframe)
+        self._add_dimensions(keyframe)
+        self.keyframes.append(keyframe)
+        self.stats.count("keyframes")
+
+    def replace_keyframe(self, index, keyframe):
+        """ Replace the keyframe at index with another. Units must match other frames """
+        keyframes = list(self.keyframes)
+        keyframes[index] = self._keyframe(keyframe)
+        self._set_keyframes(keyframes)
+
+    def insert_keyframe(self, index, keyframe):
+        """ Insert a keyframe before index, as list.insert(). Units must match other frames """
+        keyframes = list(self.keyframes)
+        keyframes.insert(index, self._keyframe(keyframe))
+        self._set_keyframes(keyframes)
+
+    def remove_keyframe(self, index):
+        """ Remove the keyframe at index """
+        keyframes = list(self.keyframes)
+        del keyframes[index]
+        self._set_keyframes(keyframes)
+
+    def _set_keyframes(self, keyframes):
+        """
+            Change the list of keyframes, working out the dimensions again and
+            dropping tweens of pairs that are no longer next to each other
+        """
+        dimensions = self.dimensions()
+        self._reset_dimensions()
+        try:
+            for keyframe in keyframes:
+                self._add_dimensions(keyframe)
+        except ValueError:
+            for attr, value in zip(_DIMENSION_ATTRS, dimensions):
+                setattr(self, attr, value)
+            raise
+        self.keyframes = keyframes
+        pairs = set(pairwise(keyframes))
+        self._pair_results = {pair: result for pair, result in self._pair_results.items() if pair in pairs}
+
+    def _reset_dimensions(self):
         self.maxwidth = 0
         self.maxheight = 0
         self.min_vb_top = 0
@@ -36,50 +167,63 @@ class Tweener():
         self.max_vb_height = 0
         self.widthunit = None
         self.heightunit = None
-        self.keyframes = []
-        self.animation_number = 0
-        self.anim_gen = AnimGen(duration, fadein_late=fadein_late, fadeout_early=fadeout_early)
 
-    def add_keyframe(self, keyframe):
-        """ Add a keyframe to the animation. Units must match other frames """
-        if not isinstance(keyframe, ElementTree):
-            raise TypeError("keyframe must be an ElementTree object")
-        self.keyframes.append(keyframe)
-        root_attrs = keyframe.getroot().attrib
-        if 'width' in root_attrs:
-            width, widthunit = SVU.value_unit(root_attrs['width'])
+    def dimensions(self):
+        """ Return the dimensions and viewBox that tweens are given, as a tuple """
+        return tuple(getattr(self, attr) for attr in _DIMENSION_ATTRS)
+
+    def _add_dimensions(self, keyframe):
+        """ Grow the output dimensions and viewBox to fit a keyframe. Units must match other frames """
+        if keyframe.width is not None:
+            width, widthunit = keyframe.width
             if self.widthunit is None or self.widthunit == widthunit:
                 self.widthunit = widthunit
             else:
                 raise ValueError("Mixed units in keyframe dimensions")
             self.maxwidth = max(self.maxwidth, width)
-        if 'height' in root_attrs:
-            height, heightunit = SVU.value_unit(root_attrs['height'])
+        if keyframe.height is not None:
+            height, heightunit = keyframe.height
             if self.heightunit is None or self.heightunit == heightunit:
                 self.heightunit = heightunit
             else:
                 raise ValueError("Mixed units in keyframe dimensions")
             self.maxheight = max(self.maxheight, height)
 
-        if 'viewBox' in root_attrs:
-            vb = root_attrs['viewBox']
-            left, top, width, height = SVU.viewbox_vals(vb)
+        if keyframe.viewbox is not None:
+            left, top, width, height = keyframe.viewbox
             self.min_vb_top = min(self.min_vb_top, top)
             self.min_vb_left = min(self.min_vb_left, left)
             self.max_vb_width = max(self.max_vb_width, width)
             self.max_vb_height = max(self.max_vb_height, height)
 
     def add_keyframe_from_file(self, filename):
-        self.add_keyframe(parse(filename))
+        with self.stats.timer("parse"):
+            tree = self._parse(filename)
+        self.add_keyframe(tree)
+
+    def prescan(self, sources):
+        """
+            Read only the root start tag of each of sources (filenames or
+            seekable file objects) to find the dimensions and viewBox of all
+            the tweens before they are streamed with stream_tweens()
+        """
+        with self.stats.timer("prescan"):
+            for source in sources:
+                self._add_dimensions(KeyframeHeader.read(source))
 
-    def _tween_elements(self, from_element: Element, to_element: Element, group_merge=False):
-        result_element = Element(from_element.tag, from_element.attrib)
+    def _tween_elements(self, from_kf: Keyframe, to_kf: Keyframe, from_element: Element, to_element: Element, group_merge=False):
+        # Output elements are created in the SVG namespace, keyframe
+        # elements shared with the output keep the tags they were given
+        result_element = Element(SVU.svg_tag(from_element.tag), from_element.attrib)
         result_element.text = from_element.text
         result_element.tail = from_element.tail
 
-        done_ids = []
-        merged_to_elements = []
+        stats = self.stats
+        done_ids = set()
+        merged_to_elements = set() # ids (in the python sense) of merged "to" elements
+        merge_queues = None # Unmerged "to" elements for each tag, in document order
         for sub_from_element in from_element:
+            stats.count("elements")
             sub_to_element = None
             anim_tags = []
             group_merge_next = False
@@ -89,50 +233,62 @@ class Tweener():
             if eid is None:
                 if not group_merge:
                     # Cannot tween, just fade out
-                    tweened_sub_element = deepcopy(sub_from_element)
+                    tweened_sub_element = self.anim_gen.fade_group(sub_from_element, from_element.tag)
                     anim_tags = self.anim_gen.fade_out_element(tweened_sub_element)
+                    stats.count("fade_outs")
                 else:
-                    found = False
-                    # Try to merge this with something from the "to" elements
-                    for sub_to_element in to_element:
-                        if sub_to_element.tag == sub_from_element.tag:
-                            if sub_to_element not in merged_to_elements:
-                                # Merge!
-                                from_attrs, to_attrs = self.anim_gen.attr_diff(
-                                    sub_from_element.attrib, sub_to_element.attrib)
-                                anim_tags = self.anim_gen.animate_tags(
-                                    from_attrs, to_attrs)
-                                tweened_sub_element = self._tween_elements(
-                                    sub_from_element, sub_to_element, group_merge=True)
-                                found = True
-                                merged_to_elements.append(sub_to_element)
-                                break
-                    if not found:
+                    if merge_queues is None:
+                        merge_queues = {}
+                        for maybe_sub_to_element in to_element:
+                            merge_queues.setdefault(maybe_sub_to_element.tag, deque()).append(maybe_sub_to_element)
+                    # Try to merge this with the first unmerged "to" element with the same tag
+                    queue = merge_queues.get(sub_from_element.tag, None)
+                    if queue:
+                        # Merge!
+                        sub_to_element = queue.popleft()
+                        merged_to_elements.add(id(sub_to_element))
+                        stats.count("merges")
+                        if self._same_subtree(from_kf, to_kf, sub_from_element, sub_to_element):
+                            result_element.append(as_element(sub_from_element))
+                            continue
+                        from_attrs, to_attrs = self.anim_gen.attr_diff(
+                            sub_from_element.attrib, sub_to_element.attrib)
+                        anim_tags = self.anim_gen.animate_tags(
+                            from_attrs, to_attrs,
+                            from_kf.parser(), to_kf.parser())
+                        tweened_sub_element = self._tween_elements(
+                            from_kf, to_kf, sub_from_element, sub_to_element, group_merge=True)
+                    else:
                         # Couldn't merge, just fade out...
-                        tweened_sub_element = deepcopy(sub_from_element)
+                        sub_to_element = None
+                        tweened_sub_element = self.anim_gen.fade_group(sub_from_element, from_element.tag)
                         anim_tags = self.anim_gen.fade_out_element(tweened_sub_element)
+                        stats.count("fade_outs")
             else:
-                done_ids.append(eid)
+                done_ids.add(eid)
                 if self.group_matching and _tagname(tagname) == 'g':
                     # Match children without IDs in the order they appear in the file
                     group_merge_next = True
                     pass
-                sub_to_elements = to_element.findall(sub_from_element.tag)
-                sub_to_element = None
-                for maybe_sub_to_element in sub_to_elements:
-                    if maybe_sub_to_element.attrib.get('id', None) == eid:
-                        sub_to_element = maybe_sub_to_element
+                sub_to_element = to_kf.child_by_id(to_element, sub_from_element.tag, eid)
                 if sub_to_element is None:
                     # No mathching element in from, animate fade out
                     #anim_tags = self._fade_out_animation()
-                    tweened_sub_element = deepcopy(sub_from_element)
+                    tweened_sub_element = self.anim_gen.fade_group(sub_from_element, from_element.tag)
                     anim_tags = self.anim_gen.fade_out_element(tweened_sub_element)
+                    stats.count("fade_outs")
                 else:
+                    stats.count("id_matches")
+                    if self._same_subtree(from_kf, to_kf, sub_from_element, sub_to_element):
+                        result_element.append(as_element(sub_from_element))
+                        continue
                     from_attrs, to_attrs = self.anim_gen.attr_diff(
                         sub_from_element.attrib, sub_to_element.attrib)
-                    anim_tags = self.anim_gen.animate_tags(from_attrs, to_attrs)
+                    anim_tags = self.anim_gen.animate_tags(
+                        from_attrs, to_attrs,
+                        from_kf.parser(), to_kf.parser())
                     tweened_sub_element = self._tween_elements(
-                        sub_from_element, sub_to_element, group_merge=group_merge_next)
+                        from_kf, to_kf, sub_from_element, sub_to_element, group_merge=group_merge_next)
             double_tween = False
             if _tagname(tagname) == "text":
                 # This is a text element
@@ -140,9 +296,12 @@ class Tweener():
                     # Oh no! text needs tweening
                     double_tween = True
             if double_tween:
-                # Take a copy of the tweened item
-                tweened_sub_element_2 = deepcopy(tweened_sub_element)
+                stats.count("cross_fades")
+                # Take a shallow copy of the tweened item, the children are shared
+                tweened_sub_element_2 = Element(tweened_sub_element.tag, tweened_sub_element.attrib)
+                tweened_sub_element_2.extend(tweened_sub_element)
                 tweened_sub_element_2.text = sub_to_element.text
+                tweened_sub_element_2.tail = tweened_sub_element.tail
                 # apply the animation now
                 # Also fade out the old element:
                 for anim_tag in anim_tags:
@@ -154,7 +313,7 @@ class Tweener():
                     tweened_sub_element_2.append(anim_tag)
                 anim_tags = [] # clear the animation tags, so we don't add them again later
                 # Create a group for the two cross-faded elements
-                group = Element("g")
+                group = Element(_G)
                 group.append(tweened_sub_element)
                 group.append(tweened_sub_element_2)
                 tweened_sub_element = group
@@ -166,16 +325,37 @@ class Tweener():
         for sub_to_element in to_element:
             eid = sub_to_element.attrib.get('id', None)
 
-            if ((eid is None) and group_merge and (sub_to_element not in merged_to_elements)) or (eid is not None and eid not in done_ids):
+            if ((eid is None) and group_merge and (id(sub_to_element) not in merged_to_elements)) or (eid is not None and eid not in done_ids):
                 # This is a new element, fade it in
-                fade_in_element = deepcopy(sub_to_element)
+                fade_in_element = self.anim_gen.fade_group(sub_to_element, to_element.tag)
+                stats.count("fade_ins")
                 for anim in self.anim_gen.fade_in_element(fade_in_element):
                     fade_in_element.append(anim)
                 result_element.append(fade_in_element)
         return result_element
 
-    def _tween(self, from_svg, to_svg, extras=None):
-        element = self._tween_elements(from_svg.getroot(), to_svg.getroot())
+    def _same_subtree(self, from_kf, to_kf, from_element, to_element):
+        """
+            True if from_element and to_element have identical subtrees, in
+            which case the tween of them would be a copy of from_element, so
+            from_element is shared with the output instead
+        """
+        from_hash = from_kf.subtree_hash(from_element)
+        if from_hash is None or from_hash != to_kf.subtree_hash(to_element):
+            return False
+        self.stats.count("same_subtrees")
+        return True
+
+    def _tween(self, from_kf, to_kf, extras=None):
+        element = self._tween_elements(from_kf, to_kf, from_kf.getroot(), to_kf.getroot())
+        self._set_root_dimensions(element)
+        if extras is not None:
+            for extra in extras:
+                element.append(extra)
+        result = ElementTree(element=element)
+        return result
+
+    def _set_root_dimensions(self, element):
         element.attrib['width'] = SVU.to_unit_val(
             self.maxwidth, self.widthunit)
         element.attrib['height'] = SVU.to_unit_val(
@@ -189,34 +369,126 @@ class Tweener():
                 self.min_vb_top
             ]):
             element.attrib['viewBox'] = SVU.to_viewbox_val(self.min_vb_left, self.min_vb_top, self.max_vb_width, self.max_vb_height)
-        if extras is not None:
-            for extra in extras:
-                element.append(extra)
-        result = ElementTree(element=element)
-        return result
 
-    def _namespace_fixup(self, elements):
+    def _tween_pair(self, from_kf, to_kf):
+        # Animation ids are numbered from zero in every tween so that a tween
+        # does not depend on the pairs before it or on which process made it
+        self.anim_gen.animation_number = 0
+        with self.stats.timer("tween"):
+            sync_element = self.anim_gen.sync_element()
+            tween = self._tween(from_kf, to_kf, extras=[sync_element])
+        self.stats.count("tweens")
+        return tween
+
+    def _parallel_tweens(self, pairs):
+        # Only a few pairs are queued up ahead of the one being yielded,
+        # so finished tweens don't pile up when they are used slowly
+        max_pending = 2 * self.workers
+        # Imported here as it brings in multiprocessing, which is slow to import
+        from concurrent.futures import ProcessPoolExecutor
+        executor = ProcessPoolExecutor(max_workers=self.workers)
+        def result(future):
+            tween, stats = future.result()
+            if stats is not None:
+                self.stats.merge(stats)
+            return tween
+        try:
+            pending = deque()
+            for a, b in pairs:
+                dimensions = self.dimensions()
+                pending.append(executor.submit(
+                    _tween_pair_worker, self.options, dimensions, a.getroot(), b.getroot(), self.stats.enabled))
+                if len(pending) >= max_pending:
+                    yield result(pending.popleft())
+            while pending:
+                yield result(pending.popleft())
+        finally:
+            executor.shutdown(cancel_futures=True)
+
+    def _serial_tweens(self, pairs):
+        b = None
+        for a, b in pairs:
+            tween = self._tween_pair(a, b)
+            # The pair window has moved past a, so its cached data is no longer needed
+            self._release_keyframe(a)
+            yield tween
+        if b is not None:
+            self._release_keyframe(b)
+
+    def _release_keyframe(self, keyframe):
+        """ Called once a keyframe has been tweened with the keyframes on both sides of it """
+        keyframe.evict()
+
+    def _pair_tweens(self, pairs):
+        """ Yield the tween of each of pairs, an iterable of (from, to) tuples of Keyframes """
+        if self.workers is not None and self.workers > 1:
+            return self._parallel_tweens(pairs)
+        return self._serial_tweens(pairs)
+
+    def tweens(self):
         """
-            This is workaround for a bug in ElementTree
-            Recursively prepend namespaces to all tags and attributes
+            Yield an ElementTree for each pair of consecutive keyframes, in order.
+            If the Tweener is incremental, tweens are kept and the same trees
+            are yielded again by later calls, so after a keyframe is replaced,
+            inserted or removed only the pairs it is in are tweened again. If
+            the dimensions of the animation changed, the root attributes of
+            the kept tweens are updated. Otherwise, each call tweens every
+            pair again and no tween is kept once it has been used.
+            Tweens share elements with the keyframes and with each other, so
+            must not be modified. TweenSVG.tween_svgs_from_filenames() and
+            tween_svgs_streaming() return copies that may be.
         """
-        for element in elements:
-            if not "{" in element.tag:
-                element.tag = "{http://www.w3.org/2000/svg}%s" % (element.tag)
-            replacements = {}
-            for attr in element.attrib:
-                if not "{" in attr:
-                    replacements[attr] = "{http://www.w3.org/2000/svg}%s" % (
-                        attr)
-            for replace, with_this in replacements.items():
-                element.attrib[with_this] = element.attrib[replace]
-                del element.attrib[replace]
-            self._namespace_fixup(element)
+        if not self.incremental:
+            yield from self._pair_tweens(pairwise(self.keyframes))
+            return
+        pairs = list(pairwise(self.keyframes))
+        results = self._pair_results
+        missing = [pair for pair in pairs if pair not in results]
+        made = self._pair_tweens(missing)
+        try:
+            for pair in pairs:
+                dimensions = self.dimensions()
+                if pair in results:
+                    tween, tween_dimensions = results[pair]
+                    if tween_dimensions != dimensions:
+                        self._set_root_dimensions(tween.getroot())
+                    self.stats.count("reused_tweens")
+                else:
+                    tween = next(made)
+                results[pair] = (tween, dimensions)
+                yield tween
+        finally:
+            made.close()
 
+    def load_keyframe(self, source):
+        """
+            Parse a keyframe from a filename or file object and grow the
+            dimensions to fit it, without adding it to self.keyframes
+        """
+        keyframe = self._parse_keyframe(source)
+        self._add_dimensions(keyframe)
+        self.stats.count("keyframes")
+        return keyframe
 
-    def tweens(self):
-        for a, b in pairwise(self.keyframes):
-            sync_element = self.anim_gen.sync_element()
-            tween = self._tween(a, b, extras=[sync_element])
-            self._namespace_fixup([tween.getroot()])
-            yield tween
+    def _parse_keyframe(self, source):
+        with self.stats.timer("parse"):
+            return self._keyframe(self._parse(source))
+
+    def _parse(self, source):
+        return _parse_tree(source, self.options["compact"], self.options["strip_metadata"])
+
+    def _stream_keyframes(self, sources):
+        for source in sources:
+            yield self.load_keyframe(source)
+
+    def stream_tweens(self, sources):
+        """
+            Yield an ElementTree for each pair of consecutive keyframes read
+            from sources, an iterable of filenames or file objects. Keyframes
+            are parsed as they are needed and only the current pair is kept,
+            they are not added to self.keyframes. Unless the sources have
+            been passed to prescan() first, the dimensions and viewBox of
+            each tween only fit the keyframes read so far. Tweens must not
+            be modified, see tweens().
+        """
+        yield from self._pair_tweens(pairwise(self._stream_keyframes(sources)))
@@ -1,8 +1,118 @@
+__version__ = '0.1.0a1'
 
-from TweenSVG.Tweener import Tweener
+import importlib
+import sys
+import types
 
-def tween_svgs_from_filenames(filenames, duration='5s', group_matching=False, fadeout_early=False, fadein_late=False):
-    tween = Tweener(duration=duration, group_matching=group_matching, fadein_late=fadein_late, fadeout_early=fadeout_early)
-    for filename in filenames:
-        tween.add_keyframe_from_file(filename)
-    return tween.tweens()
+# Default limit on the total size of the files in a TweenCache
+DEFAULT_MAX_BYTES = 1024 * 1024 * 1024
+
+# Names of the package and the modules they come from. Modules are only
+# imported when a name is first used, so that importing the package (e.g.
+# for tweensvg --help) does not import the tween engine
+_LAZY_NAMES = {
+    "Tweener": "TweenSVG.Tweener",
+    "Serializer": "TweenSVG.Serializer",
+    "TweenCache": "TweenSVG.Cache",
+    "cached_tween_bytes": "TweenSVG.Cache",
+    "atween_svgs": "TweenSVG.AsyncTweens",
+    "fromstring": "defusedxml.ElementTree",
+    "ElementTree": "xml.etree.ElementTree",
+}
+
+def __getattr__(name):
+    module_name = _LAZY_NAMES.get(name, None)
+    if module_name is None:
+        raise AttributeError("module %r has no attribute %r" % (__name__, name))
+    value = getattr(importlib.import_module(module_name), name)
+    setattr(sys.modules[__name__], name, value)
+    return value
+
+class _Package(types.ModuleType):
+    """
+        The package used to import the Tweener and Serializer classes from
+        their modules of the same name, so TweenSVG.Tweener was the class.
+        Importing one of those modules, which now happens only when it is
+        first used, sets the module as an attribute of the package. Only
+        for those two names, the class is set instead. The modules
+        themselves, in sys.modules, are unchanged.
+    """
+    def __setattr__(self, name, value):
+        if isinstance(value, types.ModuleType) and _LAZY_NAMES.get(name, None) == value.__name__:
+            value = getattr(value, name)
+        types.ModuleType.__setattr__(self, name, value)
+
+sys.modules[__name__].__class__ = _Package
+
+def _copy_tree(tree):
+    """
+        Return a copy of an ElementTree made by the Tweener, which shares
+        elements with its keyframes and other tweens, with none shared
+    """
+    from xml.etree.ElementTree import Element, SubElement, ElementTree
+    root = tree.getroot()
+    root_copy = Element(root.tag, root.attrib)
+    stack = [(root, root_copy)]
+    while stack:
+        element, copy = stack.pop()
+        copy.text = element.text
+        copy.tail = element.tail
+        for child in element:
+            stack.append((child, SubElement(copy, child.tag, child.attrib)))
+    return ElementTree(root_copy)
+
+def tween_svgs_from_filenames(filenames, duration='5s', group_matching=False, fadeout_early=False, fadein_late=False, workers=None, stats=None, cache_dir=None, cache_size=DEFAULT_MAX_BYTES, compact=False, strip_metadata=False):
+    """
+        Return a generator of an ElementTree for each pair of consecutive
+        keyframe files. Each tween is a tree of its own, which may be
+        modified. With a cache_dir, see tween_svg_bytes_from_filenames(),
+        the tweens are parsed back from their serialized bytes. With compact
+        or strip_metadata, keyframes are parsed into NodeTrees, see
+        TweenSVG.Node.parse().
+    """
+    from defusedxml.ElementTree import fromstring
+    from xml.etree.ElementTree import ElementTree
+    from TweenSVG.Tweener import Tweener
+    if cache_dir is not None:
+        return (ElementTree(fromstring(data)) for data in tween_svg_bytes_from_filenames(
+            filenames, duration=duration, group_matching=group_matching, fadeout_early=fadeout_early,
+            fadein_late=fadein_late, workers=workers, stats=stats, cache_dir=cache_dir, cache_size=cache_size,
+            compact=compact, strip_metadata=strip_metadata))
+    tween = Tweener(duration=duration, group_matching=group_matching, fadein_late=fadein_late, fadeout_early=fadeout_early, workers=workers, stats=stats, compact=compact, strip_metadata=strip_metadata)
+    # Only the headers are read up front, keyframes are parsed a pair at a time
+    filenames = list(filenames)
+    tween.prescan(filenames)
+    return (_copy_tree(tween_tree) for tween_tree in tween.stream_tweens(filenames))
+
+def tween_svgs_streaming(sources, duration='5s', group_matching=False, fadeout_early=False, fadein_late=False, workers=None, prescan=False, stats=None, compact=False, strip_metadata=False):
+    """
+        Like tween_svgs_from_filenames() but sources may be any iterable of
+        filenames or file objects, see Tweener.stream_tweens(). With prescan,
+        sources is read twice so must not be a one-shot iterator, and any
+        file objects must be seekable.
+    """
+    from TweenSVG.Tweener import Tweener
+    tween = Tweener(duration=duration, group_matching=group_matching, fadein_late=fadein_late, fadeout_early=fadeout_early, workers=workers, stats=stats, compact=compact, strip_metadata=strip_metadata)
+    if prescan:
+        tween.prescan(sources)
+    return (_copy_tree(tween_tree) for tween_tree in tween.stream_tweens(sources))
+
+def tween_svg_bytes_from_filenames(filenames, duration='5s', group_matching=False, fadeout_early=False, fadein_late=False, workers=None, stats=None, cache_dir=None, cache_size=DEFAULT_MAX_BYTES, compact=False, strip_metadata=False):
+    """
+        Yield the serialized bytes of each tween, as written by Serializer.
+        With a cache_dir, tweens are kept in a TweenCache of at most
+        cache_size bytes there and pairs of keyframe files that are
+        unchanged since they were cached are not parsed or tweened again.
+    """
+    from TweenSVG.Tweener import Tweener
+    from TweenSVG.Serializer import Serializer
+    from TweenSVG.Cache import TweenCache, cached_tween_bytes
+    tween = Tweener(duration=duration, group_matching=group_matching, fadein_late=fadein_late, fadeout_early=fadeout_early, workers=workers, stats=stats, compact=compact, strip_metadata=strip_metadata)
+    serializer = Serializer(stats=stats)
+    if cache_dir is not None:
+        yield from cached_tween_bytes(tween, filenames, TweenCache(cache_dir, cache_size), serializer)
+        return
+    filenames = list(filenames)
+    tween.prescan(filenames)
+    for tween_tree in tween.stream_tweens(filenames):
+        yield serializer.tostring(tween_tree)
@@ -0,0 +1,528 @@
+"""
+    Benchmarks for TweenSVG
+    Generates pairs of keyframes with a given number of elements, path
+    length, nesting depth and share of matched, added and removed elements,
+    or laid out like Graphviz output, then times each stage of tweening them.
+    Results are written as JSON so that runs from different commits can be
+    compared, see --compare.
+
+    Run with: python -m TweenSVG.bench [--quick] [--output results.json]
+
+    The stages timed are:
+        parse           parsing the serialized keyframes
+        match           matching elements between keyframes and building the
+                        output tree (everything in Tweener not counted below)
+        path_alignment  SVGUtils.tweenable_paths
+        animation       generating animation tags, less path alignment
+        serialize       Serializer.tostring on each tween
+    There is no namespace fix-up stage, output elements are created in the
+    SVG namespace.
+
+    Startup is timed too, as the time python -X importtime reports for
+    importing TweenSVG in a new interpreter. It should stay under
+    IMPORT_BUDGET, a warning is printed if it doesn't, and --compare checks
+    it against the earlier run like the cases.
+
+    --serializer compares Serializer.tostring with ElementTree.write on
+    the tweens of the keyframes in each directory of test_inputs and of a
+    large synthetic pair, instead of running the cases.
+"""
+import argparse
+import glob
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+from io import BytesIO
+from xml.etree.ElementTree import ElementTree, Element, tostring
+
+from defusedxml.ElementTree import parse
+
+from TweenSVG.Tweener import Tweener
+from TweenSVG.SVGUtils import SVGUtils
+from TweenSVG.AnimationGenerator import AnimationGenerator
+from TweenSVG.Serializer import Serializer
+
+STAGES = ("parse", "match", "path_alignment", "animation", "serialize")
+
+
+def _random_path(rng, length):
+    """ Return a random path string with length segments after the initial moveto """
+    parts = ["M%d %d" % (rng.randint(0, 500), rng.randint(0, 500))]
+    for _ in range(length):
+        command = rng.choice("LLLCQHVZ")
+        if command in "HV":
+            parts.append("%s%d" % (command, rng.randint(0, 500)))
+        elif command == "Z":
+            parts.append("Z")
+        else:
+            num = {"L": 2, "C": 6, "Q": 4}[command]
+            parts.append(command + " ".join("%.2f" % (rng.uniform(0, 500)) for _ in range(num)))
+    return " ".join(parts)
+
+
+def _edit_path(rng, path, edits):
+    """ Return a copy of a path string with some segments moved, added and removed """
+    segments = SVGUtils.path_parts(path)
+    for _ in range(edits):
+        index = rng.randrange(1, len(segments)) if len(segments) > 1 else 1
+        action = rng.random()
+        if action < 0.3 and len(segments) > 2:
+            del segments[index]
+        elif action < 0.6:
+            segments.insert(index, ("L", ["%d" % (rng.randint(0, 500)), "%d" % (rng.randint(0, 500))]))
+        elif index < len(segments):
+            command, args = segments[index]
+            segments[index] = (command, ["%.2f" % (float(arg) + rng.uniform(-5, 5)) for arg in args])
+    return SVGUtils.path_string(segments)
+
+
+def _shape(rng, eid, path_length):
+    kind = rng.choice(["path", "path", "rect", "circle"])
+    if kind == "path":
+        attrib = {"d": _random_path(rng, path_length)}
+    elif kind == "rect":
+        attrib = {"x": str(rng.randint(0, 500)), "y": str(rng.randint(0, 500)), "width": "10", "height": "10"}
+    else:
+        attrib = {"cx": str(rng.randint(0, 500)), "cy": str(rng.randint(0, 500)), "r": "5"}
+    attrib["id"] = eid
+    attrib["fill"] = rng.choice(["red", "green", "blue"])
+    return Element(kind, attrib)
+
+
+def _moved_shape(rng, element):
+    attrib = dict(element.attrib)
+    for attr in ("x", "y", "cx", "cy"):
+        if attr in attrib:
+            attrib[attr] = str(int(attrib[attr]) + rng.randint(-20, 20))
+    if "d" in attrib:
+        attrib["d"] = _edit_path(rng, attrib["d"], max(1, len(attrib["d"]) // 200))
+    if rng.random() < 0.3:
+        attrib["fill"] = rng.choice(["red", "green", "blue"])
+    return Element(element.tag, attrib)
+
+
+def _nest(leaves, places, count, depth):
+    """
+        Put leaves into a tree of groups depth levels deep, with about the
+        same number of groups under every group. places gives the position
+        of each leaf out of count, which decides its group, so that a leaf
+        is in the same group in both keyframes. Returns the top level elements.
+    """
+    if depth <= 0:
+        return list(leaves)
+    branching = max(2, int(round(count ** (1.0 / depth))))
+    top = []
+    groups = {}
+    for leaf, place in zip(leaves, places):
+        parent = None
+        path = "g"
+        size = count
+        for _ in range(depth):
+            size = -(-size // branching) # Ceiling division
+            path = "%s_%d" % (path, (place // size) % branching)
+            group = groups.get(path)
+            if group is None:
+                group = groups[path] = Element("g", {"id": path})
+                (top if parent is None else parent).append(group)
+            parent = group
+        parent.append(leaf)
+    return top
+
+
+def _svg(children, width=520, height=520):
+    svg = Element("svg", {"xmlns": "http://www.w3.org/2000/svg", "width": "%dpx" % (width),
+                          "height": "%dpx" % (height), "viewBox": "0 0 %d %d" % (width, height)})
+    svg.extend(children)
+    return ElementTree(svg)
+
+
+def shapes_keyframes(elements=100, path_length=10, depth=1, matched=80, added=10, removed=10, seed=0):
+    """
+        Return a pair of keyframes as ElementTrees. The first keyframe has
+        `elements` shapes (paths of path_length segments, rects and circles)
+        nested in groups depth deep. Of those, removed percent are not in the
+        second keyframe and the rest are, moved and with their paths edited.
+        added percent more new shapes are added to the second keyframe.
+        matched is the percentage of the kept elements whose attributes
+        change, the others are left the same.
+    """
+    rng = random.Random(seed)
+    from_shapes = [_shape(rng, "e%d" % (index), path_length) for index in range(elements)]
+    to_shapes = []
+    for element in from_shapes:
+        if rng.random() * 100 < removed:
+            continue
+        if rng.random() * 100 < matched:
+            to_shapes.append(_moved_shape(rng, element))
+        else:
+            to_shapes.append(Element(element.tag, dict(element.attrib)))
+    num_added = elements * added // 100
+    to_shapes.extend(_shape(rng, "new%d" % (index), path_length) for index in range(num_added))
+    # Elements are put in groups by their position in the first keyframe,
+    # new elements are spread evenly between the groups
+    places = {element.attrib["id"]: index for index, element in enumerate(from_shapes)}
+    to_places = [places.get(element.attrib["id"], (index * 7919) % max(1, elements))
+                 for index, element in enumerate(to_shapes)]
+    return (_svg(_nest(from_shapes, range(elements), elements, depth)),
+            _svg(_nest(to_shapes, to_places, elements, depth)))
+
+
+def _graph_svg(nodes, edges, positions):
+    width = max(x for x, y in positions.values()) + 60
+    height = max(y for x, y in positions.values()) + 60
+    svg = Element("svg", {"width": "%dpt" % (width), "height": "%dpt" % (height),
+                          "viewBox": "0.00 0.00 %d.00 %d.00" % (width, height),
+                          "xmlns": "http://www.w3.org/2000/svg"})
+    graph = Element("g", {"id": "graph0", "class": "graph",
+                          "transform": "scale(1 1) rotate(0) translate(4 %d)" % (height - 4)})
+    title = Element("title")
+    title.text = "frame"
+    graph.append(title)
+    graph.append(Element("polygon", {"fill": "white", "stroke": "transparent",
+                                     "points": "-4,4 -4,-%d %d,-%d %d,4 -4,4" % (height, width, height, width)}))
+    for node in nodes:
+        x, y = positions[node]
+        group = Element("g", {"id": "node%d" % (node), "class": "node"})
+        title = Element("title")
+        title.text = str(node)
+        label = Element("text", {"text-anchor": "middle", "x": "%.2f" % (x), "y": "%.2f" % (-y + 3.7),
+                                 "font-family": "Times,serif", "font-size": "14.00"})
+        label.text = str(node)
+        group.extend([title, Element("ellipse", {"fill": "none", "stroke": "black", "cx": "%.2f" % (x),
+                                                 "cy": "%.2f" % (-y), "rx": "27", "ry": "18"}), label])
+        graph.append(group)
+    for start, end in edges:
+        (x1, y1), (x2, y2) = positions[start], positions[end]
+        group = Element("g", {"id": "edge_%d_%d" % (start, end), "class": "edge"})
+        title = Element("title")
+        title.text = "%d->%d" % (start, end)
+        # A spline of a few cubic segments, like dot draws
+        segments = max(1, int(abs(y2 - y1)) // 72)
+        points = ["M%.2f,%.2f" % (x1, -y1 - 18)]
+        for index in range(1, segments + 1):
+            t = index / segments
+            x, y = x1 + (x2 - x1) * t, y1 + (y2 - y1) * t
+            points.append("C%.2f,%.2f %.2f,%.2f %.2f,%.2f" % (x - 3, -y + 20, x + 3, -y + 10, x, -y))
+        group.extend([title,
+                      Element("path", {"fill": "none", "stroke": "black", "d": " ".join(points)}),
+                      Element("polygon", {"fill": "black", "stroke": "black",
+                                          "points": "%.2f,%.2f %.2f,%.2f %.2f,%.2f" % (
+                                              x2 - 3.5, -y2 + 28, x2, -y2 + 18, x2 + 3.5, -y2 + 28)})])
+        graph.append(group)
+    svg.append(graph)
+    return ElementTree(svg)
+
+
+def graph_keyframes(nodes=50, edges_per_node=1.5, added=10, removed=10, seed=0):
+    """
+        Return a pair of keyframes laid out like Graphviz dot output: ranked
+        nodes with ids node<n> joined by spline edges with ids edge_<a>_<b>.
+        In the second keyframe removed percent of the nodes (and their
+        edges) are gone, added percent more are new and the graph is laid
+        out again, so most nodes and edges move.
+    """
+    rng = random.Random(seed)
+    def layout(node_list, edge_list):
+        ranks = {}
+        for node in node_list:
+            parents = [ranks[start] for start, end in edge_list if end == node and start in ranks]
+            ranks[node] = max(parents) + 1 if parents else 0
+        positions = {}
+        columns = {}
+        for node in node_list:
+            column = columns[ranks[node]] = columns.get(ranks[node], -1) + 1
+            positions[node] = (27 + 72 * column + rng.uniform(-5, 5), 18 + 72 * ranks[node])
+        return positions
+    def random_edges(node_list):
+        edges = set()
+        for _ in range(int(len(node_list) * edges_per_node)):
+            start, end = sorted(rng.sample(node_list, 2))
+            edges.add((start, end))
+        return sorted(edges)
+    from_nodes = list(range(1, nodes + 1))
+    from_edges = random_edges(from_nodes)
+    kept = [node for node in from_nodes if rng.random() * 100 >= removed]
+    to_nodes = kept + list(range(nodes + 1, nodes + 1 + nodes * added // 100))
+    kept_edges = [(start, end) for start, end in from_edges if start in kept and end in kept]
+    new_edges = [edge for edge in random_edges(to_nodes) if edge[1] > nodes]
+    to_edges = sorted(set(kept_edges + new_edges))
+    return (_graph_svg(from_nodes, from_edges, layout(from_nodes, from_edges)),
+            _graph_svg(to_nodes, to_edges, layout(to_nodes, to_edges)))
+
+
+class _StageTimer():
+    """ Adds up the time spent in functions of the tweening engine while it is installed """
+
+    def __init__(self):
+        self.totals = dict.fromkeys(STAGES, 0.0)
+        self._patched = []
+
+    def _timed(self, func, stage, consume=False):
+        totals = self.totals
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                result = func(*args, **kwargs)
+                # Generators do their work when they are iterated
+                return list(result) if consume else result
+            finally:
+                totals[stage] += time.perf_counter() - start
+        return timed
+
+    def _patch(self, owner, name, replacement):
+        self._patched.append((owner, name, owner.__dict__[name]))
+        setattr(owner, name, replacement)
+
+    def __enter__(self):
+        self._patch(SVGUtils, "tweenable_paths",
+                    staticmethod(self._timed(SVGUtils.tweenable_paths, "path_alignment")))
+        for name in ("animate_tags", "fade_out_element", "fade_in_element"):
+            self._patch(AnimationGenerator, name,
+                        self._timed(getattr(AnimationGenerator, name), "animation", consume=True))
+        self._patch(AnimationGenerator, "sync_element",
+                    self._timed(AnimationGenerator.sync_element, "animation"))
+        return self
+
+    def __exit__(self, *exc_info):
+        for owner, name, original in reversed(self._patched):
+            setattr(owner, name, original)
+        self._patched = []
+
+
+def run_case(make_keyframes, repeat=3, options=None, **params):
+    """
+        Time tweening the keyframes returned by make_keyframes(**params) with
+        a Tweener made with options, returning the best time over repeat
+        runs for each stage
+    """
+    options = options or {}
+    documents = [tostring(keyframe.getroot()) for keyframe in make_keyframes(**params)]
+    serializer = Serializer()
+    best = None
+    for _ in range(repeat):
+        with _StageTimer() as timer:
+            start = time.perf_counter()
+            keyframes = [parse(BytesIO(document)) for document in documents]
+            parsed = time.perf_counter()
+            tweener = Tweener(**options)
+            for keyframe in keyframes:
+                tweener.add_keyframe(keyframe)
+            tweens = list(tweener.tweens())
+            tweened = time.perf_counter()
+            output_bytes = sum(len(serializer.tostring(tween)) for tween in tweens)
+            end = time.perf_counter()
+        stages = timer.totals
+        stages["parse"] = parsed - start
+        stages["serialize"] = end - tweened
+        stages["animation"] -= stages["path_alignment"]
+        stages["match"] = (tweened - parsed) - stages["animation"] - stages["path_alignment"]
+        stages["total"] = end - start
+        best = stages if best is None else {stage: min(best[stage], stages[stage]) for stage in best}
+    return {
+        "generator": make_keyframes.__name__,
+        "params": params,
+        "options": options,
+        "input_bytes": sum(len(document) for document in documents),
+        "output_bytes": output_bytes,
+        "seconds": best,
+    }
+
+
+def cases(quick=False):
+    """
+        Yield (name, generator, params, options) for the standard set of cases. Each
+        family steps one parameter up so that super-linear growth shows up
+        as a growing time per element between steps.
+    """
+    scales = [1, 4] if quick else [1, 4, 16]
+    for scale in scales:
+        yield "elements_%d" % (250 * scale), shapes_keyframes, {"elements": 250 * scale}, {}
+    for scale in scales:
+        yield "path_length_%d" % (25 * scale), shapes_keyframes, {"elements": 20, "path_length": 25 * scale}, {}
+    for depth in ([1, 8] if quick else [1, 8, 32]):
+        yield "depth_%d" % (depth), shapes_keyframes, {"elements": 500, "depth": depth}, {}
+    for added, removed in [(0, 0), (50, 50)]:
+        yield "churn_%d_%d" % (added, removed), shapes_keyframes, {
+            "elements": 1000, "matched": 100 - removed, "added": added, "removed": removed}, {}
+    # The parts of Graphviz nodes and edges have no ids, so need group matching
+    for scale in scales:
+        yield "graph_%d" % (50 * scale), graph_keyframes, {"nodes": 50 * scale}, {"group_matching": True}
+
+
+# Seconds that importing TweenSVG may take, the tween engine is only imported when it is used
+IMPORT_BUDGET = 0.03
+
+
+def import_time(module, repeat=3):
+    """
+        Import module in a new interpreter with python -X importtime and
+        return the time it took in seconds, the best of repeat runs, and
+        the set of names of the modules it imported
+    """
+    best = None
+    for _ in range(repeat):
+        result = subprocess.run([sys.executable, "-X", "importtime", "-c", "import " + module],
+                                stderr=subprocess.PIPE, universal_newlines=True, check=True)
+        # Modules are listed as they finish importing, indented by depth, so
+        # the ones module imported are those listed since the last unindented one
+        modules = set()
+        for line in result.stderr.splitlines():
+            if not line.startswith("import time:"):
+                continue
+            _, cumulative, name = line[len("import time:"):].split("|")
+            if not cumulative.strip().isdigit():
+                continue # The header
+            if name.startswith("  "):
+                modules.add(name.strip())
+                continue
+            if name.strip() != module:
+                modules = set() # Imported at startup, e.g. site
+                continue
+            modules.add(module)
+            seconds = int(cumulative) / 1e6
+            if best is None or seconds < best[0]:
+                best = (seconds, modules)
+            break
+    return best
+
+
+def corpus_keyframes(directory="test_inputs"):
+    """ Return a list of the sorted .svg filenames in each subdirectory of directory that has at least two """
+    corpus = []
+    for subdirectory in sorted(glob.glob(os.path.join(directory, "*", ""))):
+        filenames = sorted(glob.glob(os.path.join(subdirectory, "*.svg")))
+        if len(filenames) >= 2:
+            corpus.append(filenames)
+    return corpus
+
+
+def serializer_case(keyframe_sets, repeat=5):
+    """
+        Tween each list of keyframes (filenames or ElementTrees) in
+        keyframe_sets, then time writing every tween to a BytesIO with
+        ElementTree.write and with Serializer, returning the best time over
+        repeat runs of each and whether they wrote the same bytes
+    """
+    tweens = []
+    for keyframes in keyframe_sets:
+        tweener = Tweener()
+        for keyframe in keyframes:
+            if isinstance(keyframe, str):
+                tweener.add_keyframe_from_file(keyframe)
+            else:
+                tweener.add_keyframe(keyframe)
+        tweens.extend(tweener.tweens())
+    serializer = Serializer()
+    def write_elementtree(tween):
+        output = BytesIO()
+        tween.write(output, xml_declaration=True, encoding="utf-8")
+        return output.getvalue()
+    def write_serializer(tween):
+        output = BytesIO()
+        serializer.write(tween, output)
+        return output.getvalue()
+    seconds = {}
+    outputs = {}
+    for name, write in [("elementtree", write_elementtree), ("serializer", write_serializer)]:
+        for _ in range(repeat):
+            start = time.perf_counter()
+            outputs[name] = [write(tween) for tween in tweens]
+            elapsed = time.perf_counter() - start
+            seconds[name] = min(seconds.get(name, elapsed), elapsed)
+    return {
+        "tweens": len(tweens),
+        "output_bytes": sum(len(output) for output in outputs["serializer"]),
+        "identical": outputs["serializer"] == outputs["elementtree"],
+        "seconds": seconds,
+    }
+
+
+def run_serializer(directory="test_inputs", repeat=5):
+    """ Return the serializer_case results for the test_inputs corpus and for a pair of 3000 element keyframes """
+    return {
+        "corpus": serializer_case(corpus_keyframes(directory), repeat),
+        "elements_3000": serializer_case([shapes_keyframes(elements=3000)], repeat),
+    }
+
+
+def run(quick=False, repeat=3, only=None):
+    results = {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "cases": {},
+        "import_seconds": import_time("TweenSVG", repeat)[0],
+    }
+    for name, make_keyframes, params, options in cases(quick):
+        if only and name not in only:
+            continue
+        results["cases"][name] = run_case(make_keyframes, repeat=repeat, options=options, **params)
+    return results
+
+
+def compare(old, new, threshold):
+    """ Return lines describing each case's change in total time and whether any slowed by more than threshold """
+    lines = []
+    slower = False
+    totals = [(name, old["cases"][name]["seconds"]["total"], case["seconds"]["total"])
+              for name, case in new["cases"].items() if name in old["cases"]]
+    if "import_seconds" in old:
+        totals.append(("import", old["import_seconds"], new["import_seconds"]))
+    for name, before, after in totals:
+        ratio = after / before if before else float("inf")
+        flag = ""
+        if ratio > threshold:
+            slower = True
+            flag = "  SLOWER"
+        lines.append("%-20s %9.4fs -> %9.4fs  x%.2f%s" % (name, before, after, ratio, flag))
+    return lines, slower
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Time tweening synthetic SVG keyframes.')
+    parser.add_argument('--quick', action='store_true', help='Run smaller cases')
+    parser.add_argument('--repeat', type=int, default=3, help='Number of runs of each case, the best is kept')
+    parser.add_argument('--case', action='append', help='Only run the named case, may be given more than once')
+    parser.add_argument('--output', help='Write the results as JSON to this file instead of stdout')
+    parser.add_argument('--compare', metavar='RESULTS', help='JSON results of an earlier run to compare with')
+    parser.add_argument('--threshold', type=float, default=1.5,
+                        help='With --compare, exit with an error if any case is this many times slower')
+    parser.add_argument('--serializer', metavar='DIRECTORY', nargs='?', const='test_inputs',
+                        help='Compare Serializer with ElementTree.write on the keyframes in DIRECTORY '
+                        '(by default test_inputs) and exit')
+    args = parser.parse_args(argv)
+
+    if args.serializer:
+        results = run_serializer(args.serializer, max(args.repeat, 1))
+        for name, result in results.items():
+            before, after = result["seconds"]["elementtree"], result["seconds"]["serializer"]
+            print("%-20s %3d tweens  ElementTree.write %9.4fs  Serializer %9.4fs  x%.2f%s" % (
+                name, result["tweens"], before, after, after / before if before else float("inf"),
+                "" if result["identical"] else "  DIFFERENT OUTPUT"))
+        return 0 if all(result["identical"] for result in results.values()) else 1
+
+    results = run(quick=args.quick, repeat=args.repeat, only=args.case)
+    if results["import_seconds"] > IMPORT_BUDGET:
+        print("Warning, importing TweenSVG took %.4fs, over the budget of %.4fs" % (
+            results["import_seconds"], IMPORT_BUDGET), file=sys.stderr)
+    output = json.dumps(results, indent=2, sort_keys=True)
+    if args.output:
+        with open(args.output, "w") as output_file:
+            output_file.write(output + "\n")
+    elif not args.compare:
+        print(output)
+    if args.compare:
+        with open(args.compare) as old_file:
+            lines, slower = compare(json.load(old_file), results, args.threshold)
+        print("\n".join(lines))
+        if slower:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
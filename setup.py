@@ -5,6 +5,7 @@ Setup script for TweenSVG
 from setuptools import setup, find_packages
 from codecs import open
 from os import path
+import re
 
 here = path.abspath(path.dirname(__file__))
 
@@ -12,13 +13,17 @@ here = path.abspath(path.dirname(__file__))
 with open(path.join(here, 'README.rst'), encoding='utf-8') as f:
     long_description = f.read()
 
+# The version is kept in the package only, read it from there
+with open(path.join(here, 'TweenSVG', '__init__.py'), encoding='utf-8') as f:
+    version = re.search(r"^__version__ = '([^']*)'", f.read(), re.M).group(1)
+
 setup(
     name='TweenSVG',
 
     # Versions should comply with PEP440.  For a discussion on single-sourcing
     # the version across setup.py and the project code, see
     # https://packaging.python.org/en/latest/single_source_version.html
-    version='0.1.0a1',
+    version=version,
 
     description='A library for tweening pairs of Scalable Vector Graphics (SVG) files',
     long_description=long_description,
@@ -44,13 +49,11 @@ setup(
 
         'License :: OSI Approved :: MIT License',
 
-        # TODO - Aiming to support all of python 3, test if they are all supported
         'Programming Language :: Python :: 3',
-        'Programming Language :: Python :: 3.2',
-        'Programming Language :: Python :: 3.3',
-        'Programming Language :: Python :: 3.4',
-        'Programming Language :: Python :: 3.5',
-        'Programming Language :: Python :: 3.6',
+        'Programming Language :: Python :: 3.9',
+        'Programming Language :: Python :: 3.10',
+        'Programming Language :: Python :: 3.11',
+        'Programming Language :: Python :: 3.12',
         'Operating System :: OS Independent',
         'Topic :: Multimedia :: Graphics :: Graphics Conversion',
     ],
@@ -63,16 +66,13 @@ setup(
         'defusedxml>=0.5.0'
     ],
 
-    python_requires='~=3.0',
-
-    # TODO - Might need some of these later
-    # List additional groups of dependencies here (e.g. development
-    # dependencies). You can install these using the following syntax,
-    # for example:
-    # $ pip install -e .[dev,test]
-    #extras_require={
-    #    'dev': ['check-manifest'],
-    #    'test': ['coverage'],
-    #},
+    python_requires='>=3.9',
+
+    # Optional dependencies, install with e.g.
+    # $ pip install -e .[numpy]
+    extras_require={
+        # Faster handling of very long paths
+        'numpy': ['numpy'],
+    },
 
 )